@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from agents.donation.donation_agents import (
     generate_thank_you_message,
@@ -6,12 +8,22 @@ from agents.donation.donation_agents import (
     promote_recurring_giving,
     answer_donation_question
 )
+from agents.donation.impact_story_pool import IMPACT_STORY_POOL, serve_impact_story
+from agents.shared.agent_runtime import run_blocking
+from agents.shared.job_queue import CallbackRejected, JobQueueFull, check_callback_url, job_queue
 from agents.shared.utils import setup_logging
 
 logger = setup_logging()
 
 donation_router = APIRouter(prefix="/donation", tags=["Donation Engagement"])
 
+# Each endpoint also runs as a background job (?background=true); a job's
+# result carries the same key the synchronous response does
+job_queue.register("thank_you", generate_thank_you_message, "thank_you_message")
+job_queue.register("impact_story", serve_impact_story, "impact_story")
+job_queue.register("recurring", promote_recurring_giving, "recurring_message")
+job_queue.register("qa", answer_donation_question, "answer")
+
 class ThankYouRequest(BaseModel):
     donor_name: str
     amount: str
@@ -30,41 +42,80 @@ class DonationQARequest(BaseModel):
     question: str
     donor_context: str = "general"
 
+async def submit_job(request: Request, kind: str, args: List[Any], callback_url: Optional[str]) -> JSONResponse:
+    """Queue a generation job and answer 202 with where to poll for it"""
+    if callback_url:
+        try:
+            await run_blocking(check_callback_url, callback_url)
+        except CallbackRejected as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        job = await run_blocking(job_queue.submit, kind, args, callback_url)
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Too many pending jobs, try again later")
+    except Exception as e:
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue job")
+    return JSONResponse(status_code=202, content={
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": str(request.url_for("get_donation_job", job_id=job["job_id"])),
+    })
+
 @donation_router.get("/")
 async def donation_health():
     return {"status": "healthy", "service": "donation_engagement"}
 
+@donation_router.get("/jobs/{job_id}", name="get_donation_job")
+async def get_donation_job(job_id: str):
+    job = await run_blocking(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @donation_router.post("/thank-you")
-async def create_thank_you(req: ThankYouRequest):
+async def create_thank_you(req: ThankYouRequest, request: Request, background: bool = False, callback_url: Optional[str] = None):
+    if background:
+        return await submit_job(request, "thank_you", [req.donor_name, req.amount, req.email], callback_url)
     try:
-        message = generate_thank_you_message(req.donor_name, req.amount, req.email)
+        message = await run_blocking(generate_thank_you_message, req.donor_name, req.amount, req.email)
         return {"thank_you_message": message}
     except Exception as e:
         logger.error(f"Thank you generation failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate thank you message")
 
 @donation_router.post("/impact-story")
-async def create_impact_story(req: ImpactStoryRequest):
+async def create_impact_story(req: ImpactStoryRequest, request: Request, background: bool = False, callback_url: Optional[str] = None):
+    if background:
+        return await submit_job(request, "impact_story", [req.category, req.donor_segment], callback_url)
     try:
-        story = generate_impact_story(req.category, req.donor_segment)
+        if IMPACT_STORY_POOL:
+            # A pool read: never waits on the LLM, so it stays on the event loop
+            story = serve_impact_story(req.category, req.donor_segment)
+        else:
+            story = await run_blocking(generate_impact_story, req.category, req.donor_segment)
         return {"impact_story": story}
     except Exception as e:
         logger.error(f"Impact story generation failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate impact story")
 
 @donation_router.post("/recurring")
-async def promote_recurring(req: RecurringGivingRequest):
+async def promote_recurring(req: RecurringGivingRequest, request: Request, background: bool = False, callback_url: Optional[str] = None):
+    if background:
+        return await submit_job(request, "recurring", [req.donor_name, req.current_amount], callback_url)
     try:
-        message = promote_recurring_giving(req.donor_name, req.current_amount)
+        message = await run_blocking(promote_recurring_giving, req.donor_name, req.current_amount)
         return {"recurring_message": message}
     except Exception as e:
         logger.error(f"Recurring giving promotion failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate recurring giving message")
 
 @donation_router.post("/qa")
-async def donation_qa(req: DonationQARequest):
+async def donation_qa(req: DonationQARequest, request: Request, background: bool = False, callback_url: Optional[str] = None):
+    if background:
+        return await submit_job(request, "qa", [req.question, req.donor_context], callback_url)
     try:
-        answer = answer_donation_question(req.question, req.donor_context)
+        answer = await run_blocking(answer_donation_question, req.question, req.donor_context)
         return {"answer": answer}
     except Exception as e:
         logger.error(f"Donation Q&A failed: {e}")
@@ -0,0 +1,347 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from agents.donation.donation_agents import (
+    DEFAULT_IMPACT_STORIES,
+    IMPACT_STORIES_PATH,
+    IMPACT_STORY_FALLBACK,
+    STORY_ANGLES,
+    curated_stories,
+    generate_impact_story,
+    load_impact_stories
+)
+from agents.shared.metrics import metrics_registry
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+# Serve impact stories from a pre-generated pool (false: generate one per request)
+IMPACT_STORY_POOL = os.getenv("IMPACT_STORY_POOL", "true").lower() == "true"
+IMPACT_STORY_POOL_PATH = os.getenv("IMPACT_STORY_POOL_PATH", os.path.join("data", "impact_story_pool.json"))
+
+# Stories kept per (category, donor segment); a refill starts below half of this
+IMPACT_STORY_POOL_SIZE = int(os.getenv("IMPACT_STORY_POOL_SIZE", "4"))
+
+# Times a story is served before it is retired and replaced
+IMPACT_STORY_MAX_SERVES = int(os.getenv("IMPACT_STORY_MAX_SERVES", "25"))
+
+# Segments pre-generated at startup for every curated category
+IMPACT_STORY_SEGMENTS = [s.strip().lower() for s in os.getenv("IMPACT_STORY_SEGMENTS", "regular_donor").split(",") if s.strip()]
+
+# Donor segments that get their own pool; any other segment is served from the default one
+DEFAULT_DONOR_SEGMENT = "regular_donor"
+IMPACT_STORY_DONOR_SEGMENTS = {
+    s.strip().lower() for s in os.getenv(
+        "IMPACT_STORY_DONOR_SEGMENTS",
+        "regular_donor,first_time_donor,monthly_donor,major_donor,lapsed_donor",
+    ).split(",") if s.strip()
+} | set(IMPACT_STORY_SEGMENTS) | {DEFAULT_DONOR_SEGMENT}
+
+# Seconds between checks of the curated data file for changes
+DATA_CHECK_SECONDS = 5.0
+
+# Seconds before a refill that produced no stories (e.g. the model is down) is retried
+REFILL_RETRY_SECONDS = 60.0
+
+# Most (category, segment) pools kept; the least recently served go first
+MAX_POOLS = 64
+
+POOL_FILE_VERSION = 1
+
+stories_served = metrics_registry.counter(
+    "ministry_impact_stories_served_total",
+    "Impact stories served, by source (pool, or curated while a pool fills)",
+    ("source",),
+)
+
+def data_version(impact_data: dict) -> str:
+    """Fingerprint of the curated data, so stories built on old data are replaced"""
+    return hashlib.sha256(json.dumps(impact_data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+class ImpactStoryPool:
+    """Pre-generated impact stories per (category, donor segment), served in rotation.
+
+    serve() is a dictionary read: it hands out the pool's stories round-robin,
+    so consecutive requests never repeat a story while the pool holds more
+    than one, and retires a story after max_serves. When a pool runs low,
+    is missing, or was built from an older version of the curated data, a
+    background worker generates replacements while the current stories (or
+    a curated story, for a new pool) keep being served. Pools are saved to
+    disk after each refill so a restart does not regenerate them.
+
+    Categories outside the curated data and segments outside
+    IMPACT_STORY_DONOR_SEGMENTS share the default pools, so request values
+    cannot create pools (and LLM calls) of their own. File reads happen on
+    the worker threads, never in serve().
+    """
+
+    def __init__(self, path: str = IMPACT_STORY_POOL_PATH, size: int = IMPACT_STORY_POOL_SIZE,
+                 max_serves: int = IMPACT_STORY_MAX_SERVES, refill_workers: int = 2):
+        self.path = path
+        self.size = max(1, size)
+        self.max_serves = max(1, max_serves)
+        self.refill_workers = refill_workers
+        self._pools: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._refilling: set = set()
+        self._retry_after: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._data: dict = {}
+        self._version = ""
+        self._data_mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._checking = False
+        self._curated_turn = itertools.count()
+        self._loaded = False
+        self.refills = 0
+        self.generated = 0
+        self.retired = 0
+
+    def serve(self, category: str, donor_segment: str) -> str:
+        """Next story for a category and segment, without waiting on the LLM or the disk"""
+        self._schedule_data_check()
+        key = self.pool_key(category, donor_segment)
+        story = None
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None:
+                self._pools.move_to_end(key)
+                stories = pool["stories"]
+                if stories:
+                    i = pool["next"] % len(stories)
+                    story = stories[i]
+                    story[1] += 1
+                    if story[1] >= self.max_serves:
+                        stories.pop(i)
+                        self.retired += 1
+                    else:
+                        pool["next"] = i + 1
+            low = (pool is None or pool["version"] != self._version
+                   or len(pool["stories"]) < max(1, self.size // 2))
+        if low:
+            self._schedule_refill(key)
+        if story is not None:
+            stories_served.inc(source="pool")
+            return story[0]
+        # A new pool is still filling: share a curated story meanwhile
+        stories_served.inc(source="curated")
+        data = self._data
+        curated = data.get(key[0]) or data.get("general") or DEFAULT_IMPACT_STORIES["general"]
+        item = curated[next(self._curated_turn) % len(curated)]
+        return f"{item.get('title', '')}: {item.get('description', '')}".strip(": ")
+
+    def pool_key(self, category: str, donor_segment: str) -> Tuple[str, str]:
+        """The pool a request is served from"""
+        category = (category or "").strip().lower()
+        donor_segment = (donor_segment or "").strip().lower()
+        return (category if category in self._data else "general",
+                donor_segment if donor_segment in IMPACT_STORY_DONOR_SEGMENTS else DEFAULT_DONOR_SEGMENT)
+
+    def prefill(self, segments: List[str] = IMPACT_STORY_SEGMENTS) -> int:
+        """Queue refills for every curated category in the given segments; returns how many"""
+        self._check_data(force=True)
+        queued = 0
+        for category in self._data:
+            for segment in segments:
+                key = (category, segment)
+                with self._lock:
+                    pool = self._pools.get(key)
+                    full = (pool is not None and pool["version"] == self._version
+                            and len(pool["stories"]) >= self.size)
+                if not full and self._schedule_refill(key):
+                    queued += 1
+        return queued
+
+    def _check_data(self, force: bool = False):
+        """Load saved pools once, then notice curated data changes every few seconds"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < DATA_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(IMPACT_STORIES_PATH)
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._data_mtime:
+            return
+        data = load_impact_stories()
+        version = data_version(data)
+        with self._lock:
+            changed = self._loaded and version != self._version
+            self._data, self._version, self._data_mtime = data, version, mtime
+            if not self._loaded:
+                self._loaded = True
+                self._load_saved()
+            stale = list(self._pools) if changed else []
+        if changed:
+            logger.info(f"Impact story data changed; refreshing {len(stale)} story pools")
+        for key in stale:
+            self._schedule_refill(key)
+
+    def _schedule_data_check(self):
+        """Run _check_data on a worker once the check interval has passed"""
+        with self._lock:
+            if self._checking or time.monotonic() - self._checked_at < DATA_CHECK_SECONDS:
+                return
+            self._checking = True
+        if not self._submit(self._background_data_check):
+            with self._lock:
+                self._checking = False
+
+    def _background_data_check(self):
+        try:
+            self._check_data(force=True)
+        except Exception as e:
+            logger.error(f"Impact story data check failed: {e}")
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def _schedule_refill(self, key: Tuple[str, str]) -> bool:
+        with self._lock:
+            if key in self._refilling or time.monotonic() < self._retry_after.get(key, 0.0):
+                return False
+            self._refilling.add(key)
+        if not self._submit(self._refill, key):
+            with self._lock:
+                self._refilling.discard(key)
+            return False
+        return True
+
+    def _submit(self, func, *args) -> bool:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refill_workers,
+                                                    thread_name_prefix="story-refill")
+        try:
+            self._executor.submit(func, *args)
+        except RuntimeError:
+            # Shutting down
+            return False
+        return True
+
+    def _refill(self, key: Tuple[str, str]):
+        category, segment = key
+        try:
+            with self._lock:
+                pool = self._pools.get(key)
+                version = self._version
+                current = pool is not None and pool["version"] == version
+                have = len(pool["stories"]) if current else 0
+                start = pool["generated"] if pool is not None else 0
+            curated = curated_stories(category)
+            new = []
+            for n in range(start, start + self.size - have):
+                # Uncached: there are only len(STORY_ANGLES) prompts per pool, and a
+                # cached reply would bring a retired story straight back
+                text = generate_impact_story(category, segment, curated[n % len(curated)],
+                                             STORY_ANGLES[n % len(STORY_ANGLES)], cache=False)
+                if text and text != IMPACT_STORY_FALLBACK:
+                    new.append([text, 0])
+            with self._lock:
+                pool = self._pools.setdefault(key, {"stories": [], "next": 0, "version": version, "generated": 0})
+                if pool["version"] != version:
+                    # Built from older data: the new stories replace all of it
+                    pool.update(stories=[], next=0, version=version)
+                pool["stories"].extend(new)
+                pool["generated"] = start + self.size - have
+                if new or have == self.size:
+                    self._retry_after.pop(key, None)
+                else:
+                    self._retry_after[key] = time.monotonic() + REFILL_RETRY_SECONDS
+                self._pools.move_to_end(key)
+                while len(self._pools) > MAX_POOLS:
+                    self._pools.popitem(last=False)
+                self.refills += 1
+                self.generated += len(new)
+            self._save()
+        except Exception as e:
+            logger.error(f"Impact story refill for {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def _load_saved(self):
+        """Saved pools built from the current curated data (caller holds the lock)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Failed to load impact story pool: {e}")
+            return
+        if saved.get("version") != POOL_FILE_VERSION:
+            return
+        for entry in saved.get("pools", []):
+            if entry.get("version") == self._version:
+                key = (entry["category"], entry["segment"])
+                self._pools[key] = {k: entry[k] for k in ("stories", "next", "version", "generated")}
+        logger.info(f"Loaded {len(self._pools)} impact story pools from {self.path}")
+
+    def _save(self):
+        with self._lock:
+            pools = [
+                {"category": category, "segment": segment, **pool, "stories": [list(s) for s in pool["stories"]]}
+                for (category, segment), pool in self._pools.items()
+            ]
+        # Written atomically so a restart never reads a partial file
+        with self._save_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": POOL_FILE_VERSION, "pools": pools}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Failed to save impact story pool: {e}")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": IMPACT_STORY_POOL,
+                "pools": len(self._pools),
+                "stories": sum(len(p["stories"]) for p in self._pools.values()),
+                "refilling": len(self._refilling),
+                "refills": self.refills,
+                "generated": self.generated,
+                "retired": self.retired,
+            }
+
+impact_story_pool = ImpactStoryPool()
+
+def serve_impact_story(category: str = "general", donor_segment: str = "regular_donor") -> str:
+    """Impact story from the pool, or a freshly generated one when the pool is off"""
+    if IMPACT_STORY_POOL:
+        return impact_story_pool.serve(category, donor_segment)
+    return generate_impact_story(category, donor_segment)
+
+def start_impact_story_pool() -> int:
+    """Load saved pools and top up the startup segments in the background"""
+    if not IMPACT_STORY_POOL:
+        return 0
+    try:
+        return impact_story_pool.prefill()
+    except Exception as e:
+        logger.error(f"Impact story pool prefill failed: {e}")
+        return 0
+
+def get_impact_story_stats() -> Dict[str, Any]:
+    return impact_story_pool.stats()
+
+def shutdown_impact_story_pool():
+    """Stop background refills (call on application shutdown)"""
+    impact_story_pool.close()
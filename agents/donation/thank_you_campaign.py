@@ -0,0 +1,302 @@
+"""
+Bulk thank-you campaign
+
+Streams a donor file (CSV with a header row, or JSONL), groups donors by
+gift tier and asks the thank-you agent for a few note templates per tier.
+Each donor's note is then filled in locally (name, amount and a giving
+verse), so a campaign of any size costs tiers x variants LLM calls. Notes
+are appended to the output as they are made and progress is checkpointed,
+so an interrupted run picks up where it stopped.
+
+Run (from the repository root):
+    python -m agents.donation.thank_you_campaign donors.csv --output thank_you_notes.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from agents.donation.donation_agents import thank_you_agent
+from agents.shared.agent_runtime import run_agent
+from agents.shared.llm_scheduler import BULK, prioritized
+from agents.shared.scripture_index import candidate_verses
+from agents.shared.tracing import mark_fallback, traced
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+CHECKPOINT_VERSION = 1
+
+# Lower bound of each gift tier, smallest first
+DEFAULT_TIERS = "0:supporter,100:partner,500:champion,2500:pillar"
+
+NAME_FIELDS = ("donor_name", "name", "full_name")
+AMOUNT_FIELDS = ("amount", "gift", "donation_amount")
+ID_FIELDS = ("donor_id", "id", "email")
+
+OUTPUT_FIELDS = ("donor_id", "donor_name", "email", "amount", "tier", "variant", "verse", "note")
+
+# Read by the thank-you agent and filled in per donor
+PLACEHOLDER = re.compile(r"\{(name|amount|verse)\}")
+
+THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+
+GIVING_VERSE_QUERY = "thank you for your generous gift giving stewardship provision"
+
+FALLBACK_TEMPLATE = (
+    "Dear {name},\n\n"
+    "Thank you for your generous gift of {amount}. Your partnership makes a tremendous "
+    "difference in our ministry, and we thank God for you.\n\n"
+    "{verse}\n\n"
+    "With gratitude,\nDr. Myles"
+)
+
+def parse_tiers(spec: str) -> List[Tuple[float, str]]:
+    """'0:supporter,100:partner' -> [(0.0, 'supporter'), (100.0, 'partner')]"""
+    tiers = []
+    for part in spec.split(","):
+        bound, _, name = part.strip().partition(":")
+        tiers.append((float(bound), name.strip()))
+    return sorted(tiers)
+
+def tier_for(amount: float, tiers: Sequence[Tuple[float, str]]) -> str:
+    name = tiers[0][1]
+    for bound, tier in tiers:
+        if amount >= bound:
+            name = tier
+    return name
+
+def tier_range(tier: str, tiers: Sequence[Tuple[float, str]]) -> str:
+    """Human-readable gift range of a tier, for the prompt"""
+    for i, (bound, name) in enumerate(tiers):
+        if name == tier:
+            if i + 1 < len(tiers):
+                return f"${bound:,.0f} to ${tiers[i + 1][0]:,.0f}"
+            return f"${bound:,.0f} and above"
+    return "any amount"
+
+def parse_amount(text) -> Optional[float]:
+    """'$1,250.00' -> 1250.0; None if there is no number"""
+    digits = re.sub(r"[^\d.]", "", str(text or ""))
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+def display_amount(text: str, value: float) -> str:
+    """The donor's own amount text when it names a currency, else dollars"""
+    text = str(text).strip()
+    return text if text and not text[0].isdigit() else f"${value:,.2f}"
+
+def first_field(row: Dict[str, str], names: Sequence[str]) -> str:
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+def read_donors(path: str) -> Iterator[Dict[str, str]]:
+    """Donor rows from a CSV (header row required) or JSONL file, one at a time"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                line = line.strip()
+                yield json.loads(line) if line else {}
+        else:
+            yield from csv.DictReader(f)
+
+def parse_template(text: str) -> Optional[str]:
+    """A usable note template from the model's reply, or None"""
+    template = THINK_BLOCK.sub("", text).strip()
+    if "{name}" not in template or "{amount}" not in template:
+        return None
+    if "{verse}" not in template:
+        template += "\n\n{verse}"
+    return template
+
+@prioritized(BULK)
+@traced("campaign_template", thank_you_agent.agent_name)
+def generate_template(tier: str, gift_range: str, variant: int, variants: int) -> Optional[str]:
+    """One thank-you note template for a gift tier (None if the model's reply is unusable)"""
+    try:
+        prompt = f"""
+        Write a thank-you note template for donors in the "{tier}" tier (gifts of {gift_range}).
+        This is variant {variant + 1} of {variants}: open and phrase it differently from the others.
+
+        Use these placeholders exactly as written, each once:
+        {{name}} for the donor's name, {{amount}} for the gift, {{verse}} for a scripture about giving.
+
+        Keep Dr. Myles' warm pastoral voice, around 120-180 words. Reply with the template only.
+        """
+        template = parse_template(run_agent(thank_you_agent, prompt))
+        if template is None:
+            logger.warning(f"Template {variant + 1} for tier {tier} is missing placeholders")
+            mark_fallback()
+        return template
+    except Exception as e:
+        logger.error(f"Campaign template generation failed: {e}")
+        mark_fallback()
+        return None
+
+def tier_templates(tier: str, tiers: Sequence[Tuple[float, str]], variants: int) -> List[str]:
+    """The usable variants for a tier, generated concurrently (empty if every call failed)"""
+    gift_range = tier_range(tier, tiers)
+    with ThreadPoolExecutor(max_workers=variants, thread_name_prefix="campaign") as pool:
+        templates = list(pool.map(lambda v: generate_template(tier, gift_range, v, variants), range(variants)))
+    return [t for t in templates if t]
+
+def render_note(template: str, name: str, amount: str, verse: str) -> str:
+    values = {"name": name, "amount": amount, "verse": verse}
+    return PLACEHOLDER.sub(lambda m: values[m.group(1)], template)
+
+def load_checkpoint(path: str, input_path: str, fresh: bool) -> Optional[dict]:
+    if fresh or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"{path} belongs to a different campaign; pass --fresh to start over")
+    return checkpoint
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Written atomically so a crash leaves either the old or the new checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def run_campaign(input_path: str, output_path: str, tiers: Sequence[Tuple[float, str]],
+                 variants: int = 3, checkpoint_every: int = 500, fresh: bool = False) -> dict:
+    """Write a thank-you note per donor, resuming from the checkpoint if there is one.
+
+    Memory stays flat: donors are streamed, and only the tier templates are
+    kept between rows. The checkpoint records how many input rows are done
+    and the output size at that point, so notes written after the last
+    checkpoint are dropped and rewritten on resume rather than duplicated.
+    """
+    checkpoint_path = output_path + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path, input_path, fresh) or {
+        "version": CHECKPOINT_VERSION,
+        "input": os.path.abspath(input_path),
+        "rows_done": 0,
+        "notes": 0,
+        "skipped": 0,
+        "output_bytes": 0,
+        "llm_calls": 0,
+        "templates": {},
+    }
+    resumed_rows = checkpoint["rows_done"]
+    resumed_notes = checkpoint["notes"]
+    # Only templates the model produced are checkpointed; a tier that fell
+    # back to the stock note is generated again on resume
+    saved: Dict[str, List[str]] = {tier: t for tier, t in checkpoint["templates"].items()
+                                   if t and t != [FALLBACK_TEMPLATE]}
+    checkpoint["templates"] = saved
+    templates: Dict[str, List[str]] = dict(saved)
+    verses = candidate_verses(GIVING_VERSE_QUERY, limit=3)
+    as_csv = output_path.lower().endswith(".csv")
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "a", encoding="utf-8", newline=""):
+        pass
+    os.truncate(output_path, checkpoint["output_bytes"])
+    if resumed_rows:
+        logger.info(f"Resuming campaign after {resumed_rows} donors ({resumed_notes} notes)")
+
+    start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=OUTPUT_FIELDS) if as_csv else None
+        if writer and checkpoint["output_bytes"] == 0:
+            writer.writeheader()
+
+        def commit():
+            out.flush()
+            os.fsync(out.fileno())
+            checkpoint["output_bytes"] = os.fstat(out.fileno()).st_size
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        for row_number, row in enumerate(read_donors(input_path), start=1):
+            if row_number <= resumed_rows:
+                continue
+            name = first_field(row, NAME_FIELDS)
+            amount_text = first_field(row, AMOUNT_FIELDS)
+            amount = parse_amount(amount_text)
+            if not name or amount is None:
+                logger.warning(f"Skipping donor row {row_number}: missing name or amount")
+                checkpoint["skipped"] += 1
+            else:
+                tier = tier_for(amount, tiers)
+                if tier not in templates:
+                    generated = tier_templates(tier, tiers, variants)
+                    checkpoint["llm_calls"] += len(generated)
+                    if generated:
+                        saved[tier] = generated
+                    else:
+                        logger.warning(f"No usable templates for tier {tier}; using the stock note")
+                    templates[tier] = generated or [FALLBACK_TEMPLATE]
+                donor_id = first_field(row, ID_FIELDS) or name
+                # Hash-based choices keep each donor's note stable across resumes
+                h = zlib.crc32(donor_id.encode("utf-8"))
+                variant = h % len(templates[tier])
+                verse = verses[(h // len(templates[tier])) % len(verses)]
+                shown_amount = display_amount(amount_text, amount)
+                record = {
+                    "donor_id": donor_id,
+                    "donor_name": name,
+                    "email": first_field(row, ("email",)),
+                    "amount": shown_amount,
+                    "tier": tier,
+                    "variant": variant,
+                    "verse": verse.split(" - ")[0],
+                    "note": render_note(templates[tier][variant], name, shown_amount, verse),
+                }
+                if writer:
+                    writer.writerow(record)
+                else:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint["notes"] += 1
+            checkpoint["rows_done"] = row_number
+            if row_number % checkpoint_every == 0:
+                commit()
+                logger.info(f"Campaign progress: {checkpoint['notes']} notes written")
+        commit()
+
+    elapsed = time.perf_counter() - start
+    notes_this_run = checkpoint["notes"] - resumed_notes
+    return {
+        "input": input_path,
+        "output": output_path,
+        "donors": checkpoint["rows_done"],
+        "notes": checkpoint["notes"],
+        "skipped": checkpoint["skipped"],
+        "resumed_after": resumed_rows,
+        "tiers": {tier: len(t) for tier, t in templates.items()},
+        "fallback_tiers": sorted(tier for tier in templates if tier not in saved),
+        "llm_calls": checkpoint["llm_calls"],
+        "elapsed_seconds": round(elapsed, 2),
+        "notes_per_minute": round(notes_this_run / elapsed * 60, 1) if elapsed > 0 else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate thank-you notes for a donor file")
+    parser.add_argument("input", help="Donor CSV (with a header row) or JSONL file")
+    parser.add_argument("--output", default="thank_you_notes.jsonl", help="Notes output (.jsonl or .csv)")
+    parser.add_argument("--tiers", default=DEFAULT_TIERS, help="Tier lower bounds, e.g. 0:supporter,100:partner")
+    parser.add_argument("--variants", type=int, default=3, help="LLM templates per tier")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="Donors between checkpoints")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    report = run_campaign(args.input, args.output, parse_tiers(args.tiers), max(1, args.variants),
+                          max(1, args.checkpoint_every), args.fresh)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
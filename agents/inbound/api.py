@@ -1,14 +1,25 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from agents.inbound.inbound_agent import inbound_agent
+from typing import Dict, List, Optional, Tuple
+from agents.inbound.inbound_agent import INBOUND_DEADLINE_SECONDS, inbound_agent_async, plan_inbound_response, plan_priority
 from agents.inbound.swarm_agents import (
-    detect_escalation_swarm,
-    translate_message_swarm,
-    route_prayer_request_swarm
+    stream_polish_response_swarm_async,
+    translate_message_swarm_async,
+    route_prayer_request_swarm_async
 )
+from agents.shared.agent_runtime import run_blocking
 from agents.shared.analytics import log_interaction
-from agents.shared.utils import setup_logging
+from agents.shared.deadlines import deadline, remaining
+from agents.shared.utils import message_body, setup_logging
 from agents.shared.faq_tool import get_answer
+from agents.shared.keyword_engine import escalation_keywords
+from agents.shared.language_id import resolve_language
+from agents.shared.llm_scheduler import BULK, llm_priority
+from agents.inbound.faq_artifacts import get_precompiled_answer
+import asyncio
+import json
+import os
 import time
 
 # Setup logging
@@ -17,11 +28,19 @@ logger = setup_logging()
 # Create router for inbound system
 inbound_router = APIRouter(prefix="/inbound", tags=["Inbound Communications"])
 
+# Batch processing limits
+INBOUND_BATCH_CONCURRENCY = int(os.getenv("INBOUND_BATCH_CONCURRENCY", "8"))
+INBOUND_BATCH_MAX_ITEMS = int(os.getenv("INBOUND_BATCH_MAX_ITEMS", "500"))
+
 class MessageRequest(BaseModel):
     message: str
     user_id: str = "anonymous"
     source: str = "website"
-    language: str = "en"  # 🆕 Language support
+    language: Optional[str] = None  # detected from the message when omitted or wrong
+
+class BatchMessageRequest(BaseModel):
+    messages: List[MessageRequest]
+    concurrency: Optional[int] = None  # defaults to INBOUND_BATCH_CONCURRENCY
 
 class TranslationRequest(BaseModel):
     message: str
@@ -36,9 +55,10 @@ def process_and_log(user_id: str, message: str, response: str,
                    needs_escalation: bool, faq_matched: bool, 
                    response_time_ms: float, source: str, language: str):
     """Background task to log interactions"""
-    logger.info(f"User {user_id} ({language}): {message[:100]}...")
-    logger.info(f"Response: {response[:100]}...")
-    logger.info(f"Escalation: {needs_escalation}, FAQ matched: {faq_matched}")
+    logger.info(
+        "User %s (%s): %s | Response: %s | Escalation: %s, FAQ matched: %s",
+        user_id, language, message_body(message), message_body(response), needs_escalation, faq_matched
+    )
     
     try:
         log_interaction(
@@ -67,10 +87,11 @@ async def process_message(req: MessageRequest, background_tasks: BackgroundTasks
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
     start_time = time.time()
+    language = resolve_language(req.message, req.language)
     
     try:
         # Process the message
-        response, faq_matched, needs_escalation = inbound_agent(req.message, req.language)
+        response, faq_matched, needs_escalation = await inbound_agent_async(req.message, language)
         
         # Calculate response time
         response_time_ms = (time.time() - start_time) * 1000
@@ -85,25 +106,190 @@ async def process_message(req: MessageRequest, background_tasks: BackgroundTasks
             faq_matched,
             response_time_ms,
             req.source,
-            req.language
+            language
         )
         
         return {
             "response": response,
             "needs_escalation": needs_escalation,
             "faq_matched": faq_matched,
-            "language": req.language,
+            "language": language,
             "response_time_ms": response_time_ms
         }
     except Exception as e:
         logger.error(f"Error processing inbound message: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process message")
 
+@inbound_router.post("/process/stream")
+async def process_message_stream(req: MessageRequest, background_tasks: BackgroundTasks):
+    """Process an inbound message, streaming the reply as server-sent events.
+
+    Events: "metadata" first (escalation and FAQ flags), then "token" events
+    as the Dr. Myles polisher generates text, then "done" with the full
+    response. The polisher writes in the user's language directly, so there
+    is no back-translation wait.
+    """
+    if not req.message or req.message.strip() == "":
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    start_time = time.time()
+    language = resolve_language(req.message, req.language)
+    with deadline(INBOUND_DEADLINE_SECONDS):
+        plan = await plan_inbound_response(req.message, language)
+        # The stream runs in its own context: carry what is left of the deadline over
+        time_left = remaining()
+
+    async def events():
+        yield sse_event("metadata", {
+            "needs_escalation": plan["needs_escalation"],
+            "faq_matched": plan["faq_matched"],
+            "language": language
+        })
+
+        chunks = []
+        try:
+            if plan["final_response"] is not None:
+                chunks.append(plan["final_response"])
+                yield sse_event("token", {"text": plan["final_response"]})
+            else:
+                with llm_priority(plan_priority(plan)), deadline(time_left):
+                    async for token in stream_polish_response_swarm_async(
+                        plan["raw_response"], plan["context"], plan["scripture"], language
+                    ):
+                        chunks.append(token)
+                        yield sse_event("token", {"text": token})
+        except Exception as e:
+            logger.error(f"Error streaming inbound response: {str(e)}")
+            yield sse_event("error", {"detail": "Failed to generate response"})
+
+        response = "".join(chunks)
+        response_time_ms = (time.time() - start_time) * 1000
+        background_tasks.add_task(
+            process_and_log,
+            req.user_id,
+            req.message,
+            response,
+            plan["needs_escalation"],
+            plan["faq_matched"],
+            response_time_ms,
+            req.source,
+            language
+        )
+        yield sse_event("done", {"response": response, "response_time_ms": response_time_ms})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@inbound_router.post("/process/batch")
+async def process_message_batch(req: BatchMessageRequest, background_tasks: BackgroundTasks):
+    """Process many inbound messages, streaming NDJSON results as each completes.
+
+    Identical messages (same text and resolved language) are processed once
+    and their result is emitted for every submitted index. Messages with escalation
+    keywords or a high escalation classifier score are scheduled first so
+    urgent results surface early.
+    """
+    if not req.messages:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(req.messages) > INBOUND_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {INBOUND_BATCH_MAX_ITEMS} messages")
+
+    concurrency = max(1, min(req.concurrency or INBOUND_BATCH_CONCURRENCY, INBOUND_BATCH_CONCURRENCY))
+
+    return StreamingResponse(
+        stream_batch_results(req.messages, concurrency, background_tasks),
+        media_type="application/x-ndjson",
+        background=background_tasks
+    )
+
+async def stream_batch_results(messages: List[MessageRequest], concurrency: int,
+                               background_tasks: BackgroundTasks):
+    """Yield one NDJSON line per submitted message as results complete"""
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for index, item in enumerate(messages):
+        if not item.message or item.message.strip() == "":
+            yield json.dumps({"index": index, "user_id": item.user_id, "error": "Message cannot be empty"}) + "\n"
+            continue
+        message = item.message.strip()
+        groups.setdefault((message, resolve_language(message, item.language)), []).append(index)
+
+    # Score the English messages with the local escalation classifier in one
+    # vectorized pass; translated ones are scored inside the pipeline.
+    # Imported here so numpy loads on first use.
+    from agents.shared.escalation_classifier import ESCALATION_LOCAL_HIGH, escalation_scores
+    english = [key for key in groups if key[1] == "en"]
+    scores = dict(zip(english, await run_blocking(escalation_scores, [message for message, _ in english]))) if english else {}
+
+    # Likely escalations first, then submission order
+    keys = sorted(groups, key=lambda key: not (escalation_keywords(key[0])
+                                               or (scores.get(key) or 0.0) >= ESCALATION_LOCAL_HIGH))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(key: Tuple[str, str]):
+        async with semaphore:
+            start_time = time.time()
+            try:
+                # Batches are imports, not live conversations
+                with llm_priority(BULK):
+                    result = await inbound_agent_async(*key, escalation_score=scores.get(key))
+            except Exception as e:
+                logger.error(f"Error processing batch message: {str(e)}")
+                result = None
+            return key, result, (time.time() - start_time) * 1000
+
+    tasks = [asyncio.create_task(process(key)) for key in keys]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            (message, language), result, response_time_ms = await next_done
+            indexes = groups[(message, language)]
+
+            if result is None:
+                for index in indexes:
+                    yield json.dumps({"index": index, "user_id": messages[index].user_id, "error": "Failed to process message"}) + "\n"
+                continue
+
+            response, faq_matched, needs_escalation = result
+            for index in indexes:
+                item = messages[index]
+                background_tasks.add_task(
+                    process_and_log,
+                    item.user_id,
+                    item.message,
+                    response,
+                    needs_escalation,
+                    faq_matched,
+                    response_time_ms,
+                    item.source,
+                    language
+                )
+                yield json.dumps({
+                    "index": index,
+                    "user_id": item.user_id,
+                    "response": response,
+                    "needs_escalation": needs_escalation,
+                    "faq_matched": faq_matched,
+                    "language": language,
+                    "response_time_ms": response_time_ms,
+                    "deduplicated": len(indexes) > 1
+                }) + "\n"
+    finally:
+        # Client went away: stop work that has not finished
+        for task in tasks:
+            task.cancel()
+
 @inbound_router.post("/translate")
 async def translate_message(req: TranslationRequest):
     """🆕 Translate message to target language"""
     try:
-        translated = translate_message_swarm(req.message, req.target_language)
+        translated = await translate_message_swarm_async(req.message, req.target_language)
         return {
             "original": req.message,
             "translated": translated,
@@ -117,7 +303,7 @@ async def translate_message(req: TranslationRequest):
 async def route_prayer(req: PrayerRequest, background_tasks: BackgroundTasks):
     """🆕 Route prayer requests and deliverance needs"""
     try:
-        routing_info = route_prayer_request_swarm(req.message)
+        routing_info = await route_prayer_request_swarm_async(req.message)
         
         # Log prayer request
         background_tasks.add_task(
@@ -143,9 +329,11 @@ async def route_prayer(req: PrayerRequest, background_tasks: BackgroundTasks):
 async def faq_lookup(req: MessageRequest):
     """Enhanced FAQ lookup with multilingual support"""
     try:
+        language = resolve_language(req.message, req.language)
+
         # Translate question to English if needed
-        if req.language != "en":
-            english_question = translate_message_swarm(req.message, "en")
+        if language != "en":
+            english_question = await translate_message_swarm_async(req.message, "en")
         else:
             english_question = req.message
             
@@ -155,16 +343,26 @@ async def faq_lookup(req: MessageRequest):
         if not faq_answer:
             return {"answer": None, "matched": False}
         
+        # Serve the precompiled response when the artifact has one
+        precompiled_answer = get_precompiled_answer(faq_answer, language)
+        if precompiled_answer:
+            return {
+                "answer": precompiled_answer,
+                "matched": True,
+                "language": language,
+                "precompiled": True
+            }
+        
         # Translate answer back if needed
-        if req.language != "en":
-            translated_answer = translate_message_swarm(faq_answer, req.language)
+        if language != "en":
+            translated_answer = await translate_message_swarm_async(faq_answer, language)
         else:
             translated_answer = faq_answer
             
         return {
             "answer": translated_answer,
             "matched": True,
-            "language": req.language
+            "language": language
         }
     except Exception as e:
         logger.error(f"FAQ lookup error: {str(e)}")
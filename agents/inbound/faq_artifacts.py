@@ -0,0 +1,191 @@
+"""
+Precompiled FAQ response artifacts
+
+Every FAQ answer is enhanced, paired with scripture, polished in Dr. Myles'
+voice and translated into each supported language ahead of time. The API
+then serves FAQ hits straight from the artifact with zero LLM calls.
+
+Build (requires the LM Studio backend):
+    python -m agents.inbound.faq_artifacts --output data/faq_artifacts.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from agents.shared.faq_tool import load_faq_data
+from agents.shared.utils import setup_logging, get_supported_languages
+
+logger = setup_logging()
+
+ARTIFACT_VERSION = 1
+DEFAULT_ARTIFACT_PATH = os.getenv("FAQ_ARTIFACT_PATH", os.path.join("data", "faq_artifacts.json"))
+
+def answer_key(answer: str) -> str:
+    """Stable artifact key for an FAQ answer.
+
+    Keyed by answer text, so editing an answer in the FAQ data simply misses
+    the artifact (and falls back to live generation) until it is rebuilt.
+    """
+    return hashlib.sha256(answer.strip().encode("utf-8")).hexdigest()[:16]
+
+def build_faq_artifacts(languages: Optional[Iterable[str]] = None,
+                        output_path: str = DEFAULT_ARTIFACT_PATH) -> dict:
+    """Generate polished, translated variants of every FAQ answer.
+
+    Calls the agents directly rather than through the *_swarm helpers, whose
+    fallbacks (the unenhanced answer, the untranslated text) would otherwise
+    be saved and served as precompiled responses. An FAQ whose generation
+    fails is left out, as is a translation that failed or came back
+    unchanged; those are answered live until the next build.
+    """
+    from agents.inbound.swarm_agents import (
+        build_faq_enhancement_prompt,
+        build_polish_prompt,
+        build_translation_prompt,
+        faq_enhancement_agent,
+        local_scripture_recommendation,
+        scripture_agent,
+        tone_agent,
+        translation_agent
+    )
+    from agents.shared.agent_runtime import run_agent
+
+    def generate(agent, prompt: str) -> str:
+        text = run_agent(agent, prompt).strip()
+        if not text:
+            raise ValueError(f"{agent.agent_name} returned an empty response")
+        return text
+
+    languages = list(languages or get_supported_languages().keys())
+    faqs = load_faq_data().get("faqs", [])
+    entries = {}
+    skipped_faqs = 0
+    skipped_variants = 0
+
+    for faq in faqs:
+        question = faq.get("question", "")
+        answer = faq.get("answer")
+        if not answer:
+            continue
+
+        logger.info(f"Precompiling FAQ: {question}")
+        try:
+            enhanced = generate(faq_enhancement_agent, build_faq_enhancement_prompt(answer, question))
+            scripture = local_scripture_recommendation(question) or generate(scripture_agent, question)
+            polished = generate(tone_agent, build_polish_prompt(enhanced, "FAQ inquiry", scripture))
+        except Exception as e:
+            logger.error(f"Skipping FAQ artifact for '{question}': {e}")
+            skipped_faqs += 1
+            continue
+
+        variants = {}
+        for language in languages:
+            if language == "en":
+                variants[language] = polished
+                continue
+            try:
+                translated = generate(translation_agent, build_translation_prompt(polished, language))
+            except Exception as e:
+                logger.error(f"Skipping {language} artifact for '{question}': {e}")
+                skipped_variants += 1
+                continue
+            if translated == polished:
+                logger.error(f"Skipping {language} artifact for '{question}': translation returned the source text")
+                skipped_variants += 1
+                continue
+            variants[language] = translated
+
+        entries[answer_key(answer)] = {
+            "question": question,
+            "answer": answer,
+            "scripture": scripture,
+            "variants": variants
+        }
+
+    if faqs and not entries:
+        # Keep whatever artifact is already deployed
+        raise RuntimeError(f"No FAQ artifacts could be generated; {output_path} left unchanged")
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "built_at": time.time(),
+        "languages": languages,
+        "entries": entries
+    }
+
+    # Write atomically so a running server never reads a partial file
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Wrote {len(entries)} FAQ artifacts for {languages} to {output_path} "
+                f"({skipped_faqs} FAQs and {skipped_variants} translations skipped)")
+    return artifact
+
+class FAQArtifactStore:
+    """Loads the artifact once and reloads it when the file changes"""
+
+    def __init__(self, path: str = DEFAULT_ARTIFACT_PATH):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, answer: str, language: str = "en") -> Optional[str]:
+        """Precompiled response for an FAQ answer, or None if not built"""
+        self._refresh()
+        entry = self._entries.get(answer_key(answer))
+        if entry is None:
+            return None
+        return entry["variants"].get(language)
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._entries, self._mtime = {}, None
+            return
+
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    artifact = json.load(f)
+                if artifact.get("version") != ARTIFACT_VERSION:
+                    logger.warning(f"Ignoring FAQ artifact with version {artifact.get('version')}, expected {ARTIFACT_VERSION}")
+                    self._entries = {}
+                else:
+                    self._entries = artifact.get("entries", {})
+                    logger.info(f"Loaded {len(self._entries)} precompiled FAQ responses")
+            except Exception as e:
+                logger.error(f"Failed to load FAQ artifacts: {e}")
+                self._entries = {}
+            self._mtime = mtime
+
+faq_artifacts = FAQArtifactStore()
+
+def get_precompiled_answer(answer: str, language: str = "en") -> Optional[str]:
+    """Precompiled polished/translated FAQ response if available"""
+    return faq_artifacts.get(answer, language)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile FAQ response artifacts")
+    parser.add_argument("--output", default=DEFAULT_ARTIFACT_PATH, help="Artifact output path")
+    parser.add_argument("--languages", nargs="*", help="Language codes (default: all supported)")
+    args = parser.parse_args()
+    try:
+        build_faq_artifacts(args.languages, args.output)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+if __name__ == "__main__":
+    main()
@@ -1,180 +1,307 @@
+import asyncio
+import os
+from typing import List, Optional
 from agents.inbound.swarm_agents import (
-    detect_escalation_swarm, 
-    get_scripture_recommendation_swarm, 
-    polish_response_swarm,
-    process_faq_response_swarm,
-    translate_message_swarm,
-    route_prayer_request_swarm
+    consolidated_reply_swarm_async,
+    detect_escalation_swarm_async,
+    get_scripture_recommendation_swarm_async,
+    polish_response_swarm_async,
+    process_faq_response_swarm_async,
+    translate_message_swarm_async,
+    route_prayer_request_swarm_async
 )
+from agents.inbound.faq_artifacts import get_precompiled_answer
 from agents.shared.faq_tool import get_answer
-from agents.shared.utils import setup_logging
+from agents.shared.deadlines import deadline
+from agents.shared.keyword_engine import classify_intent, urgent_keywords
+from agents.shared.llm_scheduler import CRITICAL, current_priority, llm_priority
+from agents.shared.scripture_index import candidate_verses
+from agents.shared.stage_graph import StageGraph
+from agents.shared.utils import message_body, setup_logging
 
 # Setup logging
 logger = setup_logging()
 
+# "multi_agent" runs one agent per stage; "consolidated" trusts the local
+# router and writes the polished, localized reply in a single LLM call
+INBOUND_PIPELINE_MODE = os.getenv("INBOUND_PIPELINE_MODE", "multi_agent").lower()
+
+# Seconds every LLM call for one message gets in total; stages still running
+# then fall back to their local answers (0: no deadline)
+INBOUND_DEADLINE_SECONDS = float(os.getenv("INBOUND_DEADLINE_SECONDS", "45")) or None
+
+PRAYER_RESPONSE = "Thank you for sharing your prayer request. I've forwarded this to our prayer ministry team, and they will be interceding for you. Would you also like to schedule a personal prayer session with one of our ministers?"
+GENERAL_RESPONSE = "Thank you for reaching out. Your message has been received by our ministry team."
+DEFAULT_RESPONSE = "Thank you for your message. Our ministry team will review it and respond appropriately."
+
 def inbound_agent(user_message: str, user_language: str = "en"):
     """Process an inbound message using optimized agent routing.
-    
+
+    Blocking wrapper around inbound_agent_async for scripts and sync callers.
+    Do not call this from inside a running event loop; await
+    inbound_agent_async instead.
+
+    Args:
+        user_message: The incoming message
+        user_language: Language code (en, es, fr, etc.)
+
+    Returns:
+        tuple: (final_response, faq_matched, needs_escalation)
+    """
+    return asyncio.run(inbound_agent_async(user_message, user_language))
+
+async def inbound_agent_async(user_message: str, user_language: str = "en",
+                              deadline_seconds: Optional[float] = INBOUND_DEADLINE_SECONDS,
+                              escalation_score: Optional[float] = None):
+    """Process an inbound message without blocking the event loop.
+
     Args:
         user_message: The incoming message
         user_language: Language code (en, es, fr, etc.)
-    
+        deadline_seconds: Total time for the message's LLM calls (None: no limit)
+        escalation_score: Escalation classifier probability, if the caller
+            already scored the message (see escalation_scores)
+
     Returns:
         tuple: (final_response, faq_matched, needs_escalation)
     """
-    logger.info(f"Processing message with optimized routing: {user_message[:100]}...")
-    
+    with deadline(deadline_seconds):
+        plan = await plan_inbound_response(user_message, user_language, escalation_score)
+
+        try:
+            final_response = await complete_response(plan, user_language)
+        except Exception as e:
+            logger.error(f"Error completing inbound response: {str(e)}")
+            final_response = await fallback_response(user_language)
+
+    return final_response, plan["faq_matched"], plan["needs_escalation"]
+
+async def plan_inbound_response(user_message: str, user_language: str = "en",
+                                escalation_score: Optional[float] = None) -> dict:
+    """Run every stage up to (but not including) the Dr. Myles polish.
+
+    Independent stages run concurrently through a StageGraph: the stages the
+    routed handler will need (scripture, FAQ enhancement, prayer routing)
+    start speculatively alongside the escalation check and are cancelled if
+    the message escalates.
+
+    Returns:
+        dict: response plan (see response_plan); final_response is already
+        set when no polish is needed (precompiled FAQ, error fallback)
+    """
+    logger.info("Processing message with optimized routing: %s", message_body(user_message))
+    graph = StageGraph()
+
     try:
         # Step 1: Translate to English if needed
         if user_language != "en":
-            translated_message = translate_message_swarm(user_message, "en")
+            translated_message = await translate_message_swarm_async(user_message, "en")
         else:
             translated_message = user_message
-        
-        # Step 2: ALWAYS check for escalation first (safety critical)
-        needs_escalation = detect_escalation_swarm(translated_message)
-        
+
+        # Step 2: Route locally so the handler's stages can start early
+        message_type = determine_message_type(translated_message)
+        faq_answer = get_answer(translated_message) if message_type == "faq_inquiry" else None
+        if message_type == "faq_inquiry" and not faq_answer:
+            message_type = "general_inquiry"
+
+        # Precompiled FAQ responses need no further LLM stages
+        precompiled_answer = get_precompiled_answer(faq_answer, user_language) if faq_answer else None
+        consolidated = INBOUND_PIPELINE_MODE == "consolidated"
+        speculative_stages = () if precompiled_answer or consolidated else SPECULATIVE_STAGES[message_type]
+
+        # A precomputed score is for the original text: translated messages are rescored
+        add_inbound_stages(graph, translated_message, faq_answer,
+                           escalation_score if user_language == "en" else None)
+
+        # Step 3: ALWAYS check for escalation (safety critical); handler
+        # stages run speculatively while it is in flight
+        graph.start("escalation", *speculative_stages)
+        needs_escalation = await graph.result("escalation")
+
         if needs_escalation:
-            logger.warning(f"ESCALATION REQUIRED for message: {user_message[:100]}...")
-            raw_response = "I notice this may be a sensitive topic. While I'm here to support you spiritually, I recommend speaking with one of our pastoral staff for personalized guidance. Would you like me to have someone reach out to you?"
-            context = "Sensitive topic requiring human intervention"
-            scripture = "Psalm 34:18 - The Lord is close to the brokenhearted and saves those who are crushed in spirit."
-            
+            graph.cancel()
+            logger.warning("ESCALATION REQUIRED for message: %s", message_body(user_message))
             # Skip other agents for escalated messages
-            polished_response = polish_response_swarm(raw_response, context, scripture)
-            
-            if user_language != "en":
-                final_response = translate_message_swarm(polished_response, user_language)
-            else:
-                final_response = polished_response
-                
-            return final_response, False, True
-        
-        # Step 3: Route to appropriate agent based on message type
-        message_type = determine_message_type(translated_message)
-        
+            return response_plan(
+                "I notice this may be a sensitive topic. While I'm here to support you spiritually, I recommend speaking with one of our pastoral staff for personalized guidance. Would you like me to have someone reach out to you?",
+                "Sensitive topic requiring human intervention",
+                "Psalm 34:18 - The Lord is close to the brokenhearted and saves those who are crushed in spirit.",
+                needs_escalation=True
+            )
+
+        # Step 4: Finish with the handler for this message type
+        if precompiled_answer:
+            logger.info("Serving precompiled FAQ response")
+            return response_plan(faq_answer, "FAQ inquiry", faq_matched=True, final_response=precompiled_answer)
+        if consolidated:
+            return consolidated_plan(message_type, translated_message, faq_answer)
         if message_type == "prayer_request":
-            return handle_prayer_request(translated_message, user_language)
+            return await handle_prayer_request(graph, translated_message, user_language)
         elif message_type == "faq_inquiry":
-            return handle_faq_inquiry(translated_message, user_language)
+            return await handle_faq_inquiry(graph, translated_message, user_language)
         elif message_type == "general_inquiry":
-            return handle_general_inquiry(translated_message, user_language)
+            return await handle_general_inquiry(graph, translated_message, user_language)
         else:
-            return handle_default_response(translated_message, user_language)
-    
+            return await handle_default_response(graph, translated_message, user_language)
+
     except Exception as e:
+        graph.cancel()
         logger.error(f"Error in optimized inbound_agent: {str(e)}")
-        fallback_message = "Thank you for your message. Our system is experiencing some issues, but a team member will review your message soon."
-        
-        if user_language != "en":
-            try:
-                fallback_message = translate_message_swarm(fallback_message, user_language)
-            except:
-                pass
-                
-        return fallback_message, False, False
+        fallback_message = await fallback_response(user_language)
+        return response_plan(fallback_message, "Error fallback", final_response=fallback_message)
+
+def response_plan(raw_response: str, context: str, scripture: str = "",
+                  faq_matched: bool = False, needs_escalation: bool = False,
+                  final_response: Optional[str] = None,
+                  scripture_candidates: Optional[List[str]] = None,
+                  urgent: bool = False) -> dict:
+    """Everything the polish stage needs, plus the routing flags.
+
+    scripture_candidates is set only by the consolidated mode, whose single
+    LLM call picks the verse itself. Escalated and urgent plans are
+    completed at critical priority (see plan_priority).
+    """
+    return {
+        "raw_response": raw_response,
+        "context": context,
+        "scripture": scripture,
+        "faq_matched": faq_matched,
+        "needs_escalation": needs_escalation,
+        "final_response": final_response,
+        "scripture_candidates": scripture_candidates,
+        "urgent": urgent
+    }
+
+def plan_priority(plan: dict) -> str:
+    """LLM priority class for completing a plan: crisis replies jump the queue"""
+    return CRITICAL if plan["needs_escalation"] or plan["urgent"] else current_priority()
+
+def consolidated_plan(message_type: str, message: str, faq_answer: Optional[str] = None) -> dict:
+    """Response plan for the consolidated mode, built without any LLM call.
+
+    The keyword router's intent is trusted (no prayer routing agent), the
+    FAQ answer goes to the responder unenhanced and the verse candidates
+    come from the local index. scripture holds the top candidate so the
+    multi-agent fallback and the streaming polish still have a verse.
+    Urgent spiritual and deliverance terms mark the plan urgent, as the
+    routing agent's URGENT_SPIRITUAL would.
+    """
+    urgent = bool(urgent_keywords(message))
+    if message_type == "prayer_request":
+        raw_response, context = PRAYER_RESPONSE, "Prayer request"
+    elif message_type == "faq_inquiry":
+        raw_response, context = faq_answer, "FAQ inquiry"
+    elif message_type == "general_inquiry":
+        raw_response, context = GENERAL_RESPONSE, "General inquiry"
+    else:
+        return response_plan(DEFAULT_RESPONSE, "Default response", scripture_candidates=[], urgent=urgent)
+
+    candidates = candidate_verses(message)
+    return response_plan(raw_response, context, candidates[0], faq_matched=message_type == "faq_inquiry",
+                         scripture_candidates=candidates, urgent=urgent)
+
+async def complete_response(plan: dict, user_language: str) -> str:
+    """Polish a response plan in Dr. Myles' voice and localize it"""
+    if plan["final_response"] is not None:
+        return plan["final_response"]
+    with llm_priority(plan_priority(plan)):
+        return await polish_and_localize(plan, user_language)
+
+async def polish_and_localize(plan: dict, user_language: str) -> str:
+    """Single-call reply in consolidated mode, otherwise polish then translate"""
+    if plan["scripture_candidates"] is not None:
+        reply = await consolidated_reply_swarm_async(
+            plan["raw_response"], plan["context"], plan["scripture_candidates"], user_language
+        )
+        if reply is not None:
+            return reply["response"]
+        logger.warning("Falling back to the multi-agent polish")
+    polished_response = await polish_response_swarm_async(plan["raw_response"], plan["context"], plan["scripture"])
+    return await localize_response(polished_response, user_language)
+
+async def fallback_response(user_language: str) -> str:
+    """Apology used when the pipeline itself fails"""
+    fallback_message = "Thank you for your message. Our system is experiencing some issues, but a team member will review your message soon."
+
+    if user_language != "en":
+        try:
+            fallback_message = await translate_message_swarm_async(fallback_message, user_language)
+        except:
+            pass
+
+    return fallback_message
+
+# Stages each handler needs, started speculatively alongside escalation
+SPECULATIVE_STAGES = {
+    "prayer_request": ("prayer_routing", "scripture"),
+    "faq_inquiry": ("faq_enhancement", "scripture"),
+    "general_inquiry": ("scripture",),
+    "default": (),
+}
+
+def add_inbound_stages(graph: StageGraph, message: str, faq_answer: Optional[str] = None,
+                       escalation_score: Optional[float] = None):
+    """Register the LLM stages shared by the inbound handlers"""
+    graph.add("escalation", lambda: detect_escalation_swarm_async(message, escalation_score))
+    graph.add("scripture", lambda: get_scripture_recommendation_swarm_async(message))
+    graph.add("prayer_routing", lambda: route_prayer_request_swarm_async(message))
+    if faq_answer:
+        graph.add("faq_enhancement", lambda: process_faq_response_swarm_async(faq_answer, message))
+
+async def localize_response(response: str, user_language: str) -> str:
+    """Translate an English response back to the user's language if needed"""
+    if user_language != "en":
+        return await translate_message_swarm_async(response, user_language)
+    return response
 
 def determine_message_type(message: str) -> str:
     """Quickly determine message type using keyword analysis"""
-    message_lower = message.lower()
-    
-    # Prayer request keywords
-    prayer_keywords = ["pray", "prayer", "praying", "intercede", "blessing", "heal", "healing"]
-    if any(keyword in message_lower for keyword in prayer_keywords):
-        return "prayer_request"
-    
-    # FAQ keywords  
-    faq_keywords = ["how", "what", "when", "where", "why", "can you", "do you", "information"]
-    if any(keyword in message_lower for keyword in faq_keywords):
-        return "faq_inquiry"
-    
-    # General inquiry
-    general_keywords = ["help", "support", "guidance", "question", "need"]
-    if any(keyword in message_lower for keyword in general_keywords):
-        return "general_inquiry"
-    
-    return "default"
-
-def handle_prayer_request(message: str, user_language: str) -> tuple:
+    return classify_intent(message)
+
+async def handle_prayer_request(graph: StageGraph, message: str, user_language: str) -> dict:
     """Handle prayer requests efficiently"""
     logger.info("Routing to prayer request handler")
-    
-    # Only call relevant agents
-    prayer_routing = route_prayer_request_swarm(message)
+
+    # Routing and scripture run side by side
+    prayer_routing = await graph.result("prayer_routing")
     is_prayer_request = prayer_routing.get("is_prayer_request", False)
-    
+
     if is_prayer_request:
-        raw_response = "Thank you for sharing your prayer request. I've forwarded this to our prayer ministry team, and they will be interceding for you. Would you also like to schedule a personal prayer session with one of our ministers?"
-        context = "Prayer request"
-        scripture = get_scripture_recommendation_swarm(message)
-        
-        # Polish with Dr. Myles' tone
-        polished_response = polish_response_swarm(raw_response, context, scripture)
-        
-        # Translate if needed
-        if user_language != "en":
-            final_response = translate_message_swarm(polished_response, user_language)
-        else:
-            final_response = polished_response
-            
-        return final_response, False, False
-    
-    return handle_default_response(message, user_language)
+        return response_plan(
+            PRAYER_RESPONSE,
+            "Prayer request",
+            await graph.result("scripture"),
+            urgent=prayer_routing.get("is_urgent", False)
+        )
+
+    # The default handler does not use scripture
+    graph.cancel()
+    return await handle_default_response(graph, message, user_language)
 
-def handle_faq_inquiry(message: str, user_language: str) -> tuple:
+async def handle_faq_inquiry(graph: StageGraph, message: str, user_language: str) -> dict:
     """Handle FAQ inquiries efficiently"""
     logger.info("Routing to FAQ handler")
-    
-    # Check FAQ first
-    faq_answer = get_answer(message)
-    
-    if faq_answer:
-        # Only enhance FAQ response
-        enhanced_faq = process_faq_response_swarm(faq_answer, message)
-        context = "FAQ inquiry"
-        
-        # Get scripture and polish
-        scripture = get_scripture_recommendation_swarm(message)
-        polished_response = polish_response_swarm(enhanced_faq, context, scripture)
-        
-        if user_language != "en":
-            final_response = translate_message_swarm(polished_response, user_language)
-        else:
-            final_response = polished_response
-            
-        return final_response, True, False
-    
-    return handle_general_inquiry(message, user_language)
 
-def handle_general_inquiry(message: str, user_language: str) -> tuple:
+    # FAQ enhancement and scripture run side by side
+    enhanced_faq, scripture = await asyncio.gather(
+        graph.result("faq_enhancement"),
+        graph.result("scripture")
+    )
+    return response_plan(enhanced_faq, "FAQ inquiry", scripture, faq_matched=True)
+
+async def handle_general_inquiry(graph: StageGraph, message: str, user_language: str) -> dict:
     """Handle general inquiries efficiently"""
     logger.info("Routing to general inquiry handler")
-    
-    raw_response = "Thank you for reaching out. Your message has been received by our ministry team."
-    context = "General inquiry"
-    scripture = get_scripture_recommendation_swarm(message)
-    
-    polished_response = polish_response_swarm(raw_response, context, scripture)
-    
-    if user_language != "en":
-        final_response = translate_message_swarm(polished_response, user_language)
-    else:
-        final_response = polished_response
-        
-    return final_response, False, False
 
-def handle_default_response(message: str, user_language: str) -> tuple:
+    return response_plan(
+        GENERAL_RESPONSE,
+        "General inquiry",
+        await graph.result("scripture")
+    )
+
+async def handle_default_response(graph: StageGraph, message: str, user_language: str) -> dict:
     """Handle default responses efficiently"""
     logger.info("Routing to default handler")
-    
-    raw_response = "Thank you for your message. Our ministry team will review it and respond appropriately."
-    context = "Default response"
-    
-    polished_response = polish_response_swarm(raw_response, context, "")
-    
-    if user_language != "en":
-        final_response = translate_message_swarm(polished_response, user_language)
-    else:
-        final_response = polished_response
-        
-    return final_response, False, False
+
+    return response_plan(DEFAULT_RESPONSE, "Default response")
@@ -1,23 +1,25 @@
-from swarms import Agent
-from swarms.utils.litellm_wrapper import LiteLLM
-from agents.shared.utils import setup_logging
+from agents.shared.utils import message_body, setup_logging, get_supported_languages
+from agents.shared.agent_runtime import call_budget, iterate_blocking, llm_call_seconds, run_agent, run_blocking
+from agents.shared.llm_registry import create_agent, llm_registry
+from agents.shared.circuit_breaker import CircuitOpenError
+from agents.shared.llm_scheduler import CRITICAL, prioritized
+from agents.shared.keyword_engine import escalation_keywords
+from agents.shared.scripture_index import DEFAULT_VERSE, format_verse, recommend_scripture
+from agents.shared.tracing import add_tokens, estimate_tokens, mark_fallback, traced
+from typing import Optional, Sequence
+import json
 import os
+import re
+import time
 
 logger = setup_logging()
 
-# Initialize the language model with LM Studio configuration
-model = LiteLLM(
-    model_name="openai/qwen3-4b:2",  # Add openai/ prefix
-    api_base=os.getenv("LM_STUDIO_API_BASE", "http://192.168.1.88:1234/v1"),
-    api_key=os.getenv("LM_STUDIO_API_KEY", "lm-studio"),
-    temperature=0.1,
-    custom_llm_provider="openai",  # Specify provider
-)
+# Ask the scripture agent when the local verse index has no confident match
+SCRIPTURE_LLM_FALLBACK = os.getenv("SCRIPTURE_LLM_FALLBACK", "false").lower() == "true"
 
 # Escalation Detection Agent with improved prompt
-escalation_agent = Agent(
+escalation_agent = create_agent(
     agent_name="EscalationDetector",
-    model_name="openai/qwen3-4b:2",
     system_prompt="""You are an escalation detection specialist for a ministry. 
     
     CRITICAL: Analyze messages for these URGENT topics requiring IMMEDIATE human intervention:
@@ -39,51 +41,38 @@ escalation_agent = Agent(
     "I'm being abused" → ESCALATE
     "I'm feeling sad today" → NORMAL
     "Can you pray for me?" → NORMAL""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
+    # One-word classification: fail fast to the keyword check, hedge slow calls
+    timeout=10,
+    hedge=True,
 )
 
 # Scripture Recommendation Agent  
-scripture_agent = Agent(
+scripture_agent = create_agent(
     agent_name="ScriptureRecommender",
-    model_name="openai/qwen3-4b:2",  # Match LiteLLM model_name exactly
     system_prompt="""You are a biblical scholar and pastoral counselor. 
     Based on user messages, recommend appropriate scripture verses that provide 
     comfort, guidance, or wisdom. Return only the verse reference and text.""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
 )
 
 # Tone Polishing Agent (Dr. Myles)
-tone_agent = Agent(
+tone_agent = create_agent(
     agent_name="DrMylesPolisher",
-    model_name="openai/qwen3-4b:2",  # Match LiteLLM model_name exactly
     system_prompt="""You are Dr. Myles, a compassionate and wise spiritual leader.
     Your role is to rewrite responses in a pastoral, encouraging tone that incorporates
     scripture naturally. Be warm, empathetic, and spiritually grounding.""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
 )
 
 # FAQ Enhancement Agent
-faq_enhancement_agent = Agent(
+faq_enhancement_agent = create_agent(
     agent_name="FAQEnhancer",
-    model_name="openai/qwen3-4b:2",  # Match LiteLLM model_name exactly
     system_prompt="""You enhance FAQ responses to be more personal and pastoral.
     Take the basic FAQ answer and make it warm, encouraging, and spiritually enriching
     while maintaining accuracy.""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
 )
 
 # 🆕 Multilingual Translation Agent
-translation_agent = Agent(
+translation_agent = create_agent(
     agent_name="MultilingualTranslator",
-    model_name="openai/qwen3-4b:2",  # Match LiteLLM model_name exactly
     system_prompt="""You are a professional translator specializing in ministry communications.
     Translate messages accurately while preserving spiritual context and pastoral tone.
     
@@ -95,15 +84,11 @@ translation_agent = Agent(
     - German (de)
     
     Always maintain the reverent and compassionate tone appropriate for ministry communications.""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
 )
 
 # 🆕 Prayer & Deliverance Assistant Agent
-prayer_routing_agent = Agent(
+prayer_routing_agent = create_agent(
     agent_name="PrayerDeliveranceAssistant",
-    model_name="openai/qwen3-4b:2",  # Match LiteLLM model_name exactly
     system_prompt="""You are a prayer ministry coordinator. Analyze messages to identify:
     
     1. Prayer requests (personal, family, health, spiritual)
@@ -117,34 +102,52 @@ prayer_routing_agent = Agent(
     - 'NOT_PRAYER' for non-prayer related messages
     
     Also suggest appropriate ministry team routing.""",
-    llm=model,
-    max_loops=1,
-    verbose=False,
+    timeout=15,
+    hedge=True,
+)
+
+# Single-call responder for INBOUND_PIPELINE_MODE=consolidated: polishes,
+# picks a verse and writes in the user's language in one round trip
+consolidated_agent = create_agent(
+    agent_name="DrMylesResponder",
+    system_prompt="""You are Dr. Myles, a compassionate and wise spiritual leader writing the
+    final reply to a ministry message. You are given a draft response, its context, the
+    language to write in and candidate scripture verses.
+
+    Rewrite the draft in a pastoral, encouraging tone, choose the one candidate verse
+    that fits best and weave it in naturally, and write the entire reply in the
+    requested language.
+
+    Respond with ONLY a JSON object and no other text:
+    {"response": "<the full reply>", "verse": "<the chosen verse, copied exactly>", "language": "<language code>"}""",
 )
 
 # Swarm Functions
-def detect_escalation_swarm(message: str) -> bool:
-    """Detect if message needs escalation"""
+@prioritized(CRITICAL)
+@traced("escalation", escalation_agent.agent_name)
+def detect_escalation_swarm(message: str, escalation_score: Optional[float] = None) -> bool:
+    """Detect if message needs escalation (escalation_score: classifier probability, if already scored)"""
     try:
         # Check for obvious escalation keywords first
-        escalation_keywords = [
-            "suicidal", "suicide", "kill myself", "end my life", 
-            "self harm", "cut myself", "hurt myself",
-            "abuse", "abused", "violence", "threat",
-            "emergency", "crisis", "help me"
-        ]
-        
-        message_lower = message.lower()
-        for keyword in escalation_keywords:
-            if keyword in message_lower:
-                logger.warning(f"Escalation keyword detected: {keyword}")
-                return True
+        matched_keywords = escalation_keywords(message)
+        if matched_keywords:
+            logger.warning("Escalation keyword detected: %s", matched_keywords[0])
+            return True
+
+        # Clear-cut messages are decided locally; only the uncertainty band
+        # reaches the LLM (imported here so numpy loads on first use)
+        from agents.shared.escalation_classifier import classify_escalation
+        local_decision = classify_escalation(message, escalation_score)
+        if local_decision is not None:
+            if local_decision:
+                logger.warning("Escalation classifier flagged message: %s", message_body(message))
+            return local_decision
         
-        # Use AI agent as backup
-        result = escalation_agent.run(message)
-        result_str = str(result).upper().strip()
+        # Use AI agent for uncertain messages
+        result = run_agent(escalation_agent, message)
+        result_str = result.upper().strip()
         
-        logger.info(f"Escalation agent result: {result_str}")
+        logger.info("Escalation agent result: %s", message_body(result_str))
         
         # Check for escalation indicators
         escalation_detected = (
@@ -155,89 +158,308 @@ def detect_escalation_swarm(message: str) -> bool:
         )
         
         if escalation_detected:
-            logger.warning(f"ESCALATION DETECTED for message: {message[:50]}...")
+            logger.warning("ESCALATION DETECTED for message: %s", message_body(message))
             
         return escalation_detected
         
     except Exception as e:
-        logger.error(f"Escalation detection failed: {e}")
+        logger.error("Escalation detection failed: %s", e)
+        mark_fallback()
         # FAIL SAFE: If detection fails, escalate sensitive keywords
         sensitive_words = ["suicidal", "suicide", "kill", "hurt myself", "abuse"]
         return any(word in message.lower() for word in sensitive_words)
 
+@traced("scripture", scripture_agent.agent_name)
 def get_scripture_recommendation_swarm(message: str) -> str:
-    """Get scripture recommendation"""
+    """Get scripture recommendation (local verse index, LLM only for low-confidence matches)"""
+    verse = local_scripture_recommendation(message)
+    if verse:
+        return verse
     try:
-        result = scripture_agent.run(message)
-        return str(result)
+        return run_agent(scripture_agent, message)
     except Exception as e:
-        logger.error(f"Scripture recommendation failed: {e}")
-        return "Psalm 23:1 - The Lord is my shepherd; I shall not want."
+        logger.error("Scripture recommendation failed: %s", e)
+        mark_fallback()
+        return format_verse(DEFAULT_VERSE)
 
-def polish_response_swarm(raw_response: str, context: str = "", scripture: str = "") -> str:
-    """Polish response with Dr. Myles' tone"""
+@traced("scripture_local", "ScriptureIndex")
+def local_scripture_recommendation(message: str) -> str:
+    """Verse from the local index; empty only when the LLM should be asked"""
     try:
-        prompt = f"""
+        verse, score = recommend_scripture(message)
+    except Exception as e:
+        logger.error("Local scripture lookup failed: %s", e)
+        mark_fallback()
+        verse = None
+    if verse:
+        return verse
+    if SCRIPTURE_LLM_FALLBACK:
+        return ""
+    mark_fallback()
+    return format_verse(DEFAULT_VERSE)
+
+def build_polish_prompt(raw_response: str, context: str = "", scripture: str = "", target_language: str = "en") -> str:
+    """Prompt for the Dr. Myles tone agent"""
+    prompt = f"""
         Raw Response: {raw_response}
         Context: {context}
         Scripture: {scripture}
         
         Please rewrite this in Dr. Myles' pastoral voice, incorporating the scripture naturally.
         """
-        result = tone_agent.run(prompt)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Response polishing failed: {e}")
-        return raw_response
+    if target_language != "en":
+        language_name = get_supported_languages().get(target_language, target_language)
+        prompt += f"Write the entire response in {language_name}.\n        "
+    return prompt
 
-def process_faq_response_swarm(faq_answer: str, user_message: str) -> str:
-    """Enhance FAQ response"""
-    try:
-        prompt = f"""
+def build_faq_enhancement_prompt(faq_answer: str, user_message: str) -> str:
+    """Prompt for the FAQ enhancement agent"""
+    return f"""
         FAQ Answer: {faq_answer}
         User Question: {user_message}
         
         Please enhance this FAQ response to be more personal and pastoral.
         """
-        result = faq_enhancement_agent.run(prompt)
-        return str(result)
-    except Exception as e:
-        logger.error(f"FAQ enhancement failed: {e}")
-        return faq_answer
 
-def translate_message_swarm(message: str, target_language: str) -> str:
-    """Translate message to target language"""
-    try:
-        prompt = f"""
+def build_translation_prompt(message: str, target_language: str) -> str:
+    """Prompt for the translation agent"""
+    return f"""
         Translate this ministry message to {target_language}:
         
         Message: {message}
         
         Maintain pastoral tone and spiritual context.
         """
-        result = translation_agent.run(prompt)
-        return str(result)
+
+@traced("polish", tone_agent.agent_name)
+def polish_response_swarm(raw_response: str, context: str = "", scripture: str = "") -> str:
+    """Polish response with Dr. Myles' tone"""
+    try:
+        prompt = build_polish_prompt(raw_response, context, scripture)
+        return run_agent(tone_agent, prompt)
     except Exception as e:
-        logger.error(f"Translation failed: {e}")
+        logger.error("Response polishing failed: %s", e)
+        mark_fallback()
+        return raw_response
+
+@traced("polish_stream", tone_agent.agent_name)
+def stream_polish_response_swarm(raw_response: str, context: str = "", scripture: str = "",
+                                 target_language: str = "en"):
+    """Yield the Dr. Myles polish token by token as the tone model generates it.
+
+    The polisher writes directly in target_language, so streamed text needs
+    no back-translation. If the backend fails before the first token, the
+    unpolished (translated) response is yielded instead.
+    """
+    emitted = False
+    start = time.perf_counter()
+
+    def observe(outcome: str):
+        llm_call_seconds.observe(time.perf_counter() - start, agent=tone_agent.agent_name, outcome=outcome)
+
+    try:
+        import litellm
+        prompt = build_polish_prompt(raw_response, context, scripture, target_language)
+        add_tokens(prompt_tokens=estimate_tokens(tone_agent.system_prompt + prompt))
+        backend = llm_registry.get(tone_agent.llm_backend)
+        budget = call_budget(tone_agent)
+        # Slot first: a call that never got one (local congestion) says nothing
+        # about the backend, and while the circuit is open slots are free anyway
+        with backend.slot(timeout=budget), backend.breaker.guard():
+            stream = litellm.completion(
+                **backend.completion_kwargs(),
+                timeout=budget,
+                messages=[
+                    {"role": "system", "content": tone_agent.system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True,
+            )
+            for chunk in stream:
+                token = chunk.choices[0].delta.content
+                if token:
+                    emitted = True
+                    add_tokens(completion_tokens=1)
+                    yield token
+        observe("ok")
+    except Exception as e:
+        observe("rejected" if isinstance(e, CircuitOpenError) else "timeout" if isinstance(e, TimeoutError) else "exception")
+        logger.error("Streaming polish failed: %s", e)
+        mark_fallback()
+        if not emitted:
+            yield raw_response if target_language == "en" else translate_message_swarm(raw_response, target_language)
+    except BaseException:
+        # The streaming client went away
+        observe("cancelled")
+        raise
+
+@traced("faq_enhancement", faq_enhancement_agent.agent_name)
+def process_faq_response_swarm(faq_answer: str, user_message: str) -> str:
+    """Enhance FAQ response"""
+    try:
+        return run_agent(faq_enhancement_agent, build_faq_enhancement_prompt(faq_answer, user_message))
+    except Exception as e:
+        logger.error("FAQ enhancement failed: %s", e)
+        mark_fallback()
+        return faq_answer
+
+@traced("translate", translation_agent.agent_name)
+def translate_message_swarm(message: str, target_language: str) -> str:
+    """Translate message to target language"""
+    try:
+        return run_agent(translation_agent, build_translation_prompt(message, target_language))
+    except Exception as e:
+        logger.error("Translation failed: %s", e)
+        mark_fallback()
         return message
 
+def build_consolidated_prompt(raw_response: str, context: str = "", candidates: Sequence[str] = (),
+                              target_language: str = "en") -> str:
+    """Prompt for the single-call responder"""
+    language_name = get_supported_languages().get(target_language, target_language)
+    verses = "\n".join(f"        - {verse}" for verse in candidates) or "        (none)"
+    return f"""
+        Draft Response: {raw_response}
+        Context: {context}
+        Language: {target_language} ({language_name})
+        Candidate Verses:
+{verses}
+
+        Reply with the JSON object only.
+        """
+
+THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+
+def extract_json_object(text: str) -> Optional[dict]:
+    """First JSON object in a model reply, skipping reasoning blocks, code fences and chatter"""
+    text = THINK_BLOCK.sub("", text)
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            pass
+        else:
+            if isinstance(value, dict):
+                return value
+        start = text.find("{", start + 1)
+    return None
+
+def match_candidate(verse, candidates: Sequence[str]) -> str:
+    """The candidate the model chose, matched on its reference; the top candidate otherwise"""
+    if isinstance(verse, str):
+        reference = verse.split(" - ")[0].strip().lower()
+        for candidate in candidates:
+            if candidate.split(" - ")[0].strip().lower() == reference:
+                return candidate
+    return candidates[0] if candidates else ""
+
+def parse_consolidated_reply(text: str, candidates: Sequence[str], target_language: str) -> Optional[dict]:
+    """Validated {"response", "verse", "language"} from a responder reply, or None if unusable"""
+    reply = extract_json_object(text or "")
+    if reply is None:
+        return None
+    response = reply.get("response")
+    if not isinstance(response, str) or not response.strip():
+        return None
+
+    # Accept the code or the language name; a reply in the wrong language is unusable
+    language = reply.get("language")
+    if isinstance(language, str) and language.strip():
+        names = {name.lower(): code for code, name in get_supported_languages().items()}
+        language = names.get(language.strip().lower(), language.strip().lower())
+        if language != target_language:
+            return None
+
+    return {
+        "response": response.strip(),
+        "verse": match_candidate(reply.get("verse"), candidates),
+        "language": target_language,
+    }
+
+@traced("consolidated", consolidated_agent.agent_name)
+def consolidated_reply_swarm(raw_response: str, context: str = "", candidates: Sequence[str] = (),
+                             target_language: str = "en") -> Optional[dict]:
+    """Polished, localized reply and its verse from one LLM call; None when the multi-agent path should run"""
+    reply = None
+    try:
+        prompt = build_consolidated_prompt(raw_response, context, candidates, target_language)
+        reply = parse_consolidated_reply(run_agent(consolidated_agent, prompt), candidates, target_language)
+        if reply is None:
+            logger.warning("Consolidated reply was not valid JSON for %s", target_language)
+    except Exception as e:
+        logger.error("Consolidated reply failed: %s", e)
+    if reply is None:
+        mark_fallback()
+    return reply
+
+@traced("prayer_routing", prayer_routing_agent.agent_name)
 def route_prayer_request_swarm(message: str) -> dict:
-    """Route prayer requests and deliverance needs"""
+    """Route prayer requests and deliverance needs.
+
+    Runs at the caller's priority: in a bulk import every prayer-typed
+    message is routed, and that must not crowd out escalation checks.
+    Urgent results are completed at critical priority (see plan_priority).
+    """
     try:
-        result = prayer_routing_agent.run(message)
-        result_str = str(result).upper()
+        result = run_agent(prayer_routing_agent, message)
+        result_str = result.upper()
         
         return {
             "is_prayer_request": "PRAYER_REQUEST" in result_str,
             "needs_deliverance": "DELIVERANCE_NEEDED" in result_str,
             "is_urgent": "URGENT_SPIRITUAL" in result_str,
-            "routing_suggestion": str(result)
+            "routing_suggestion": result
         }
     except Exception as e:
-        logger.error(f"Prayer routing failed: {e}")
+        logger.error("Prayer routing failed: %s", e)
+        mark_fallback()
         return {
             "is_prayer_request": False,
             "needs_deliverance": False,
             "is_urgent": False,
             "routing_suggestion": "Route to general ministry team"
         }
+
+# Async Swarm Functions
+# These run the blocking swarm functions on the shared LLM executor so async
+# routes never stall the event loop while waiting on the backend.
+async def detect_escalation_swarm_async(message: str, escalation_score: Optional[float] = None) -> bool:
+    """Detect if message needs escalation (async)"""
+    return await run_blocking(detect_escalation_swarm, message, escalation_score)
+
+async def get_scripture_recommendation_swarm_async(message: str) -> str:
+    """Get scripture recommendation (async)"""
+    # The local index answers in microseconds; only the LLM needs the executor
+    verse = local_scripture_recommendation(message)
+    if verse:
+        return verse
+    return await run_blocking(get_scripture_recommendation_swarm, message)
+
+async def polish_response_swarm_async(raw_response: str, context: str = "", scripture: str = "") -> str:
+    """Polish response with Dr. Myles' tone (async)"""
+    return await run_blocking(polish_response_swarm, raw_response, context, scripture)
+
+async def stream_polish_response_swarm_async(raw_response: str, context: str = "", scripture: str = "",
+                                             target_language: str = "en"):
+    """Stream the Dr. Myles polish without blocking the event loop"""
+    async for token in iterate_blocking(stream_polish_response_swarm, raw_response, context, scripture, target_language):
+        yield token
+
+async def process_faq_response_swarm_async(faq_answer: str, user_message: str) -> str:
+    """Enhance FAQ response (async)"""
+    return await run_blocking(process_faq_response_swarm, faq_answer, user_message)
+
+async def consolidated_reply_swarm_async(raw_response: str, context: str = "", candidates: Sequence[str] = (),
+                                         target_language: str = "en") -> Optional[dict]:
+    """Single-call polish, verse choice and translation (async)"""
+    return await run_blocking(consolidated_reply_swarm, raw_response, context, candidates, target_language)
+
+async def translate_message_swarm_async(message: str, target_language: str) -> str:
+    """Translate message to target language (async)"""
+    return await run_blocking(translate_message_swarm, message, target_language)
+
+async def route_prayer_request_swarm_async(message: str) -> dict:
+    """Route prayer requests and deliverance needs (async)"""
+    return await run_blocking(route_prayer_request_swarm, message)
@@ -0,0 +1,290 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from agents.shared.utils import setup_logging
+from agents.shared.circuit_breaker import CLOSED, CircuitOpenError
+from agents.shared.deadlines import CallCancelled, DeadlineExceeded, check_cancelled, remaining
+from agents.shared.llm_cache import LLMResponseCache, llm_cache
+from agents.shared.llm_registry import LLM_CALL_TIMEOUT, LLMBackend, llm_registry
+from agents.shared.llm_scheduler import BULK, CRITICAL, INTERACTIVE, SlotTimeout, current_priority, effective_priority
+from agents.shared.single_flight import SingleFlight
+from agents.shared.metrics import metrics_registry
+from agents.shared.tracing import add_tokens, estimate_tokens
+
+logger = setup_logging()
+
+# Swarms Agent.run() is blocking, so async routes hand LLM work to a bounded
+# pool instead of running it on the event loop. The pool size caps how many
+# calls a single worker keeps in flight; each backend's own cap (see
+# llm_registry) bounds how many of those reach the model server at once.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+# Critical and bulk calls get pools of their own, so threads parked behind
+# a backlog of bulk work are never the ones a safety check needs
+LLM_CRITICAL_WORKERS = int(os.getenv("LLM_CRITICAL_WORKERS", "8"))
+LLM_BULK_WORKERS = int(os.getenv("LLM_BULK_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=LLM_MAX_CONCURRENCY,
+    thread_name_prefix="llm-worker",
+)
+_executors = {
+    CRITICAL: ThreadPoolExecutor(max_workers=LLM_CRITICAL_WORKERS, thread_name_prefix="llm-critical"),
+    INTERACTIVE: _executor,
+    BULK: ThreadPoolExecutor(max_workers=LLM_BULK_WORKERS, thread_name_prefix="llm-bulk"),
+}
+
+# Model calls themselves run here, so a caller can stop waiting at its time
+# budget; an abandoned call finishes in the background and frees its
+# backend slot then. Every caller thread waits on at most two calls.
+_call_executor = ThreadPoolExecutor(
+    max_workers=2 * (LLM_MAX_CONCURRENCY + LLM_CRITICAL_WORKERS + LLM_BULK_WORKERS),
+    thread_name_prefix="llm-call",
+)
+
+# A hedged agent's call (short classifications, see create_agent(hedge=True))
+# still unanswered after this many seconds is raced by a second identical
+# request if the backend has a slot free. Blank: never hedge.
+LLM_HEDGE_AFTER_SECONDS = os.getenv("LLM_HEDGE_AFTER_SECONDS", "")
+
+# A call the request deadline cut short before its own timeout still counts
+# against the backend's circuit once it had waited this many seconds (or its
+# whole timeout, if shorter); only calls left a sliver of the deadline don't
+LLM_BREAKER_TIMEOUT_FLOOR = float(os.getenv("LLM_BREAKER_TIMEOUT_FLOOR", "10"))
+
+def executor_for(func: Callable) -> ThreadPoolExecutor:
+    """Worker pool for a call's priority class (see llm_scheduler.prioritized)"""
+    return _executors[effective_priority(getattr(func, "llm_priority", None))]
+
+# Identical prompts to the same agent that are in flight at the same time
+# share one backend call (e.g. a burst of the same question after a campaign)
+LLM_COALESCE = os.getenv("LLM_COALESCE", "true").lower() == "true"
+
+_flights = SingleFlight()
+
+llm_call_seconds = metrics_registry.histogram(
+    "ministry_llm_call_duration_seconds",
+    "Agent call latency by agent and outcome (ok, cached, coalesced, timeout, rejected, cancelled, exception)",
+    ("agent", "outcome"),
+)
+hedged_calls = metrics_registry.counter(
+    "ministry_llm_hedged_calls_total",
+    "Hedged agent calls by agent and which request answered first (first, hedge, neither)",
+    ("agent", "winner"),
+)
+
+class LLMTimeout(TimeoutError):
+    """An agent call did not answer within its time budget"""
+
+def call_budget(agent: Any) -> float:
+    """Seconds a call may take: the agent's timeout, cut short by the request deadline"""
+    budget = getattr(agent, "call_timeout", None) or LLM_CALL_TIMEOUT
+    left = remaining()
+    if left is None:
+        return budget
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline passed before the call started")
+    return min(budget, left)
+
+def start_call(agent: Any, prompt: str, backend: Optional[LLMBackend], slot_timeout: float) -> Future:
+    """Take a backend slot (waiting at most slot_timeout) and start agent.run on the call pool.
+
+    The slot is released, and the outcome reported to the backend's circuit
+    breaker, when the call finishes, even if the caller stopped waiting
+    (unless call_backend already counted it as timed out).
+    """
+    context = contextvars.copy_context()
+    if backend is None:
+        return _call_executor.submit(context.run, agent.run, prompt)
+
+    priority_class = current_priority()
+    backend.breaker.check()
+    try:
+        backend.acquire(priority_class, slot_timeout)
+        # The stage may have been cancelled while this call queued for a slot
+        check_cancelled()
+    except SlotTimeout:
+        backend.breaker.release()
+        raise
+    except CallCancelled:
+        backend.release(priority_class)
+        backend.breaker.release()
+        raise
+
+    def finished(future: Future):
+        backend.release(priority_class)
+        if getattr(future, "abandoned", False):
+            return
+        if future.exception() is None:
+            backend.breaker.record_success()
+        else:
+            backend.breaker.record_failure()
+
+    try:
+        future = _call_executor.submit(context.run, agent.run, prompt)
+    except BaseException:
+        backend.release(priority_class)
+        backend.breaker.release()
+        raise
+    future.add_done_callback(finished)
+    return future
+
+def call_backend(agent: Any, prompt: str) -> str:
+    """One model call, bounded by the agent's timeout and the request deadline.
+
+    Raises CircuitOpenError without calling a backend whose circuit is
+    open, CallCancelled when the stage that wanted the call was cancelled,
+    and LLMTimeout (or SlotTimeout while queued) once the budget is spent;
+    callers answer with their local fallback either way.
+    """
+    check_cancelled()
+    backend = llm_registry.backend_for(agent)
+    budget = call_budget(agent)
+    # A call cut short early by the request deadline says nothing about the backend
+    agent_timeout = getattr(agent, "call_timeout", None) or LLM_CALL_TIMEOUT
+    timeout_counts = budget >= min(agent_timeout, LLM_BREAKER_TIMEOUT_FLOOR)
+    end = time.monotonic() + budget
+    first = start_call(agent, prompt, backend, budget)
+    calls = [first]
+
+    hedge_after = float(LLM_HEDGE_AFTER_SECONDS) if LLM_HEDGE_AFTER_SECONDS and getattr(agent, "hedge", False) else None
+    if hedge_after is not None and hedge_after < budget:
+        done, _ = wait(calls, timeout=hedge_after)
+        if not done and (backend is None or backend.breaker.state == CLOSED):
+            try:
+                # Only on a slot that is free right now: hedges use idle capacity
+                calls.append(start_call(agent, prompt, backend, 0))
+            except (SlotTimeout, CircuitOpenError, CallCancelled):
+                pass
+
+    agent_name = getattr(agent, "agent_name", "")
+    pending, error = set(calls), None
+    while pending:
+        done, pending = wait(pending, timeout=max(end - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                if len(calls) > 1:
+                    hedged_calls.inc(agent=agent_name, winner="first" if future is first else "hedge")
+                return future.result()
+            error = future.exception()
+    if not pending:
+        raise error
+
+    if len(calls) > 1:
+        hedged_calls.inc(agent=agent_name, winner="neither")
+    if backend is not None and timeout_counts:
+        backend.breaker.record_failure()
+        for future in pending:
+            future.abandoned = True
+    # Otherwise the request deadline left the call too little time: the breaker hears
+    # how it really ends once it does
+    raise LLMTimeout(f"{agent_name} did not answer within {budget:.1f}s")
+
+def run_agent(agent: Any, prompt: str, cache: bool = True) -> str:
+    """Run a swarms agent synchronously and return its output as text.
+
+    Responses are served from the shared LLM response cache when enabled;
+    failed calls raise and are never cached. Cache misses join an identical
+    in-flight call if there is one, otherwise call the model through
+    call_backend (slot, time budget, circuit breaker, hedging).
+    """
+    outcome = "cached"
+
+    def backend_call() -> str:
+        nonlocal outcome
+        outcome = "ok"
+        response = str(call_backend(agent, prompt))
+        add_tokens(estimate_tokens(prompt), estimate_tokens(response))
+        return response
+
+    def call() -> str:
+        nonlocal outcome
+        outcome = "coalesced"
+        if not LLM_COALESCE:
+            return backend_call()
+        # Only calls of the same priority class share a flight, so a safety
+        # check never waits on a bulk call's place in the queue; a follower
+        # waits no longer than its own call would have
+        return _flights.do(f"{current_priority()}:{LLMResponseCache.make_key(agent, prompt)}", backend_call,
+                           timeout=call_budget(agent))
+
+    start = time.perf_counter()
+    try:
+        if cache and llm_cache is not None:
+            return llm_cache.get_or_compute(agent, prompt, call)
+        return call()
+    except CircuitOpenError:
+        outcome = "rejected"
+        raise
+    except CallCancelled:
+        outcome = "cancelled"
+        raise
+    except TimeoutError:
+        outcome = "timeout"
+        raise
+    except BaseException:
+        outcome = "exception"
+        raise
+    finally:
+        llm_call_seconds.observe(time.perf_counter() - start, agent=getattr(agent, "agent_name", ""), outcome=outcome)
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking callable on the LLM executor for its priority class.
+
+    The caller's context variables (e.g. the request's stage trace and
+    priority class) carry over into the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor_for(func), partial(context.run, func, *args, **kwargs))
+
+async def iterate_blocking(func: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+    """Consume a blocking generator on an LLM executor, yielding items as they arrive.
+
+    If the consumer stops early (e.g. a streaming client disconnects), the
+    producer thread stops at the next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = loop.run_in_executor(executor_for(func), contextvars.copy_context().run, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        await asyncio.shield(producer)
+
+def get_coalescing_stats() -> Dict[str, Any]:
+    """How many agent calls were served by an identical in-flight call"""
+    return {"enabled": LLM_COALESCE, **_flights.stats()}
+
+def shutdown_executor(wait: bool = True):
+    """Stop the LLM executors (call on application shutdown)"""
+    for executor in (*_executors.values(), _call_executor):
+        executor.shutdown(wait=wait)
@@ -1,29 +1,268 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
 import time
-from typing import Dict, Any
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence
 from agents.shared.utils import setup_logging
 
 logger = setup_logging()
 
-def log_interaction(user_id: str, message_type: str, response_time_ms: float, 
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", os.path.join("data", "analytics.sqlite3"))
+
+# The writer commits whichever comes first: a full batch or the interval
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "1.0"))
+
+# Events waiting for the writer; beyond this they are dropped, never blocking a request
+ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))
+
+PERCENTILES = (50, 95, 99)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    ts REAL NOT NULL,
+    user_id TEXT,
+    source TEXT,
+    language TEXT,
+    response_time_ms REAL,
+    escalated INTEGER,
+    faq_matched INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS interactions_ts ON interactions (ts);
+"""
+
+COLUMNS = ("ts", "user_id", "source", "language", "response_time_ms", "escalated", "faq_matched", "extra")
+
+class AnalyticsStore:
+    """Interaction events in SQLite, written in batches by one background thread.
+
+    record() only enqueues, so request handlers never wait on disk. The
+    writer thread starts with the first event and owns its connection;
+    queries open their own read connection (WAL lets both run at once).
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH, batch_size: int = ANALYTICS_BATCH_SIZE,
+                 flush_seconds: float = ANALYTICS_FLUSH_SECONDS, queue_size: int = ANALYTICS_QUEUE_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._unavailable = False
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def record(self, event: Sequence[Any]):
+        """Queue one row (in COLUMNS order) for the writer"""
+        if self._unavailable:
+            self.dropped += 1
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every event queued so far is committed"""
+        if self._writer is None:
+            return True
+        if self._unavailable:
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flush and stop the writer (call on application shutdown)"""
+        if self._writer is None:
+            return
+        self.flush(timeout)
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="analytics-writer", daemon=True)
+                    self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            connection.executescript(SCHEMA)
+            self._schema_ready = True
+        return connection
+
+    def _write_loop(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            logger.error(f"Analytics store unavailable at {self.path}: {e}")
+            self._unavailable = True
+            return
+
+        stopping = False
+        while not stopping:
+            batch: List[Sequence[Any]] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+
+            if batch:
+                try:
+                    with connection:
+                        connection.executemany(
+                            f"INSERT INTO interactions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                            batch,
+                        )
+                    self.written += len(batch)
+                except Exception as e:
+                    self.write_errors += len(batch)
+                    logger.error(f"Analytics batch of {len(batch)} events failed: {e}")
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def latency_percentiles(self, since: float, percentiles: Sequence[int] = PERCENTILES) -> List[Dict[str, Any]]:
+        """Nearest-rank response-time percentiles per (source, language) since a timestamp.
+
+        Rows stream in sorted order from SQLite, so memory stays flat however
+        many events the window holds.
+        """
+        with closing(self._connect()) as connection:
+            counts = {
+                (source, language): count
+                for source, language, count in connection.execute(
+                    "SELECT source, language, COUNT(*) FROM interactions "
+                    "WHERE ts >= ? AND response_time_ms IS NOT NULL GROUP BY source, language",
+                    (since,),
+                )
+            }
+            ranks: Dict[tuple, Dict[int, List[int]]] = {}
+            for key, count in counts.items():
+                for p in percentiles:
+                    ranks.setdefault(key, {}).setdefault(max(1, -(-count * p // 100)), []).append(p)
+
+            results: Dict[tuple, Dict[str, Any]] = {}
+            key, rank = None, 0
+            for source, language, value in connection.execute(
+                "SELECT source, language, response_time_ms FROM interactions "
+                "WHERE ts >= ? AND response_time_ms IS NOT NULL "
+                "ORDER BY source, language, response_time_ms",
+                (since,),
+            ):
+                if (source, language) != key:
+                    key, rank = (source, language), 0
+                    results[key] = {"source": source, "language": language, "count": counts.get(key, 0)}
+                rank += 1
+                for p in ranks.get(key, {}).get(rank, ()):
+                    results[key][f"p{p}_ms"] = round(value, 1)
+        return list(results.values())
+
+    def rates(self, since: float, bucket_seconds: float) -> List[Dict[str, Any]]:
+        """Volume, escalation rate and FAQ hit rate per time bucket since a timestamp"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), SUM(escalated), SUM(faq_matched), "
+                "AVG(response_time_ms) FROM interactions WHERE ts >= ? GROUP BY bucket ORDER BY bucket",
+                (bucket_seconds, since),
+            ).fetchall()
+        return [
+            {
+                "start": bucket * bucket_seconds,
+                "interactions": count,
+                "escalation_rate": escalated / count,
+                "faq_hit_rate": faq_matched / count,
+                "avg_response_time_ms": round(avg_ms, 1) if avg_ms is not None else None,
+            }
+            for bucket, count, escalated, faq_matched, avg_ms in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "written": self.written,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+        }
+
+analytics_store = AnalyticsStore() if ANALYTICS_ENABLED else None
+
+def log_interaction(user_id: str, message_type: str, response_time_ms: float,
                    escalated: bool = False, faq_matched: bool = False, **kwargs):
-    """Log interaction analytics"""
+    """Record an interaction for analytics (message_type is the request source)"""
+    if analytics_store is None:
+        return
     try:
-        log_data = {
-            "timestamp": time.time(),
-            "user_id": user_id,
-            "message_type": message_type,
-            "response_time_ms": response_time_ms,
-            "escalated": escalated,
-            "faq_matched": faq_matched,
-            **kwargs
-        }
-        logger.info(f"Analytics: {log_data}")
+        language = kwargs.pop("language", None)
+        analytics_store.record((
+            time.time(),
+            user_id,
+            message_type,
+            language,
+            response_time_ms,
+            int(bool(escalated)),
+            int(bool(faq_matched)),
+            json.dumps(kwargs) if kwargs else None,
+        ))
     except Exception as e:
         logger.error(f"Analytics logging failed: {e}")
 
-def get_analytics_summary() -> Dict[str, Any]:
-    """Get analytics summary"""
-    return {
-        "status": "analytics_active",
-        "metrics": "logged_to_system"
-    }
\ No newline at end of file
+def get_analytics_summary(window_seconds: float = 86400, bucket_seconds: float = 3600) -> Dict[str, Any]:
+    """Latency percentiles and escalation/FAQ rates over a recent window"""
+    if analytics_store is None:
+        return {"status": "analytics_disabled"}
+    try:
+        analytics_store.flush(timeout=1.0)
+        since = time.time() - window_seconds
+        buckets = analytics_store.rates(since, bucket_seconds)
+        total = sum(b["interactions"] for b in buckets)
+        return {
+            "status": "analytics_active",
+            "window_seconds": window_seconds,
+            "interactions": total,
+            "escalation_rate": sum(b["escalation_rate"] * b["interactions"] for b in buckets) / total if total else 0.0,
+            "faq_hit_rate": sum(b["faq_hit_rate"] * b["interactions"] for b in buckets) / total if total else 0.0,
+            "latency": analytics_store.latency_percentiles(since),
+            "buckets": buckets,
+            "store": analytics_store.stats(),
+        }
+    except Exception as e:
+        logger.error(f"Analytics summary failed: {e}")
+        return {"status": "analytics_error", "store": analytics_store.stats()}
+
+def shutdown_analytics():
+    """Commit queued events and stop the writer"""
+    if analytics_store is not None:
+        analytics_store.close()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+from agents.shared.metrics import metrics_registry
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+# Set to false to keep calling a backend however often it fails
+LLM_CIRCUIT_BREAKER = os.getenv("LLM_CIRCUIT_BREAKER", "true").lower() == "true"
+
+# Consecutive failed or timed-out calls that open the circuit
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+
+# Seconds an open circuit rejects calls before letting one probe through
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = metrics_registry.gauge(
+    "ministry_llm_circuit_state",
+    "LLM backend circuit state (0 closed, 1 half-open, 2 open)",
+    ("backend",),
+)
+circuit_rejections = metrics_registry.counter(
+    "ministry_llm_circuit_rejections_total",
+    "LLM calls answered with a local fallback because the backend's circuit was open",
+    ("backend",),
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend that is known to be unhealthy"""
+
+class CircuitBreaker:
+    """Stops calling a backend after repeated failures, so callers fall back at once.
+
+    After `failures` consecutive failures the circuit opens and every call
+    is rejected for `cooldown` seconds. Then a single probe call is let
+    through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, name: str = "", failures: int = LLM_BREAKER_FAILURES,
+                 cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failures = max(1, failures)
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+        circuit_state.set(STATE_VALUES[CLOSED], backend=name)
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now (counts it as the probe when half-open)"""
+        if not LLM_CIRCUIT_BREAKER:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.probing):
+                self.probing = self.state == HALF_OPEN
+                return True
+            self.rejected += 1
+        circuit_rejections.inc(backend=self.name)
+        return False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go to the backend now"""
+        if not self.allow():
+            raise CircuitOpenError(f"LLM backend {self.name} is unavailable (circuit open)")
+
+    def record_success(self):
+        if not LLM_CIRCUIT_BREAKER:
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                logger.info(f"LLM backend {self.name} recovered; circuit closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        if not LLM_CIRCUIT_BREAKER:
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failures):
+                logger.warning(f"LLM backend {self.name} failing ({self.consecutive_failures} in a row); "
+                               f"circuit open for {self.cooldown:g}s")
+                self.opened_at = time.monotonic()
+                self.opened += 1
+                self._set_state(OPEN)
+
+    def release(self):
+        """Forget an allowed call that never reached the backend (e.g. no slot in time)"""
+        with self._lock:
+            self.probing = False
+
+    @contextmanager
+    def guard(self):
+        """Run a backend call under the breaker, recording how it ended"""
+        self.check()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled or abandoned (e.g. a streaming client left): says nothing about the backend
+            self.release()
+            raise
+        self.record_success()
+
+    def _set_state(self, state: str):
+        self.state = state
+        circuit_state.set(STATE_VALUES[state], backend=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.opened,
+                "rejected": self.rejected,
+            }
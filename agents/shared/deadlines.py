@@ -0,0 +1,56 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute time.monotonic() by which the current request must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Set by whoever started the current work (see StageGraph.cancel) once its
+# result is no longer wanted
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("request_cancel_event", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before an LLM call could start or finish"""
+
+class CallCancelled(Exception):
+    """The work that wanted an LLM call was cancelled before the call started"""
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Give the LLM calls made inside the block `seconds` in total (None: no limit).
+
+    Nested deadlines never extend an outer one, and the deadline carries
+    into worker threads along with the rest of the context (see
+    agent_runtime.run_blocking).
+    """
+    at = None if seconds is None else time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and (at is None or outer < at):
+        at = outer
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None without one)"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+@contextmanager
+def cancellable(event: threading.Event):
+    """LLM calls made inside the block are skipped once `event` is set"""
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+def check_cancelled():
+    """Raise CallCancelled if the current work has been cancelled"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise CallCancelled("Stage cancelled before its LLM call")
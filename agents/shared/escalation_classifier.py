@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from typing import List, Optional, Sequence
+import numpy as np
+from agents.shared.faq_embeddings import HashingTfidfEncoder
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+TRAINING_PATH = os.path.join("data", "escalation_training.jsonl")
+
+# Decide clear-cut messages locally; set to false to always ask the LLM
+ESCALATION_CLASSIFIER = os.getenv("ESCALATION_CLASSIFIER", "true").lower() == "true"
+
+# Probabilities between these bounds are uncertain and go to the LLM. The
+# lower bound is the safety-critical one: below it a message is NORMAL
+# without a second opinion, so keep it low.
+ESCALATION_LOCAL_LOW = float(os.getenv("ESCALATION_LOCAL_LOW", "0.1"))
+ESCALATION_LOCAL_HIGH = float(os.getenv("ESCALATION_LOCAL_HIGH", "0.9"))
+
+class EscalationClassifier:
+    """Logistic regression over hashed word and character n-grams.
+
+    Features come from the same hashing TF-IDF encoder as the semantic FAQ
+    index, so word bigrams ("end it", "hit me") and misspellings both carry
+    signal. Trained with full-batch gradient descent at load time; the
+    training file is small enough that this takes well under a second.
+    """
+
+    def __init__(self, texts: Sequence[str], labels: Sequence[bool], n_features: int = 2 ** 12,
+                 l2: float = 1e-5, learning_rate: float = 16.0, epochs: int = 1000):
+        self.encoder = HashingTfidfEncoder(n_features).fit(texts)
+        self.weights = np.zeros(n_features, dtype=np.float32)
+        self.bias = 0.0
+        if len(set(labels)) < 2:
+            logger.warning("Escalation training data needs both classes; classifier left untrained")
+            return
+
+        features = self.encoder.encode(texts)
+        targets = np.asarray(labels, dtype=np.float32)
+
+        # Balance the classes so the rarer one is not drowned out
+        positives = targets.sum()
+        sample_weights = np.where(targets == 1, len(targets) / (2 * positives),
+                                  len(targets) / (2 * (len(targets) - positives))).astype(np.float32)
+        sample_weights /= sample_weights.sum()
+
+        for _ in range(epochs):
+            errors = (sigmoid(features @ self.weights + self.bias) - targets) * sample_weights
+            self.weights -= learning_rate * (features.T @ errors + l2 * self.weights)
+            self.bias -= learning_rate * float(errors.sum())
+
+    def probabilities(self, texts: Sequence[str]) -> np.ndarray:
+        """Escalation probability for each text, scored as one sparse batch"""
+        if not len(texts):
+            return np.zeros(0, dtype=np.float32)
+        rows, columns, values = self.encoder.encode_sparse(texts)
+        scores = np.bincount(rows, weights=values * self.weights[columns], minlength=len(texts))
+        return sigmoid(scores + self.bias)
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+def load_training_data(path: str = TRAINING_PATH) -> List[dict]:
+    """Labelled messages, one JSON object per line: {"text": ..., "escalate": true|false}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+_classifier: Optional[EscalationClassifier] = None
+_classifier_lock = threading.Lock()
+
+def load_escalation_classifier() -> EscalationClassifier:
+    """Train the shared classifier from the labelled data on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                try:
+                    examples = load_training_data()
+                except Exception as e:
+                    logger.error(f"Failed to load escalation training data: {e}")
+                    examples = []
+                _classifier = EscalationClassifier(
+                    [example["text"] for example in examples],
+                    [bool(example["escalate"]) for example in examples],
+                )
+                logger.info(f"Escalation classifier trained on {len(examples)} messages")
+    return _classifier
+
+def decide(probability: float, low: float = ESCALATION_LOCAL_LOW, high: float = ESCALATION_LOCAL_HIGH) -> Optional[bool]:
+    """True or False for a clear-cut probability, None inside the uncertainty band"""
+    if probability >= high:
+        return True
+    if probability <= low:
+        return False
+    return None
+
+def classify_escalation(message: str, score: Optional[float] = None) -> Optional[bool]:
+    """Local escalation decision, or None when the LLM should decide.
+
+    Pass `score` when the message was already scored with escalation_scores.
+    """
+    if score is None:
+        score = escalation_scores([message])[0]
+    return None if score is None else decide(score)
+
+def escalation_scores(messages: Sequence[str]) -> List[Optional[float]]:
+    """Escalation probabilities for many messages in one vectorized pass (e.g. batch imports).
+
+    None for every message when the classifier is off or fails.
+    """
+    if not ESCALATION_CLASSIFIER:
+        return [None] * len(messages)
+    try:
+        probabilities = load_escalation_classifier().probabilities(messages)
+    except Exception as e:
+        logger.error(f"Escalation classifier failed: {e}")
+        return [None] * len(messages)
+    return [float(p) for p in probabilities]
@@ -0,0 +1,184 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from agents.shared.faq_tool import STOPWORDS
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Leading characters compared by the word-overlap check, so inflections
+# (baptised/baptized, donating/donate) count as the same word
+STEM_LENGTH = 5
+
+def content_stems(text: str) -> Set[str]:
+    """Stems of the words in a text that can carry its topic"""
+    return {w[:STEM_LENGTH] for w in WORD_PATTERN.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+class HashingTfidfEncoder:
+    """Offline TF-IDF encoder over hashed word and character n-grams.
+
+    Features are hashed into a fixed-width vector (no vocabulary to store)
+    with a process-stable hash, weighted by IDF fitted on the FAQ corpus and
+    L2-normalized so a dot product is cosine similarity. Character trigrams
+    make it tolerant of plurals and small spelling differences.
+    """
+
+    # Cosine similarities from sparse lexical features run lower than
+    # neural embeddings, so the default match threshold is lower too
+    default_threshold = 0.3
+
+    # Trigrams also make unrelated words look alike ("forgive" contains
+    # "give") and phrasing alone ("how do I ...") scores about 0.3, so a
+    # match must share a content word with the entry as well
+    lexical = True
+
+    def __init__(self, n_features: int = 2 ** 12):
+        self.n_features = n_features
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    def _features(self, text: str) -> List[int]:
+        words = WORD_PATTERN.findall(text.lower())
+        grams = [f"w:{w}" for w in words]
+        grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f" {word} "
+            grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return [zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams]
+
+    def fit(self, texts: Sequence[str]) -> "HashingTfidfEncoder":
+        document_frequency = np.zeros(self.n_features, dtype=np.float32)
+        for text in texts:
+            document_frequency[list(set(self._features(text)))] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if features:
+                matrix[row] = np.bincount(features, minlength=self.n_features)
+        matrix = np.log1p(matrix) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def encode_sparse(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """encode() as (row, column, value) arrays, for batches too large for a dense matrix"""
+        rows: List[int] = []
+        columns: List[int] = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            columns.extend(features)
+        keys, counts = np.unique(np.asarray(rows, dtype=np.int64) * self.n_features + np.asarray(columns, dtype=np.int64),
+                                 return_counts=True)
+        rows_out, columns_out = np.divmod(keys, self.n_features)
+        values = np.log1p(counts).astype(np.float32) * self.idf[columns_out]
+        norms = np.sqrt(np.bincount(rows_out, weights=values * values, minlength=len(texts)))
+        values /= np.maximum(norms[rows_out], 1e-12).astype(np.float32)
+        return rows_out, columns_out, values
+
+class SentenceTransformerEncoder:
+    """Local sentence-transformer encoder (optional dependency)"""
+
+    default_threshold = 0.5
+    lexical = False
+
+    def __init__(self, model_name: str):
+        # Imported lazily: torch is heavy and only needed in this mode
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, local_files_only=True)
+
+    def fit(self, texts: Sequence[str]) -> "SentenceTransformerEncoder":
+        return self
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True),
+            dtype=np.float32
+        )
+
+def create_encoder():
+    """Encoder selected by FAQ_EMBEDDING_MODEL ("hashing" or a local model name)"""
+    model_name = os.getenv("FAQ_EMBEDDING_MODEL", "hashing")
+    if model_name != "hashing":
+        try:
+            return SentenceTransformerEncoder(model_name)
+        except Exception as e:
+            logger.warning(f"Sentence-transformer '{model_name}' unavailable, using hashing encoder: {e}")
+    return HashingTfidfEncoder()
+
+class SemanticFAQIndex:
+    """Embedding matrix over every FAQ entry with batched cosine top-k"""
+
+    def __init__(self, faqs: List[dict], encoder=None):
+        self.faqs = faqs
+        texts, owners = [], []
+        for i, faq in enumerate(faqs):
+            # Each entry is represented by its question wordings plus its
+            # answer and keywords, which carry most of the topic vocabulary
+            rows = [faq.get("question", "")] + list(faq.get("questions", []))
+            rows.append(" ".join(faq.get("keywords", [])) + " " + faq.get("answer", ""))
+            for text in dict.fromkeys(r.strip() for r in rows if r.strip()):
+                texts.append(text)
+                owners.append(i)
+
+        self.encoder = (encoder or create_encoder()).fit(texts)
+        self.owners = np.asarray(owners, dtype=np.int64)
+        # Entries by content-word stem, for encoders whose matches need one in common
+        self.stem_entries: Optional[Dict[str, np.ndarray]] = None
+        if getattr(self.encoder, "lexical", False):
+            entries = defaultdict(set)
+            for text, owner in zip(texts, owners):
+                for stem in content_stems(text):
+                    entries[stem].add(owner)
+            self.stem_entries = {stem: np.fromiter(ids, dtype=np.int64) for stem, ids in entries.items()}
+        # Rows are grouped by entry, so each entry's rows form one contiguous run
+        self.row_starts = np.flatnonzero(np.r_[True, self.owners[1:] != self.owners[:-1]]) if texts else self.owners
+        self.row_owners = self.owners[self.row_starts]
+        self.matrix = self.encoder.encode(texts) if texts else np.zeros((0, 1), dtype=np.float32)
+
+    def search_batch(self, queries: Sequence[str], limit: int = 3,
+                     threshold: Optional[float] = None) -> List[List[Tuple[float, dict]]]:
+        """Top-k FAQ matches for each query, scored by cosine similarity.
+
+        Matches below threshold (default: the encoder's) are dropped.
+        """
+        if threshold is None:
+            threshold = self.encoder.default_threshold
+        if not queries or not len(self.owners):
+            return [[] for _ in queries]
+
+        similarities = self.encoder.encode(queries) @ self.matrix.T
+
+        # Collapse question rows to one score per FAQ entry (best question)
+        scores = np.full((len(queries), len(self.faqs)), -1.0, dtype=np.float32)
+        scores[:, self.row_owners] = np.maximum.reduceat(similarities, self.row_starts, axis=1)
+        if self.stem_entries is not None:
+            shared = np.zeros(scores.shape, dtype=bool)
+            for row, query in enumerate(queries):
+                for stem in content_stems(query):
+                    ids = self.stem_entries.get(stem)
+                    if ids is not None:
+                        shared[row, ids] = True
+            scores[~shared] = -1.0
+
+        k = min(limit, len(self.faqs))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = sorted(candidates, key=lambda i: -scores[row, i])
+            results.append([
+                (float(scores[row, i]), self.faqs[i])
+                for i in ranked if scores[row, i] >= threshold
+            ])
+        return results
+
+    def search(self, query: str, limit: int = 3, threshold: Optional[float] = None) -> List[Tuple[float, dict]]:
+        return self.search_batch([query], limit, threshold)[0]
@@ -1,32 +1,220 @@
 import json
+import math
 import os
-from typing import Optional
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from agents.shared.utils import setup_logging
 
+if TYPE_CHECKING:
+    # Imported on first semantic lookup; it pulls in NumPy
+    from agents.shared.faq_embeddings import SemanticFAQIndex
+
 logger = setup_logging()
 
-def load_faq_data():
-    """Load FAQ data from JSON file"""
+FAQ_DATA_PATH = os.path.join("data", "faq_data.json")
+FAQ_CORPUS_PATH = os.path.join("data", "faqs.json")
+
+# How often (seconds) lookups check the data files for changes
+FAQ_RELOAD_CHECK_SECONDS = float(os.getenv("FAQ_RELOAD_CHECK_SECONDS", "1.0"))
+
+# Retrieval mode: "keyword", "semantic", or "hybrid" (keyword, then semantic
+# for questions no keyword matches)
+FAQ_RETRIEVAL_MODE = os.getenv("FAQ_RETRIEVAL_MODE", "hybrid").lower()
+
+# Minimum cosine similarity for a semantic match (unset: encoder default)
+FAQ_SEMANTIC_THRESHOLD = float(os.environ["FAQ_SEMANTIC_THRESHOLD"]) if os.getenv("FAQ_SEMANTIC_THRESHOLD") else None
+
+# Words too common to identify an FAQ when deriving keywords from questions
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "do", "does", "did", "i", "you", "your",
+    "we", "our", "my", "me", "to", "of", "in", "on", "at", "for", "and", "or",
+    "can", "could", "how", "what", "when", "where", "who", "why", "there", "it",
+    "be", "get", "this", "that", "with", "about", "any"
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _read_json(path: str, default):
     try:
-        faq_path = os.path.join("data", "faq_data.json")
-        with open(faq_path, 'r') as f:
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
+    except FileNotFoundError:
+        return default
     except Exception as e:
-        logger.error(f"Failed to load FAQ data: {e}")
-        return {"faqs": []}
+        logger.error(f"Failed to load FAQ data from {path}: {e}")
+        return default
+
+def load_faq_data() -> dict:
+    """Load FAQ entries from faq_data.json merged with the faqs.json corpus.
+
+    faq_data.json entries come first and keep their curated keywords. The
+    faqs.json question/answer pairs are grouped by answer, and their
+    keywords are derived from the question wording.
+    """
+    faqs = [dict(faq) for faq in _read_json(FAQ_DATA_PATH, {"faqs": []}).get("faqs", [])]
+    known_answers = {faq.get("answer") for faq in faqs}
+
+    merged: Dict[str, dict] = {}
+    for item in _read_json(FAQ_CORPUS_PATH, []):
+        answer = item.get("answer")
+        question = item.get("question", "")
+        if not answer or answer in known_answers:
+            continue
+        entry = merged.setdefault(answer, {"keywords": [], "question": question, "answer": answer, "questions": []})
+        entry["questions"].append(question)
+        for token in tokenize(question):
+            if token not in STOPWORDS and token not in entry["keywords"]:
+                entry["keywords"].append(token)
+
+    faqs.extend(merged.values())
+    return {"faqs": faqs}
+
+class FAQIndex:
+    """Immutable inverted keyword index over FAQ entries"""
+
+    def __init__(self, faqs: List[dict]):
+        self.faqs = faqs
+        postings: Dict[str, List[int]] = defaultdict(list)
+        phrases: List[Tuple[str, int]] = []
+
+        for i, faq in enumerate(faqs):
+            for keyword in {k.lower().strip() for k in faq.get("keywords", []) if k}:
+                if " " in keyword:
+                    phrases.append((keyword, i))
+                else:
+                    postings[keyword].append(i)
+
+        # Rarer keywords are stronger evidence for an entry
+        total = max(len(faqs), 1)
+        self.postings = dict(postings)
+        self.weights = {k: 1.0 + math.log(total / len(ids)) for k, ids in postings.items()}
+        self.phrases = phrases
+
+    def search(self, question: str, limit: int = 3) -> List[Tuple[float, dict]]:
+        """Score every entry sharing a keyword with the question"""
+        scores: Dict[int, float] = defaultdict(float)
+
+        for token in set(tokenize(question)):
+            ids = self.postings.get(token)
+            if ids:
+                weight = self.weights[token]
+                for i in ids:
+                    scores[i] += weight
+
+        if self.phrases:
+            question_lower = question.lower()
+            for phrase, i in self.phrases:
+                if phrase in question_lower:
+                    scores[i] += 2.0
+
+        # Highest score first; earlier (curated) entries win ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.faqs[i]) for i, score in ranked]
+
+class FAQStore:
+    """FAQ index that loads once and reloads atomically when the data changes"""
+
+    def __init__(self, paths: Tuple[str, ...] = (FAQ_DATA_PATH, FAQ_CORPUS_PATH)):
+        self.paths = paths
+        self._index: Optional[FAQIndex] = None
+        self._semantic: Optional[Tuple[FAQIndex, "SemanticFAQIndex"]] = None
+        self._mtimes: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> FAQIndex:
+        now = time.monotonic()
+        if self._index is None or now - self._checked_at >= FAQ_RELOAD_CHECK_SECONDS:
+            self._checked_at = now
+            mtimes = self._current_mtimes()
+            if mtimes != self._mtimes:
+                self._reload(mtimes)
+        return self._index
+
+    @property
+    def semantic_index(self) -> "SemanticFAQIndex":
+        """Embedding index for the current FAQ entries, built on first use"""
+        index = self.index
+        semantic = self._semantic
+        if semantic is None or semantic[0] is not index:
+            with self._lock:
+                semantic = self._semantic
+                if semantic is None or semantic[0] is not index:
+                    from agents.shared.faq_embeddings import SemanticFAQIndex
+                    semantic = (index, SemanticFAQIndex(index.faqs))
+                    self._semantic = semantic
+        return semantic[1]
+
+    def search(self, question: str, limit: int = 3) -> List[Tuple[float, dict]]:
+        return self.index.search(question, limit)
+
+    def semantic_search_batch(self, questions: List[str], limit: int = 3,
+                              threshold: Optional[float] = FAQ_SEMANTIC_THRESHOLD) -> List[List[Tuple[float, dict]]]:
+        return self.semantic_index.search_batch(questions, limit, threshold)
+
+    def _current_mtimes(self) -> Tuple:
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _reload(self, mtimes: Tuple):
+        with self._lock:
+            if mtimes == self._mtimes and self._index is not None:
+                return
+            # Build the new index fully before swapping it in
+            index = FAQIndex(load_faq_data().get("faqs", []))
+            self._index = index
+            self._mtimes = mtimes
+            logger.info(f"FAQ index loaded with {len(index.faqs)} entries")
+
+faq_store = FAQStore()
+
+def search_faqs(question: str, limit: int = 3, mode: Optional[str] = None) -> List[Tuple[float, dict]]:
+    """Ranked (score, faq) matches for a question"""
+    return search_faqs_batch([question], limit, mode)[0]
+
+def search_faqs_batch(questions: List[str], limit: int = 3,
+                      mode: Optional[str] = None) -> List[List[Tuple[float, dict]]]:
+    """Ranked (score, faq) matches for many questions.
+
+    Keyword scores and cosine similarities are on different scales; compare
+    scores only within one mode.
+    """
+    mode = mode or FAQ_RETRIEVAL_MODE
+    try:
+        results: List[List[Tuple[float, dict]]] = [[] for _ in questions]
+
+        if mode in ("keyword", "hybrid"):
+            results = [faq_store.search(question, limit) for question in questions]
+
+        if mode in ("semantic", "hybrid"):
+            # Embed all unanswered questions in one batched matrix product
+            pending = [i for i, matches in enumerate(results) if not matches]
+            if pending:
+                semantic = faq_store.semantic_search_batch([questions[i] for i in pending], limit)
+                for i, matches in zip(pending, semantic):
+                    results[i] = matches
+
+        return results
+    except Exception as e:
+        logger.error(f"FAQ search failed: {e}")
+        return [[] for _ in questions]
 
 def get_answer(question: str) -> Optional[str]:
     """Get FAQ answer for a question"""
-    try:
-        faq_data = load_faq_data()
-        # Simple keyword matching - can be enhanced
-        question_lower = question.lower()
-        
-        for faq in faq_data.get("faqs", []):
-            if any(keyword in question_lower for keyword in faq.get("keywords", [])):
-                return faq.get("answer")
-        
+    matches = search_faqs(question, limit=1)
+    if not matches:
         return None
-    except Exception as e:
-        logger.error(f"FAQ lookup failed: {e}")
-        return None
\ No newline at end of file
+    return matches[0][1].get("answer")
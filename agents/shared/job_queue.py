@@ -0,0 +1,341 @@
+import ipaddress
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import httpx
+from agents.shared.llm_scheduler import BULK, llm_priority
+from agents.shared.metrics import metrics_registry
+from agents.shared.tracing import record_fallbacks
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+
+# Jobs generating at once; each holds one worker thread until its LLM calls finish
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Jobs waiting for a worker; beyond this, submissions are refused
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "1000"))
+
+# A job interrupted by this many restarts is marked failed instead of run again
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Finished jobs are deleted after this long
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+
+# Hosts finished jobs may be POSTed to, comma-separated. Blank: any host
+# whose addresses are all public (private, loopback, link-local and other
+# internal addresses are refused, so callbacks cannot reach internal services)
+JOB_CALLBACK_HOSTS = {h.strip().lower() for h in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if h.strip()}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+# Finished with fallback text because the LLM was unavailable; error says which stages
+DEGRADED = "degraded"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    args TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+COLUMNS = ("id", "kind", "args", "status", "result", "error", "callback_url", "callback_status",
+           "attempts", "created", "started", "finished")
+
+jobs_total = metrics_registry.counter(
+    "ministry_jobs_total",
+    "Background jobs finished, by kind and status",
+    ("kind", "status"),
+)
+jobs_queued = metrics_registry.gauge(
+    "ministry_jobs_queued",
+    "Background jobs waiting for a worker",
+)
+
+class CallbackRejected(ValueError):
+    """A callback URL the server will not POST job results to"""
+
+def check_callback_url(url: str):
+    """Raise CallbackRejected unless job results may be sent to url (resolves its host)"""
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise CallbackRejected("callback_url is not a valid URL")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise CallbackRejected("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if JOB_CALLBACK_HOSTS:
+        if host not in JOB_CALLBACK_HOSTS:
+            raise CallbackRejected(f"callback host {host} is not allowed")
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError):
+        raise CallbackRejected(f"callback host {host} does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise CallbackRejected(f"callback host {host} resolves to a non-public address")
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already waiting"""
+
+class JobQueue:
+    """Background jobs persisted in SQLite and run by a fixed pool of worker threads.
+
+    submit() commits the job and returns at once; workers take jobs in
+    submission order and store the result for polling (and POST it to the
+    job's callback URL, if it has one). Jobs still queued or running when the
+    process stops are requeued by start() on the next run.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH, workers: int = JOB_WORKERS,
+                 max_pending: int = JOB_MAX_PENDING, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retention_seconds: float = JOB_RETENTION_HOURS * 3600):
+        self.path = path
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.retention_seconds = retention_seconds
+        self._handlers: Dict[str, Tuple[Callable, str]] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._connection: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.completed = 0
+        self.degraded = 0
+        self.failed = 0
+        self.requeued = 0
+
+    def register(self, kind: str, func: Callable, result_key: str):
+        """Let jobs of `kind` run func(*args); its return value is stored under result_key"""
+        self._handlers[kind] = (func, result_key)
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._db_lock:
+            if self._connection is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._connection = connection
+            with self._connection:
+                return self._connection.execute(sql, params).fetchall()
+
+    def start(self) -> int:
+        """Start the workers and requeue unfinished jobs; returns how many were requeued"""
+        with self._start_lock:
+            if self._threads:
+                return 0
+            self._stopping.clear()
+            self._execute("DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished < ?",
+                          (SUCCEEDED, DEGRADED, FAILED, time.time() - self.retention_seconds))
+            requeued = 0
+            for job_id, kind, status, attempts in self._execute(
+                "SELECT id, kind, status, attempts FROM jobs WHERE status IN (?, ?) ORDER BY created",
+                (QUEUED, RUNNING),
+            ):
+                if kind not in self._handlers:
+                    self._finish(job_id, kind, FAILED, error=f"Unknown job kind: {kind}")
+                elif attempts >= self.max_attempts:
+                    self._finish(job_id, kind, FAILED, error=f"Interrupted {attempts} times")
+                else:
+                    self._execute("UPDATE jobs SET status = ? WHERE id = ?", (QUEUED, job_id))
+                    self._enqueue(job_id)
+                    requeued += 1
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(self._queue,), name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self.requeued += requeued
+            if requeued:
+                logger.info(f"Requeued {requeued} unfinished jobs from {self.path}")
+            return requeued
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; jobs not yet finished are requeued on the next start()"""
+        with self._start_lock:
+            self._stopping.set()
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+            # Queued jobs stay queued in the database; start() loads them again
+            self._queue = queue.Queue()
+            jobs_queued.set(0)
+
+    def submit(self, kind: str, args: Sequence[Any], callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a job and queue it for a worker"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already pending")
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, args, status, callback_url, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(list(args)), QUEUED, callback_url, time.time()),
+        )
+        self._enqueue(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's status, and its result once finished (None if unknown or purged)"""
+        rows = self._execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        return self._to_dict(dict(zip(COLUMNS, rows[0]))) if rows else None
+
+    @staticmethod
+    def _to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created"],
+            "started_at": row["started"],
+            "finished_at": row["finished"],
+            "callback_url": row["callback_url"],
+            "callback_status": row["callback_status"],
+        }
+
+    def _enqueue(self, job_id: str):
+        self._queue.put(job_id)
+        jobs_queued.inc()
+
+    def _work(self, jobs: "queue.Queue"):
+        while True:
+            job_id = jobs.get()
+            if job_id is None or self._stopping.is_set():
+                return
+            jobs_queued.dec()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} could not be run: {e}")
+
+    def _run(self, job_id: str):
+        rows = self._execute("SELECT kind, args FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED))
+        if not rows:
+            return
+        kind, args = rows[0]
+        self._execute("UPDATE jobs SET status = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                      (RUNNING, time.time(), job_id))
+        func, result_key = self._handlers[kind]
+        try:
+            # Nobody is waiting on the response, so live requests get the backend first
+            with llm_priority(BULK), record_fallbacks() as fallbacks:
+                value = func(*json.loads(args))
+            if fallbacks:
+                # The job functions answer with fallback text rather than raise
+                logger.warning(f"Job {job_id} ({kind}) used fallback text from: {', '.join(fallbacks)}")
+                self._finish(job_id, kind, DEGRADED, result={result_key: value},
+                             error=f"LLM unavailable, fallback text from: {', '.join(fallbacks)}")
+            else:
+                self._finish(job_id, kind, SUCCEEDED, result={result_key: value})
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self._finish(job_id, kind, FAILED, error=str(e))
+
+        job = self.get(job_id)
+        if job and job["callback_url"]:
+            self._notify(job)
+
+    def _finish(self, job_id: str, kind: str, status: str,
+                result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+        if status == SUCCEEDED:
+            self.completed += 1
+        elif status == DEGRADED:
+            self.degraded += 1
+        else:
+            self.failed += 1
+        jobs_total.inc(kind=kind, status=status)
+
+    def _notify(self, job: Dict[str, Any]):
+        """POST the finished job to its callback URL (one attempt; polling still works)"""
+        try:
+            # Checked again: the host may resolve differently than at submission
+            check_callback_url(job["callback_url"])
+            # Redirects are not followed: they could point anywhere
+            response = httpx.post(job["callback_url"], json=job, timeout=JOB_CALLBACK_TIMEOUT,
+                                  follow_redirects=False)
+            callback_status = f"delivered ({response.status_code})"
+        except CallbackRejected as e:
+            logger.warning(f"Callback for job {job['job_id']} refused: {e}")
+            callback_status = f"refused: {e}"
+        except Exception as e:
+            logger.warning(f"Callback for job {job['job_id']} failed: {e}")
+            callback_status = f"failed: {e}"
+        self._execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job["job_id"]))
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return {
+            "path": self.path,
+            "workers": len(self._threads),
+            "pending": self._queue.qsize(),
+            "jobs": {status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, DEGRADED, FAILED)},
+            "completed": self.completed,
+            "degraded": self.degraded,
+            "failed": self.failed,
+            "requeued": self.requeued,
+        }
+
+job_queue = JobQueue()
+
+def start_jobs() -> int:
+    """Start the job workers, resuming jobs left over from the last run"""
+    try:
+        return job_queue.start()
+    except Exception as e:
+        logger.error(f"Job queue unavailable at {job_queue.path}: {e}")
+        return 0
+
+def get_job_stats() -> Dict[str, Any]:
+    """Job counts by status and the worker pool's state"""
+    try:
+        return job_queue.stats()
+    except Exception as e:
+        logger.error(f"Job stats failed: {e}")
+        return {"status": "jobs_error"}
+
+def shutdown_jobs():
+    """Stop the job workers (call on application shutdown)"""
+    job_queue.stop(timeout=1.0)
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+LEXICON_PATH = os.path.join("data", "intent_lexicon.json")
+
+# Routing order when a message matches several intents
+INTENT_PRIORITY = ("prayer_request", "faq_inquiry", "general_inquiry")
+
+class KeywordEngine:
+    """Single-pass, word-boundary keyword matcher over several lexicons.
+
+    Every phrase from every category is compiled into one regex, factored as
+    a character trie so shared prefixes are tested once, and a message is
+    scanned once no matter how many categories or phrases there are.
+    Phrases only match whole words ("how" does not match "show") and
+    multi-word phrases tolerate any whitespace or hyphens between words
+    ("self harm" matches "self-harm").
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        categories: Dict[str, set] = {}
+        for category, phrases in lexicons.items():
+            for phrase in phrases:
+                key = normalize_phrase(phrase)
+                if key:
+                    categories.setdefault(key, set()).add(category)
+
+        # The regex consumes the longest phrase at each position, so a
+        # phrase also reports the categories of phrases nested inside it
+        # ("help me" is escalation and also contains general "help")
+        for phrase in categories:
+            for other in categories:
+                if other != phrase and re.search(rf"(?<!\w){re.escape(other)}(?!\w)", phrase):
+                    categories[phrase] |= categories[other]
+
+        self.categories: Dict[str, FrozenSet[str]] = {k: frozenset(v) for k, v in categories.items()}
+        trie_pattern = build_trie_pattern(self.categories)
+        self.pattern = re.compile(rf"\b(?:{trie_pattern})(?!\w)") if trie_pattern else None
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Matched phrases per category, in order of appearance"""
+        matches: Dict[str, List[str]] = {}
+        if self.pattern is None:
+            return matches
+        for match in self.pattern.finditer(text.lower()):
+            phrase = normalize_phrase(match.group(0))
+            for category in self.categories.get(phrase, ()):
+                matches.setdefault(category, []).append(phrase)
+        return matches
+
+def normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.lower().replace("-", " ").split())
+
+def build_trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex matching any of the phrases, factored by common prefixes.
+
+    Python's re tries alternatives one by one, so a flat alternation of N
+    phrases costs N attempts per position; a trie costs one per character.
+    Longer phrases are preferred where one phrase extends another.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def compile_node(node: dict) -> str:
+        branches = [
+            (r"[\s-]+" if char == " " else re.escape(char)) + compile_node(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase ends here: the longer continuation is optional
+        return f"(?:{body})?" if "" in node else body
+
+    return compile_node(trie)
+
+def load_lexicons(path: str = LEXICON_PATH) -> Dict[str, List[str]]:
+    """Load keyword lexicons from the data file"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load keyword lexicons: {e}")
+        return {}
+
+keyword_engine = KeywordEngine(load_lexicons())
+
+@lru_cache(maxsize=256)
+def scan_message(text: str) -> Dict[str, List[str]]:
+    """Scan a message once; escalation and routing reuse the same result"""
+    return keyword_engine.scan(text)
+
+def escalation_keywords(text: str) -> List[str]:
+    """Escalation phrases found in a message"""
+    return scan_message(text).get("escalation", [])
+
+def urgent_keywords(text: str) -> List[str]:
+    """Urgent spiritual or deliverance phrases found in a message"""
+    return scan_message(text).get("urgent_spiritual", [])
+
+def classify_intent(text: str) -> str:
+    """Message type from keyword signals: prayer, FAQ, general or default"""
+    matches = scan_message(text)
+    for intent in INTENT_PRIORITY:
+        if intent in matches:
+            return intent
+    return "default"
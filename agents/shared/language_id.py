@@ -0,0 +1,144 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+from agents.shared.metrics import metrics_registry
+from agents.shared.utils import setup_logging, get_supported_languages
+
+logger = setup_logging()
+
+language_overrides = metrics_registry.counter(
+    "ministry_language_overrides_total",
+    "Messages replied to in a detected language other than the one the client sent",
+    ("claimed", "detected"),
+)
+
+SAMPLES_PATH = os.path.join("data", "language_samples.json")
+
+# Posterior a detection needs before it overrides the client's language code
+LANGUAGE_ID_MIN_CONFIDENCE = float(os.getenv("LANGUAGE_ID_MIN_CONFIDENCE", "0.9"))
+
+# Prior probability given to the client's language code; a short message
+# must be clearly in another language to override it
+CLAIMED_LANGUAGE_PRIOR = 0.8
+
+# Only the start of long messages is scored; language rarely changes mid-email
+LANGUAGE_ID_MAX_CHARS = 400
+
+NGRAM_ORDERS = (1, 2, 3)
+
+NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+
+class LanguageGuess(NamedTuple):
+    language: str
+    confidence: float
+
+def normalize_text(text: str) -> str:
+    """Lowercase letters and apostrophes, words separated by single spaces"""
+    return " ".join(NON_LETTERS.sub(" ", text[:LANGUAGE_ID_MAX_CHARS].lower()).split())
+
+def char_ngrams(text: str) -> List[str]:
+    """Character 1-3 grams of the space-padded text, with repeats"""
+    padded = f" {text} "
+    return [padded[i:i + n] for n in NGRAM_ORDERS for i in range(len(padded) - n + 1)]
+
+class LanguageIdentifier:
+    """Naive Bayes over character n-gram profiles, one per language.
+
+    Short function words and accented letters (" el ", "ção", "ß", " the ")
+    separate the supported languages well after a few words, with no model
+    download or network call.
+    """
+
+    def __init__(self, samples: Dict[str, List[str]], alpha: float = 0.5):
+        self.languages = sorted(samples)
+        profiles = {
+            lang: Counter(gram for text in texts for gram in char_ngrams(normalize_text(text)))
+            for lang, texts in samples.items()
+        }
+        vocabulary = set().union(*profiles.values()) if profiles else set()
+
+        # One row of log-probabilities per n-gram, with a floor for unseen ones
+        self.unseen: List[float] = []
+        totals = {}
+        for lang in self.languages:
+            totals[lang] = sum(profiles[lang].values()) + alpha * (len(vocabulary) + 1)
+            self.unseen.append(math.log(alpha / totals[lang]))
+        self.log_probs: Dict[str, List[float]] = {
+            gram: [math.log((profiles[lang][gram] + alpha) / totals[lang]) for lang in self.languages]
+            for gram in vocabulary
+        }
+
+    def identify(self, text: str, expected: Optional[str] = None,
+                 prior: float = CLAIMED_LANGUAGE_PRIOR) -> Optional[LanguageGuess]:
+        """Most likely language and its posterior, or None if there is no text.
+
+        `expected` (e.g. the client's language code) gets `prior` of the prior
+        mass instead of an equal share.
+        """
+        text = normalize_text(text)
+        if not text or not self.languages:
+            return None
+
+        rows = [self.log_probs.get(gram, self.unseen) for gram in char_ngrams(text)]
+        scores = [sum(column) for column in zip(*rows)]
+
+        # Overlapping n-gram orders count each letter several times, so the
+        # raw likelihoods are scaled down before turning them into a posterior
+        scaled = [score / len(NGRAM_ORDERS) for score in scores]
+        if expected in self.languages and len(self.languages) > 1:
+            others = math.log((1 - prior) / (len(self.languages) - 1))
+            scaled = [score + (math.log(prior) if lang == expected else others)
+                      for score, lang in zip(scaled, self.languages)]
+        best = max(scaled)
+        weights = [math.exp(score - best) for score in scaled]
+        index = scaled.index(best)
+        return LanguageGuess(self.languages[index], weights[index] / sum(weights))
+
+_identifier: Optional[LanguageIdentifier] = None
+_identifier_lock = threading.Lock()
+
+def load_language_identifier() -> LanguageIdentifier:
+    """Build the shared identifier from the sample texts on first use"""
+    global _identifier
+    if _identifier is None:
+        with _identifier_lock:
+            if _identifier is None:
+                try:
+                    with open(SAMPLES_PATH, "r", encoding="utf-8") as f:
+                        samples = json.load(f)
+                except Exception as e:
+                    logger.error(f"Failed to load language samples: {e}")
+                    samples = {}
+                supported = get_supported_languages()
+                _identifier = LanguageIdentifier({k: v for k, v in samples.items() if k in supported})
+                logger.info(f"Language identifier loaded for {len(_identifier.languages)} languages")
+    return _identifier
+
+def detect_language(text: str, expected: Optional[str] = None) -> Optional[LanguageGuess]:
+    """Best guess at the language of a message"""
+    return load_language_identifier().identify(text, expected)
+
+def resolve_language(text: str, claimed: Optional[str] = None,
+                     min_confidence: float = LANGUAGE_ID_MIN_CONFIDENCE) -> str:
+    """Language to process and reply in for a message.
+
+    A confident detection wins over the client's code (widgets often send a
+    default "en"), though the code weighs in as a prior so short or
+    ambiguous messages keep it. Without a code, English is the prior and
+    the fallback.
+    """
+    claimed = (claimed or "").lower() or None
+    if claimed not in get_supported_languages():
+        claimed = None
+
+    guess = detect_language(text, claimed or "en")
+    if guess is None or guess.confidence < min_confidence:
+        return claimed or "en"
+    if claimed and guess.language != claimed:
+        language_overrides.inc(claimed=claimed, detected=guess.language)
+        logger.debug("Language detected as %s (%.2f), client sent %s", guess.language, guess.confidence, claimed)
+    return guess.language
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+class InMemoryCacheBackend:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Cache backend for any Redis-compatible client (get/setex/scan_iter/delete/dbsize).
+
+    TTL eviction is delegated to Redis via SETEX; LRU eviction and the overall
+    size limit come from the server's maxmemory/allkeys-lru policy.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: float = 3600, prefix: str = "ministry_hub:llm:"):
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str):
+        self.client.setex(self.prefix + key, self.ttl_seconds, value)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def __len__(self) -> int:
+        # Approximate: DBSIZE is O(1) but counts every key in the database,
+        # where counting only ours would scan them all on each /health call
+        return self.client.dbsize()
+
+class LLMResponseCache:
+    """Caches agent outputs keyed by agent, normalized prompt and model settings"""
+
+    def __init__(self, backend: Any, max_value_bytes: int = 64 * 1024):
+        self.backend = backend
+        self.max_value_bytes = max_value_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(agent: Any, prompt: str) -> str:
+        """Build a cache key from the agent name, model settings and prompt.
+
+        Only reads attributes a LazyAgent has before it is built; the backend
+        name stands in for its sampling settings (temperature).
+        """
+        settings = {
+            "agent": getattr(agent, "agent_name", type(agent).__name__),
+            "model": getattr(agent, "model_name", None),
+            "backend": getattr(agent, "llm_backend", None),
+            "system_prompt": getattr(agent, "system_prompt", None),
+        }
+        normalized_prompt = normalize_prompt(prompt)
+        payload = json.dumps(settings, sort_keys=True, default=str) + "\n" + normalized_prompt
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, agent: Any, prompt: str, compute: Callable[[], str]) -> str:
+        """Return a cached response or compute, store and return a new one"""
+        key = self.make_key(agent, prompt)
+
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"LLM cache read failed: {e}")
+            cached = None
+            self._count("errors")
+
+        if cached is not None:
+            self._count("hits")
+            return cached
+
+        self._count("misses")
+        value = compute()
+
+        if len(value.encode("utf-8")) <= self.max_value_bytes:
+            try:
+                self.backend.set(key, value)
+            except Exception as e:
+                logger.error(f"LLM cache write failed: {e}")
+                self._count("errors")
+
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and backend size"""
+        lookups = self.hits + self.misses
+        try:
+            entries = len(self.backend)
+        except Exception:
+            entries = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting differences share a cache entry"""
+    return re.sub(r"\s+", " ", str(prompt)).strip()
+
+def create_llm_cache() -> Optional[LLMResponseCache]:
+    """Build the response cache from environment settings.
+
+    LLM_CACHE_BACKEND selects "memory" (default), "redis" or "off".
+    """
+    backend_name = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+    ttl_seconds = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    max_value_bytes = int(os.getenv("LLM_CACHE_MAX_VALUE_BYTES", str(64 * 1024)))
+
+    if backend_name == "off":
+        return None
+
+    if backend_name == "redis":
+        try:
+            import redis
+            client = redis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                db=int(os.getenv("REDIS_DB", "0")),
+                password=os.getenv("REDIS_PASSWORD") or None,
+            )
+            # Redis() connects lazily: check the server now, not on the first call
+            client.ping()
+            return LLMResponseCache(RedisCacheBackend(client, ttl_seconds), max_value_bytes)
+        except Exception as e:
+            logger.warning(f"Redis LLM cache unavailable, using in-memory cache: {e}")
+
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+    return LLMResponseCache(InMemoryCacheBackend(max_entries, ttl_seconds), max_value_bytes)
+
+llm_cache = create_llm_cache()
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Stats for the shared LLM response cache"""
+    if llm_cache is None:
+        return {"backend": "off"}
+    return llm_cache.stats()
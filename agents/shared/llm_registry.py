@@ -0,0 +1,251 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from agents.shared.circuit_breaker import CircuitBreaker
+from agents.shared.llm_scheduler import PriorityScheduler, current_priority
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+# Max concurrent requests per backend; LM Studio serves one box, so keep it small
+LLM_BACKEND_MAX_CONCURRENCY = int(os.getenv("LLM_BACKEND_MAX_CONCURRENCY", "4"))
+
+# Seconds before an HTTP request to the backend gives up
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+# Seconds a caller waits for one agent call (slot wait included) before
+# using its fallback; agents may set their own with create_agent(timeout=...)
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+
+# Per-agent overrides, e.g. "EscalationDetector=5,DrMylesPolisher=30"
+LLM_AGENT_TIMEOUTS = {
+    name.strip(): float(seconds)
+    for name, _, seconds in (item.partition("=") for item in os.getenv("LLM_AGENT_TIMEOUTS", "").split(","))
+    if name.strip() and seconds.strip()
+}
+
+class LLMBackend:
+    """One model endpoint: its settings, shared client and concurrency cap"""
+
+    def __init__(self, name: str, model_name: str, api_base: str, api_key: str,
+                 temperature: float = 0.1, max_concurrency: int = LLM_BACKEND_MAX_CONCURRENCY):
+        self.name = name
+        self.model_name = model_name
+        self.api_base = api_base
+        self.api_key = api_key
+        self.temperature = temperature
+        self.max_concurrency = max_concurrency
+        self.scheduler = PriorityScheduler(max_concurrency, name=name)
+        self.breaker = CircuitBreaker(name)
+        self._llm = None
+        self._lock = threading.Lock()
+        self.completed = 0
+
+    @property
+    def llm(self):
+        """Shared LiteLLM client for every agent on this backend"""
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    from swarms.utils.litellm_wrapper import LiteLLM
+                    self._llm = LiteLLM(
+                        model_name=self.model_name,
+                        api_base=self.api_base,
+                        api_key=self.api_key,
+                        temperature=self.temperature,
+                        custom_llm_provider="openai",  # Specify provider
+                    )
+        return self._llm
+
+    def completion_kwargs(self) -> Dict[str, Any]:
+        """Connection settings for direct litellm.completion calls"""
+        return {
+            "model": self.model_name,
+            "api_base": self.api_base,
+            "api_key": self.api_key,
+            "temperature": self.temperature,
+        }
+
+    def acquire(self, priority_class: str, timeout: Optional[float] = None):
+        """Take one of this backend's concurrent request slots (see llm_scheduler)"""
+        self.scheduler.acquire(priority_class, timeout)
+
+    def release(self, priority_class: str):
+        self.scheduler.release(priority_class)
+        with self._lock:
+            self.completed += 1
+
+    @contextmanager
+    def slot(self, priority_class: Optional[str] = None, timeout: Optional[float] = None):
+        """Hold one of this backend's concurrent request slots.
+
+        Slots go to waiting calls by priority class (the caller's current
+        class by default), see llm_scheduler.
+        """
+        priority_class = priority_class or current_priority()
+        self.acquire(priority_class, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority_class)
+
+    def stats(self) -> Dict[str, Any]:
+        classes = self.scheduler.stats()
+        return {
+            "model": self.model_name,
+            "api_base": self.api_base,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.scheduler.in_flight,
+            "waiting": sum(c["waiting"] for c in classes.values()),
+            "completed": self.completed,
+            "circuit": self.breaker.stats(),
+            "priority_classes": classes,
+        }
+
+class LazyAgent:
+    """Stands in for a swarms Agent until a call first needs the real one.
+
+    Importing swarms and building agents dominates worker startup, so
+    modules declare their agents at import time and pay for them on first
+    use (or in warm_up_agents). Name, prompt and model are available
+    without building anything, as are the call settings run_agent uses:
+    call_timeout (seconds per call) and hedge (whether a slow call may be
+    raced by a second request, for short classification calls).
+    """
+
+    def __init__(self, registry: "LLMRegistry", backend: str, kwargs: Dict[str, Any]):
+        timeout = kwargs.pop("timeout", LLM_CALL_TIMEOUT)
+        self.hedge = kwargs.pop("hedge", False)
+        self.agent_name = kwargs.get("agent_name")
+        self.call_timeout = LLM_AGENT_TIMEOUTS.get(self.agent_name, timeout)
+        self.system_prompt = kwargs.get("system_prompt")
+        self.llm_backend = backend
+        self.model_name = registry.backend_config(backend).model_name
+        self._registry = registry
+        self._kwargs = kwargs
+        self._agent = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._agent is not None
+
+    @property
+    def agent(self):
+        """The real swarms Agent, built on first access"""
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    self._agent = self._registry.build_agent(self.llm_backend, **self._kwargs)
+                    logger.info(f"Agent {self.agent_name} initialized")
+        return self._agent
+
+    def run(self, *args, **kwargs):
+        return self.agent.run(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not set above
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.agent, name)
+
+class LLMRegistry:
+    """Owns every model backend and hands shared clients to agents"""
+
+    def __init__(self):
+        self._backends: Dict[str, LLMBackend] = {}
+        self._agents: List[LazyAgent] = []
+        self._pool_configured = False
+        self._lock = threading.Lock()
+
+    def register(self, backend: LLMBackend) -> LLMBackend:
+        self._backends[backend.name] = backend
+        return backend
+
+    def backend_config(self, name: str = "default") -> LLMBackend:
+        """A registered backend, without opening any connections"""
+        return self._backends[name]
+
+    def get(self, name: str = "default") -> LLMBackend:
+        """A registered backend, ready to serve requests"""
+        self._configure_connection_pool()
+        return self._backends[name]
+
+    def create_agent(self, backend: str = "default", **kwargs) -> LazyAgent:
+        """Declare an agent on a backend; it is built on first use"""
+        agent = LazyAgent(self, backend, kwargs)
+        self._agents.append(agent)
+        return agent
+
+    def build_agent(self, backend: str = "default", **kwargs):
+        """Build a swarms Agent on a registered backend's shared client"""
+        from swarms import Agent
+        llm_backend = self.get(backend)
+        kwargs.setdefault("max_loops", 1)
+        kwargs.setdefault("verbose", False)
+        agent = Agent(model_name=llm_backend.model_name, llm=llm_backend.llm, **kwargs)
+        agent.llm_backend = backend
+        return agent
+
+    def warm_up(self) -> int:
+        """Build every declared agent now; returns how many were built"""
+        pending = [agent for agent in self._agents if not agent.built]
+        for agent in pending:
+            agent.agent
+        return len(pending)
+
+    def backend_for(self, agent: Any) -> Optional[LLMBackend]:
+        return self._backends.get(getattr(agent, "llm_backend", None))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {name: backend.stats() for name, backend in self._backends.items()}
+        for agent in self._agents:
+            backend_stats = stats.get(agent.llm_backend)
+            if backend_stats is not None:
+                backend_stats["agents_built"] = backend_stats.get("agents_built", 0) + agent.built
+        return stats
+
+    def _configure_connection_pool(self):
+        """Route litellm through one keep-alive HTTP pool sized to the backends"""
+        if self._pool_configured:
+            return
+        with self._lock:
+            if self._pool_configured:
+                return
+            try:
+                import httpx
+                import litellm
+                pool_size = sum(b.max_concurrency for b in self._backends.values()) or 1
+                litellm.client_session = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                        keepalive_expiry=60,
+                    ),
+                    timeout=LLM_HTTP_TIMEOUT,
+                )
+                logger.info(f"LLM connection pool configured with {pool_size} keep-alive connections")
+            except Exception as e:
+                logger.warning(f"LLM connection pool not configured: {e}")
+            self._pool_configured = True
+
+llm_registry = LLMRegistry()
+llm_registry.register(LLMBackend(
+    name="default",
+    model_name=os.getenv("LM_STUDIO_MODEL", "openai/qwen3-4b:2"),
+    api_base=os.getenv("LM_STUDIO_API_BASE", "http://192.168.1.88:1234/v1"),
+    api_key=os.getenv("LM_STUDIO_API_KEY", "lm-studio"),
+))
+
+def create_agent(backend: str = "default", **kwargs) -> LazyAgent:
+    """Declare a swarms Agent that shares the registry's client for `backend`"""
+    return llm_registry.create_agent(backend, **kwargs)
+
+def warm_up_agents() -> int:
+    """Build all declared agents and the connection pool ahead of traffic"""
+    return llm_registry.warm_up()
+
+def get_backend_stats() -> Dict[str, Any]:
+    """In-flight/waiting counts per backend"""
+    return llm_registry.stats()
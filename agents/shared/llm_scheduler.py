@@ -0,0 +1,204 @@
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from agents.shared.metrics import metrics_registry
+
+# Priority classes, most urgent first
+CRITICAL = "critical"        # escalation checks, crisis and urgent prayer replies
+INTERACTIVE = "interactive"  # someone is waiting on the reply
+BULK = "bulk"                # marketing copy, batch imports, bulk translation
+PRIORITY_CLASSES = (CRITICAL, INTERACTIVE, BULK)
+RANK = {name: rank for rank, name in enumerate(PRIORITY_CLASSES)}
+
+# Set to false to grant backend slots first come, first served
+LLM_PRIORITY_SCHEDULING = os.getenv("LLM_PRIORITY_SCHEDULING", "true").lower() == "true"
+
+# Slots per backend that only critical calls may take, so a burst of other
+# work never occupies the whole backend
+LLM_RESERVED_CRITICAL_SLOTS = int(os.getenv("LLM_RESERVED_CRITICAL_SLOTS", "1"))
+
+# Most slots bulk work may hold at once (blank: half the backend)
+LLM_BULK_MAX_SLOTS = os.getenv("LLM_BULK_MAX_SLOTS", "")
+
+queue_wait_seconds = metrics_registry.histogram(
+    "ministry_llm_queue_wait_seconds",
+    "Time calls wait for a backend slot, by backend and priority class",
+    ("backend", "priority"),
+)
+queue_depth = metrics_registry.gauge(
+    "ministry_llm_queue_depth",
+    "Calls waiting for a backend slot, by backend and priority class",
+    ("backend", "priority"),
+)
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=INTERACTIVE)
+
+def current_priority() -> str:
+    """Priority class of LLM calls made from the current context"""
+    return _priority.get() if LLM_PRIORITY_SCHEDULING else INTERACTIVE
+
+def effective_priority(requested: Optional[str], current: Optional[str] = None) -> str:
+    """Class a call runs at: the requested one, except that bulk work stays bulk.
+
+    A batch import runs its stages as bulk, so thousands of imported
+    messages can never crowd out live traffic. Critical calls are the
+    exception: an escalation check or crisis reply inside bulk work still
+    runs as critical, so a message at risk never waits behind the import.
+    """
+    current = current or current_priority()
+    if not LLM_PRIORITY_SCHEDULING or requested is None:
+        return current
+    if current == BULK and requested != CRITICAL:
+        return current
+    return requested
+
+@contextmanager
+def llm_priority(priority_class: str):
+    """Run the LLM calls made inside the block at a priority class"""
+    token = _priority.set(effective_priority(priority_class))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def prioritized(priority_class: str) -> Callable:
+    """Decorator running a function's LLM calls at a priority class.
+
+    The class is also recorded on the function, so run_blocking can pick
+    the matching worker pool before the call starts.
+    """
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with llm_priority(priority_class):
+                    return await func(*args, **kwargs)
+            wrapper = async_wrapper
+        else:
+            @functools.wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                with llm_priority(priority_class):
+                    return func(*args, **kwargs)
+            wrapper = sync_wrapper
+        wrapper.llm_priority = priority_class
+        return wrapper
+    return decorate
+
+class SlotTimeout(TimeoutError):
+    """No backend slot was granted within the caller's time budget"""
+
+class PriorityScheduler:
+    """Concurrency slots granted by priority class instead of arrival order.
+
+    When a slot frees up it goes to the most urgent waiting call that may
+    take it (oldest first within a class). Only critical calls may take the
+    last `reserved_critical` slots, and bulk calls hold at most `bulk_max`
+    slots, so a safety check waits at most for a free slot, never behind a
+    queue of marketing copy.
+    """
+
+    def __init__(self, max_concurrency: int, name: str = "",
+                 reserved_critical: int = LLM_RESERVED_CRITICAL_SLOTS,
+                 bulk_max: Optional[int] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        reserved = min(max(reserved_critical, 0), max_concurrency - 1)
+        if bulk_max is None:
+            bulk_max = int(LLM_BULK_MAX_SLOTS) if LLM_BULK_MAX_SLOTS else max(1, max_concurrency // 2)
+        self.limits = {
+            CRITICAL: max_concurrency,
+            INTERACTIVE: max_concurrency - reserved,
+            BULK: max_concurrency - reserved,
+        }
+        self.bulk_max = max(1, bulk_max)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._sequence = itertools.count()
+        self._waiters: List[Tuple[int, int, str]] = []
+        self._classes: Dict[str, Dict[str, Any]] = {
+            name: {"waiting": 0, "in_flight": 0, "admitted": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for name in PRIORITY_CLASSES
+        }
+
+    def _admissible(self, priority_class: str) -> bool:
+        if self.in_flight >= self.limits[priority_class]:
+            return False
+        return priority_class != BULK or self._classes[BULK]["in_flight"] < self.bulk_max
+
+    def _is_next(self, waiter: Tuple[int, int, str]) -> bool:
+        # Without priorities every call shares one FIFO queue and limit
+        if not LLM_PRIORITY_SCHEDULING:
+            return self.in_flight < self.max_concurrency and min(self._waiters) == waiter
+        candidates = [w for w in self._waiters if self._admissible(w[2])]
+        return bool(candidates) and min(candidates) == waiter
+
+    def acquire(self, priority_class: str = INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """Block until a slot is granted; returns the seconds spent waiting.
+
+        Raises SlotTimeout if no slot is granted within `timeout` seconds
+        (0 only takes a slot that is free right now).
+        """
+        rank = RANK[priority_class] if LLM_PRIORITY_SCHEDULING else 0
+        waiter = (rank, next(self._sequence), priority_class)
+        stats = self._classes[priority_class]
+        start = time.perf_counter()
+        with self._cond:
+            self._waiters.append(waiter)
+            stats["waiting"] += 1
+            queue_depth.inc(backend=self.name, priority=priority_class)
+            try:
+                while not self._is_next(waiter):
+                    left = None if timeout is None else start + timeout - time.perf_counter()
+                    if left is not None and left <= 0:
+                        # Whoever was queued behind this call may be next now
+                        self._cond.notify_all()
+                        raise SlotTimeout(f"No {priority_class} slot on {self.name} within {timeout:g}s")
+                    self._cond.wait(left)
+            finally:
+                self._waiters.remove(waiter)
+                stats["waiting"] -= 1
+                queue_depth.dec(backend=self.name, priority=priority_class)
+            self.in_flight += 1
+            stats["in_flight"] += 1
+            stats["admitted"] += 1
+            waited = time.perf_counter() - start
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+            # The next waiter may be admissible too
+            self._cond.notify_all()
+        queue_wait_seconds.observe(waited, backend=self.name, priority=priority_class)
+        return waited
+
+    def release(self, priority_class: str = INTERACTIVE):
+        with self._cond:
+            self.in_flight -= 1
+            self._classes[priority_class]["in_flight"] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority_class: str = INTERACTIVE, timeout: Optional[float] = None):
+        self.acquire(priority_class, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority_class)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, slots held and wait times per priority class"""
+        with self._cond:
+            return {
+                name: {
+                    "waiting": c["waiting"],
+                    "in_flight": c["in_flight"],
+                    "admitted": c["admitted"],
+                    "avg_wait_ms": round(c["wait_seconds"] / c["admitted"] * 1000, 1) if c["admitted"] else 0.0,
+                    "max_wait_ms": round(c["max_wait_seconds"] * 1000, 1),
+                }
+                for name, c in self._classes.items()
+            }
@@ -0,0 +1,140 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from agents.shared.utils import setup_logging
+
+logger = setup_logging()
+
+VERSES_PATH = os.path.join("data", "verses.json")
+THEMES_PATH = os.path.join("data", "scripture_themes.json")
+
+# Minimum BM25 score for a local match to be trusted without the LLM
+SCRIPTURE_MIN_SCORE = float(os.getenv("SCRIPTURE_MIN_SCORE", "3.0"))
+
+DEFAULT_VERSE = {
+    "reference": "Psalm 23:1",
+    "text": "The Lord is my shepherd; I shall not want."
+}
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "was", "were", "i", "me", "my",
+    "you", "your", "he", "him", "his", "we", "our", "us", "they", "them", "it",
+    "to", "of", "in", "on", "at", "for", "and", "or", "not", "no", "all", "that",
+    "this", "with", "who", "will", "shall", "have", "has", "do", "does", "can",
+    "so", "as", "by", "from", "let", "if", "there", "am", "please", "would"
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def format_verse(verse: dict) -> str:
+    """Render a verse the way the agents quote scripture"""
+    return f"{verse['reference']} - {verse['text']}"
+
+class ScriptureIndex:
+    """BM25 index over verse text plus curated theme tags.
+
+    A message is matched on its own words and on the themes its words map to
+    through the theme lexicon (e.g. "cancer" -> healing), so a verse can
+    match a message that shares no words with it.
+    """
+
+    def __init__(self, verses: List[dict], theme_lexicon: Dict[str, List[str]],
+                 k1: float = 1.2, b: float = 0.75, theme_weight: int = 2, theme_boost: float = 1.5):
+        self.verses = verses
+        self.k1 = k1
+        self.b = b
+        self.theme_boost = theme_boost
+
+        self.word_themes: Dict[str, List[str]] = defaultdict(list)
+        for theme, words in theme_lexicon.items():
+            for word in words:
+                self.word_themes[word.lower()].append(theme)
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for i, verse in enumerate(verses):
+            terms = tokenize(verse.get("text", ""))
+            for theme in verse.get("themes", []):
+                terms += [f"#{theme}"] * theme_weight
+            counts = Counter(terms)
+            for term, tf in counts.items():
+                postings[term].append((i, tf))
+            lengths.append(len(terms))
+
+        total = len(verses)
+        self.average_length = sum(lengths) / total if total else 0.0
+        self.lengths = lengths
+        self.postings = dict(postings)
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+
+    def query_terms(self, message: str) -> List[str]:
+        """Message words plus the themes they signal"""
+        words = tokenize(message)
+        themes = {f"#{theme}" for word in words for theme in self.word_themes.get(word, [])}
+        return list(dict.fromkeys(words)) + sorted(themes)
+
+    def rank(self, message: str, limit: int = 3) -> List[Tuple[float, dict]]:
+        """Top verses for a message by BM25 score"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in self.query_terms(message):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term] * (self.theme_boost if term.startswith("#") else 1.0)
+            for i, tf in docs:
+                norm = 1 - self.b + self.b * self.lengths[i] / self.average_length
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.verses[i]) for i, score in ranked]
+
+_index: Optional[ScriptureIndex] = None
+_index_lock = threading.Lock()
+
+def load_scripture_index() -> ScriptureIndex:
+    """Build the shared scripture index on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    with open(VERSES_PATH, "r", encoding="utf-8") as f:
+                        verses = json.load(f)
+                    with open(THEMES_PATH, "r", encoding="utf-8") as f:
+                        themes = json.load(f)
+                except Exception as e:
+                    logger.error(f"Failed to load scripture data: {e}")
+                    verses, themes = [DEFAULT_VERSE], {}
+                _index = ScriptureIndex(verses, themes)
+                logger.info(f"Scripture index loaded with {len(verses)} verses")
+    return _index
+
+def recommend_scripture(message: str, min_score: float = SCRIPTURE_MIN_SCORE) -> Tuple[Optional[str], float]:
+    """Best local verse for a message and its score.
+
+    Returns (None, score) when no verse clears min_score, so the caller can
+    decide whether to ask the LLM.
+    """
+    matches = load_scripture_index().rank(message, limit=1)
+    if not matches:
+        return None, 0.0
+    score, verse = matches[0]
+    if score < min_score:
+        return None, score
+    return format_verse(verse), score
+
+def candidate_verses(message: str, limit: int = 3) -> List[str]:
+    """Top local verses for a message, for a model to choose from (never empty)"""
+    matches = load_scripture_index().rank(message, limit=limit)
+    return [format_verse(verse) for _, verse in matches] or [format_verse(DEFAULT_VERSE)]
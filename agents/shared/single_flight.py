@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+class _Call:
+    """One in-flight computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running wait and receive the same result (or exception).
+    Nothing is kept once the call finishes, so this only merges requests
+    that overlap in time; the response cache handles later repeats.
+
+    A follower waits at most `timeout` seconds (its own budget, which may
+    be shorter than the leader's) and then raises TimeoutError.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.max_followers = 0
+
+    def do(self, key: str, func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.followers += 1
+                self.coalesced += 1
+                self.max_followers = max(self.max_followers, call.followers)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"In-flight call did not finish within {timeout:.1f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Executed vs coalesced call counters"""
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0,
+            "max_followers": self.max_followers,
+            "in_flight": len(self._calls),
+        }
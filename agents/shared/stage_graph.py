@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from agents.shared.deadlines import cancellable
+
+class StageGraph:
+    """Small dependency graph of async pipeline stages.
+
+    Stages are registered with the names of the stages they depend on and
+    are started lazily: awaiting a stage starts it (and any dependencies that
+    are not already running), so independent stages run concurrently and the
+    total latency follows the critical path. Stages can also be started early
+    as speculative work and dropped with cancel() if they turn out not to be
+    needed. Cancelling also flags the stage's blocking work, so LLM calls it
+    has not started yet are skipped rather than run in the executor.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], *deps: str) -> "StageGraph":
+        """Register a stage; func receives the dependency results positionally"""
+        self._stages[name] = (func, deps)
+        return self
+
+    def start(self, *names: str):
+        """Start stages (and their dependencies) without waiting for them"""
+        for name in names:
+            self._task(name)
+
+    async def result(self, name: str) -> Any:
+        """Wait for a stage, starting it if needed"""
+        # Shield so one cancelled consumer does not cancel a shared stage
+        return await asyncio.shield(self._task(name))
+
+    def cancel(self):
+        """Cancel every stage that is still running"""
+        for name, task in self._tasks.items():
+            if not task.done():
+                self._cancel_events[name].set()
+                task.cancel()
+
+    def _task(self, name: str) -> asyncio.Task:
+        if name not in self._tasks:
+            func, deps = self._stages[name]
+            dep_tasks = [self._task(dep) for dep in deps]
+            self._cancel_events[name] = threading.Event()
+            self._tasks[name] = asyncio.ensure_future(self._run(func, dep_tasks, self._cancel_events[name]))
+        return self._tasks[name]
+
+    @staticmethod
+    async def _run(func: Callable[..., Awaitable[Any]], dep_tasks, cancel_event: threading.Event) -> Any:
+        values = [await asyncio.shield(task) for task in dep_tasks]
+        # Each stage runs in its own task context, so the flag stays with it
+        with cancellable(cancel_event):
+            return await func(*values)
@@ -0,0 +1,141 @@
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from agents.shared.metrics import metrics_registry
+
+# Add a Server-Timing header with the per-stage breakdown to every non-streamed response
+STAGE_TIMING_HEADER = os.getenv("STAGE_TIMING_HEADER", "false").lower() == "true"
+
+stage_seconds = metrics_registry.histogram(
+    "ministry_stage_duration_seconds",
+    "Pipeline stage latency by stage, agent and outcome (ok, fallback, exception)",
+    ("stage", "agent", "outcome"),
+)
+stage_tokens = metrics_registry.counter(
+    "ministry_stage_tokens_total",
+    "Estimated LLM tokens per stage (prompt or completion)",
+    ("stage", "agent", "kind"),
+)
+
+class Span:
+    """Timing for one stage call; outcome and token counts fill in as it runs"""
+
+    __slots__ = ("stage", "agent", "outcome", "prompt_tokens", "completion_tokens", "started", "duration")
+
+    def __init__(self, stage: str, agent: str = ""):
+        self.stage = stage
+        self.agent = agent
+        self.outcome = "ok"
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+# Spans finished during the current request, when the timing header is on
+_trace: ContextVar[Optional[List[Span]]] = ContextVar("stage_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("stage_span", default=None)
+# Stages that answered with their fallback inside record_fallbacks()
+_fallbacks: ContextVar[Optional[List[str]]] = ContextVar("stage_fallbacks", default=None)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4 if text else 0
+
+@contextmanager
+def stage_span(stage: str, agent: str = ""):
+    """Time a stage and record it in the metrics and the request trace"""
+    span = Span(stage, agent)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.outcome = "exception"
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # A generator span closed from another context (e.g. garbage collected)
+            pass
+        finish_span(span)
+
+def finish_span(span: Span):
+    span.duration = time.perf_counter() - span.started
+    stage_seconds.observe(span.duration, stage=span.stage, agent=span.agent, outcome=span.outcome)
+    if span.prompt_tokens:
+        stage_tokens.inc(span.prompt_tokens, stage=span.stage, agent=span.agent, kind="prompt")
+    if span.completion_tokens:
+        stage_tokens.inc(span.completion_tokens, stage=span.stage, agent=span.agent, kind="completion")
+    trace = _trace.get()
+    if trace is not None:
+        trace.append(span)
+
+def mark_fallback():
+    """Record that the current stage answered with its fallback"""
+    span = _current_span.get()
+    if span is not None:
+        span.outcome = "fallback"
+    fallbacks = _fallbacks.get()
+    if fallbacks is not None:
+        fallbacks.append(span.stage if span is not None else "unknown")
+
+@contextmanager
+def record_fallbacks():
+    """Collect the stages that answer with their fallback inside the block"""
+    fallbacks: List[str] = []
+    token = _fallbacks.set(fallbacks)
+    try:
+        yield fallbacks
+    finally:
+        _fallbacks.reset(token)
+
+def add_tokens(prompt_tokens: int = 0, completion_tokens: int = 0):
+    """Attribute LLM tokens to the current stage"""
+    span = _current_span.get()
+    if span is not None:
+        span.prompt_tokens += prompt_tokens
+        span.completion_tokens += completion_tokens
+
+def traced(stage: str, agent: str = "") -> Callable:
+    """Decorator wrapping every call of a function (sync, async or generator) in a stage span"""
+    def decorate(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                with stage_span(stage, agent):
+                    yield from func(*args, **kwargs)
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage_span(stage, agent):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_span(stage, agent):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start_trace() -> List[Span]:
+    """Collect the spans of the current request (and tasks it spawns)"""
+    trace: List[Span] = []
+    _trace.set(trace)
+    return trace
+
+def server_timing(trace: List[Span]) -> str:
+    """Spans as a Server-Timing header value"""
+    entries = []
+    for i, span in enumerate(trace):
+        description = f"{span.agent or span.stage} {span.outcome}"
+        if span.prompt_tokens or span.completion_tokens:
+            description += f" {span.prompt_tokens}+{span.completion_tokens} tok"
+        entries.append(f'{span.stage}-{i};dur={span.duration * 1000:.1f};desc="{description}"')
+    return ", ".join(entries)
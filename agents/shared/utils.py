@@ -1,19 +1,132 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from typing import Optional
 
+LOG_FILE = os.getenv("LOG_FILE", "ministry_hub.log")
+
+# Who rotates LOG_FILE: "external" (logrotate or similar; the file is
+# reopened when it is moved, so any number of worker processes can share
+# it) or "size" (rotated in-process at LOG_MAX_BYTES; one process only,
+# since workers rotating the same file lose and duplicate records)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "external").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+# Records waiting for the listener thread; beyond this they are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# How user message bodies appear in logs: truncate, drop or full
+LOG_MESSAGE_BODIES = os.getenv("LOG_MESSAGE_BODIES", "truncate").lower()
+LOG_BODY_MAX_CHARS = int(os.getenv("LOG_BODY_MAX_CHARS", "80"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener without formatting or waiting.
+
+    The stock QueueHandler formats every record in the calling thread;
+    here %-style arguments stay unformatted until the listener writes the
+    record, and a full queue drops the record instead of raising.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+class MessageBody:
+    """A user message in a log line, truncated or dropped per LOG_MESSAGE_BODIES.
+
+    Rendering happens in the listener thread when the record is written.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or ""
+
+    def __str__(self) -> str:
+        if LOG_MESSAGE_BODIES == "full":
+            return self.text
+        if LOG_MESSAGE_BODIES == "drop":
+            return f"[{len(self.text)} chars]"
+        if len(self.text) <= LOG_BODY_MAX_CHARS:
+            return self.text
+        return f"{self.text[:LOG_BODY_MAX_CHARS]}... [{len(self.text)} chars]"
+
+def message_body(text: Optional[str]) -> MessageBody:
+    """Wrap user-supplied text for logging (pass as a %s argument)"""
+    return MessageBody(text)
+
 def setup_logging(level: str = "INFO") -> logging.Logger:
-    """Setup centralized logging for all agents"""
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('ministry_hub.log'),
-            logging.StreamHandler()
-        ]
-    )
+    """Setup centralized logging for all agents.
+
+    The first call routes the root logger through a queue to a listener
+    thread that writes JSON lines to LOG_FILE (see LOG_ROTATION) and plain
+    text to the console, so callers never wait on disk. Later calls just
+    return the shared logger.
+    """
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                if LOG_ROTATION == "size":
+                    file_handler = logging.handlers.RotatingFileHandler(
+                        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+                    )
+                else:
+                    file_handler = logging.handlers.WatchedFileHandler(LOG_FILE, encoding="utf-8")
+                file_handler.setFormatter(JsonLineFormatter())
+                console_handler = logging.StreamHandler()
+                console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+                log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                root = logging.getLogger()
+                root.setLevel(getattr(logging, os.getenv("LOG_LEVEL", level).upper(), logging.INFO))
+                root.addHandler(NonBlockingQueueHandler(log_queue))
+
+                _listener = logging.handlers.QueueListener(
+                    log_queue, file_handler, console_handler, respect_handler_level=True
+                )
+                _listener.start()
+                atexit.register(shutdown_logging)
     return logging.getLogger("MinistryHub")
 
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
 def validate_environment() -> bool:
     """Validate required environment variables"""
     required_vars = ["OPENAI_API_KEY"]
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Component microbenchmarks for the local code paths
+
+Times the pieces of the request path that run without a model:
+faq_tool.get_answer, determine_message_type, the keyword path of
+detect_escalation_swarm, load_impact_stories, and the inbound_agent
+orchestration with every Agent.run() replaced by a deterministic mock
+that sleeps for --latency seconds (0 by default, so only our own overhead
+is measured). Each case reports ops/sec (best of --repeat runs), the peak
+traced memory of a single call and the memory still held after many calls.
+Runs fully offline.
+
+Save a run with --save and check a later one against it with --baseline;
+the exit status is 1 when any case is slower than the baseline by more
+than --tolerance, so the suite can gate a deploy. It is also 1 if a mocked
+agent was built for real (cache and coalescing keys must not need the
+swarms Agent), or if an escalation message is missed by the keyword
+lexicon alone.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_components [--latency 0] [--min-time 0.5] [--repeat 3]
+        [--save results.json] [--baseline results.json] [--tolerance 0.25]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Measure the pipeline itself: no cached agent answers and no log output
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from agents.donation import donation_agents
+from agents.inbound import swarm_agents
+from agents.inbound.inbound_agent import determine_message_type, inbound_agent_async
+from agents.shared.faq_tool import get_answer
+from agents.shared.keyword_engine import escalation_keywords
+from agents.shared.llm_cache import LLMResponseCache
+
+MOCK_AGENTS = [
+    "escalation_agent",
+    "scripture_agent",
+    "tone_agent",
+    "faq_enhancement_agent",
+    "translation_agent",
+    "prayer_routing_agent",
+]
+
+FAQ_QUESTIONS = [
+    "What are your service times?",
+    "how do I give online",
+    "office open hours",
+    "Where can I park on Sunday?",
+    "tell me about the mission trip to the moon",
+]
+
+CLASSIFY_MESSAGES = [
+    "Please pray for my mother, she is in the hospital",
+    "What time does the Sunday service start?",
+    "I need some guidance about my career",
+    "Thank you for the encouraging sermon",
+]
+
+# Each must escalate on the keyword path alone (checked before timing)
+ESCALATION_MESSAGES = [
+    "I feel suicidal and I don't know what to do",
+    "My husband is abusive and hit me again last night",
+    "I want to hurt myself",
+    "This is an emergency, please call me",
+    "I self harmed again last night",
+    "I have self-harmed since I was fifteen",
+    "I was raped last year and never told anyone",
+    "my uncle molested me when I was a child",
+]
+
+INBOUND_MESSAGES = [
+    "What are your service times?",
+    "Could you pray for my family this week?",
+    "I need some guidance about my career.",
+    "Thank you for the encouraging sermon on Sunday.",
+]
+
+def install_mock_agents(latency: float):
+    """Swap every inbound agent's run() for a fixed-latency, fixed-answer mock"""
+    def mock_run(prompt):
+        if latency:
+            time.sleep(latency)
+        return "NORMAL PRAYER_REQUEST Beloved, the Lord is near to the brokenhearted."
+
+    for name in MOCK_AGENTS:
+        getattr(swarm_agents, name).run = mock_run
+
+def cycle(func, inputs):
+    """A zero-argument callable that feeds func the inputs in turn"""
+    state = {"i": 0}
+
+    def call():
+        i = state["i"]
+        state["i"] = i + 1
+        return func(inputs[i % len(inputs)])
+    return call
+
+def benchmark_cases(loop: asyncio.AbstractEventLoop) -> dict:
+    async def orchestrate(message):
+        return await inbound_agent_async(message, "en")
+
+    return {
+        "faq.get_answer": cycle(get_answer, FAQ_QUESTIONS),
+        "determine_message_type": cycle(determine_message_type, CLASSIFY_MESSAGES),
+        "escalation.keyword_path": cycle(swarm_agents.detect_escalation_swarm, ESCALATION_MESSAGES),
+        "load_impact_stories": lambda: donation_agents.load_impact_stories(),
+        "inbound_agent.orchestration": cycle(lambda m: loop.run_until_complete(orchestrate(m)), INBOUND_MESSAGES),
+    }
+
+def ops_per_second(call, min_time: float, repeat: int) -> float:
+    """Best rate over `repeat` runs of at least min_time seconds each"""
+    # Calibrate the batch size so timer overhead stays negligible
+    batch = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(batch):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or batch >= 1 << 20:
+            break
+        batch *= 2
+
+    best = 0.0
+    for _ in range(repeat):
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                call()
+            ops += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, ops / elapsed)
+    return best
+
+def memory_profile(call, iterations: int = 200) -> tuple:
+    """(peak bytes during one call, bytes still held per call after many)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        peak -= before
+
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            call()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, max(after - before, 0) / iterations
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list:
+    """Cases whose throughput dropped more than `tolerance` below the baseline"""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and result["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            regressions.append((name, previous["ops_per_sec"], result["ops_per_sec"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Component microbenchmarks")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock agent latency per call (seconds)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed throughput drop vs the baseline")
+    args = parser.parse_args()
+
+    missed = [message for message in ESCALATION_MESSAGES if not escalation_keywords(message)]
+    for message in missed:
+        print(f"MISSED by the escalation keywords: {message!r}")
+
+    install_mock_agents(args.latency)
+    for name in MOCK_AGENTS:
+        LLMResponseCache.make_key(getattr(swarm_agents, name), "key check")
+    loop = asyncio.new_event_loop()
+    cases = benchmark_cases(loop)
+    if args.only:
+        cases = {name: call for name, call in cases.items() if args.only in name}
+
+    print(f"Mock agent latency: {args.latency * 1000:.1f} ms/call, Python {sys.version.split()[0]}")
+    print(f"{'case':>28} {'ops/sec':>12} {'us/op':>10} {'peak KiB':>10} {'held B/op':>10}")
+    results = {}
+    try:
+        for name, call in cases.items():
+            call()  # warm lazy indexes, agents and caches outside the timings
+            rate = ops_per_second(call, args.min_time, args.repeat)
+            peak, held = memory_profile(call, iterations=50 if "orchestration" in name else 200)
+            results[name] = {"ops_per_sec": rate, "peak_bytes": peak, "held_bytes_per_op": held}
+            print(f"{name:>28} {rate:>12,.0f} {1e6 / rate:>10.1f} {peak / 1024:>10.1f} {held:>10.1f}")
+    finally:
+        loop.close()
+
+    built = [name for name in MOCK_AGENTS if getattr(swarm_agents, name).built]
+    if built:
+        print(f"\nBUILT mocked agents (a key or call path touched the real Agent): {', '.join(built)}")
+    if built or missed:
+        sys.exit(1)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"latency": args.latency, "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:,.0f} -> {after:,.0f} ops/sec")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo case slower than {args.baseline} by more than {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
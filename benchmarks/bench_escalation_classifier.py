@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local escalation classifier: recall, LLM avoidance and latency
+
+Trains the classifier from data/escalation_training.jsonl and scores the
+held-out messages in data/escalation_testset.jsonl. Reports how many
+messages are decided locally (no LLM call), the escalation recall of the
+local path (an escalation is only missed when it falls below the lower
+bound, since the band goes to the LLM) and false alarms above the upper
+bound, then the time per message scored one at a time and in batches.
+
+A second held-out set, data/escalation_crisis_holdout.jsonl, holds short,
+implicit crisis messages ("I was raped", "he beats me") that never appear
+in the training data. Each should escalate locally, without waiting on
+the LLM.
+
+Exits with status 1 when escalation recall on either set is below
+--min-recall, or when fewer than --min-crisis-local of the crisis
+messages reach the auto-escalate bound, so a change to the training data
+or thresholds cannot silently weaken the safety check.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_escalation_classifier [--min-recall 1.0] [--min-crisis-local 0.9]
+        [--batch 10000] [--show-band]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from agents.shared.escalation_classifier import (
+    ESCALATION_LOCAL_HIGH,
+    ESCALATION_LOCAL_LOW,
+    load_escalation_classifier,
+)
+
+TESTSET_PATH = os.path.join("data", "escalation_testset.jsonl")
+CRISIS_HOLDOUT_PATH = os.path.join("data", "escalation_crisis_holdout.jsonl")
+
+def load_testset(path: str = TESTSET_PATH) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalation classifier benchmark")
+    parser.add_argument("--min-recall", type=float, default=1.0, help="Required escalation recall on the test set")
+    parser.add_argument("--min-crisis-local", type=float, default=0.9,
+                        help="Required share of crisis hold-out messages escalated without the LLM")
+    parser.add_argument("--batch", type=int, default=10000, help="Messages per batch-scoring run")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per single-message timing")
+    parser.add_argument("--show-band", action="store_true", help="Print the messages left to the LLM")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = load_escalation_classifier()
+    print(f"Trained in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"band: LLM decides {ESCALATION_LOCAL_LOW:.2f} < p < {ESCALATION_LOCAL_HIGH:.2f}")
+
+    testset = load_testset()
+    texts = [item["text"] for item in testset]
+    labels = np.asarray([bool(item["escalate"]) for item in testset])
+    probabilities = classifier.probabilities(texts)
+    escalate = probabilities >= ESCALATION_LOCAL_HIGH
+    normal = probabilities <= ESCALATION_LOCAL_LOW
+    band = ~(escalate | normal)
+
+    missed = int((normal & labels).sum())
+    recall = 1 - missed / max(int(labels.sum()), 1)
+    print(f"\n{'messages':>10} {'local':>8} {'to LLM':>8} {'recall':>8} {'missed':>8} {'false alarms':>13}")
+    print(f"{len(texts):>10} {1 - band.mean():>8.0%} {band.mean():>8.0%} {recall:>8.1%} {missed:>8} "
+          f"{int((escalate & ~labels).sum()):>13}")
+
+    for text, probability, label in zip(texts, probabilities, labels):
+        if (probability <= ESCALATION_LOCAL_LOW and label) or (probability >= ESCALATION_LOCAL_HIGH and not label):
+            print(f"  WRONG LOCAL DECISION p={probability:.2f} escalate={label}: {text}")
+        elif args.show_band and ESCALATION_LOCAL_LOW < probability < ESCALATION_LOCAL_HIGH:
+            print(f"  band p={probability:.2f} escalate={label}: {text}")
+
+    crisis = [item["text"] for item in load_testset(CRISIS_HOLDOUT_PATH)]
+    crisis_probabilities = classifier.probabilities(crisis)
+    crisis_local = float((crisis_probabilities >= ESCALATION_LOCAL_HIGH).mean())
+    crisis_recall = 1 - float((crisis_probabilities <= ESCALATION_LOCAL_LOW).mean())
+    print(f"\nCrisis hold-out: {len(crisis)} messages, {crisis_local:.0%} escalated locally, "
+          f"recall {crisis_recall:.1%}")
+    for text, probability in zip(crisis, crisis_probabilities):
+        if probability < ESCALATION_LOCAL_HIGH:
+            print(f"  {'MISSED' if probability <= ESCALATION_LOCAL_LOW else 'to LLM'} p={probability:.2f}: {text}")
+
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        classifier.probabilities([texts[i % len(texts)]])
+    single = (time.perf_counter() - start) / args.iterations * 1e6
+
+    bulk = (texts * (args.batch // len(texts) + 1))[:args.batch]
+    start = time.perf_counter()
+    classifier.probabilities(bulk)
+    batched = (time.perf_counter() - start) / len(bulk) * 1e6
+    print(f"\n{'mode':>8} {'us/msg':>10}")
+    print(f"{'single':>8} {single:>10.1f}")
+    print(f"{'batch':>8} {batched:>10.1f}  ({len(bulk)} messages)")
+
+    failures = []
+    if recall < args.min_recall:
+        failures.append(f"escalation recall {recall:.1%} is below {args.min_recall:.1%}")
+    if crisis_recall < args.min_recall:
+        failures.append(f"crisis hold-out recall {crisis_recall:.1%} is below {args.min_recall:.1%}")
+    if crisis_local < args.min_crisis_local:
+        failures.append(f"{crisis_local:.0%} of the crisis hold-out escalated locally, "
+                        f"below {args.min_crisis_local:.0%}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+FAQ lookup latency benchmark
+
+Measures keyword and semantic FAQ retrieval latency, single and batched,
+on the shipped FAQ data and on synthetic corpora of increasing size.
+Runs fully offline.
+
+Also checks answer quality on the shipped data in hybrid mode (the
+default): recall on rephrased questions, and false matches on pastoral
+questions that no FAQ answers. A wrong FAQ hit is sent without an LLM
+call, so the run exits with status 1 on any false match or when recall
+is below --min-recall.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_faq_lookup [--iterations 2000] [--min-recall 1.0]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from agents.shared.faq_tool import FAQIndex, load_faq_data, search_faqs_batch
+from agents.shared.faq_embeddings import SemanticFAQIndex
+
+QUERIES = [
+    "What are your service times?",
+    "who leads the church",
+    "office open hours",
+    "how to tithe online",
+    "small groups near me",
+    "I feel sad today and need someone to talk to",
+]
+
+# Rephrased questions and a phrase the right answer contains
+MATCHES = [
+    ("what time is church on sunday", ("9:00 AM", "10:00 AM")),
+    ("can I donate online", ("online",)),
+    ("I would like to make a donation", ("donate", "give")),
+    ("where are you located", ("123 ",)),
+    ("who is your pastor", ("Dr. Myles",)),
+    ("the pastor's name", ("Dr. Myles",)),
+    ("how can I reach the church office", ("(555) 123-4567",)),
+    ("office open hours", ("9 AM to 5 PM",)),
+    ("how do I find a small group", ("small group",)),
+    ("i want to sing in the choir", ("choir",)),
+    ("tell me about the youth ministry", ("youth ministry",)),
+    ("how do i get baptised", ("baptized",)),
+]
+
+# Questions no FAQ answers; several share character trigrams with one
+# ("forgive" contains "give")
+OFF_TOPIC = [
+    "How do I forgive my father?",
+    "how do I forgive myself",
+    "forgiveness",
+    "How can I find peace",
+    "I feel sad today and need someone to talk to",
+    "my marriage is falling apart",
+    "what does the bible say about anxiety",
+    "I need guidance about my career",
+    "how can I grow in faith",
+    "I lost my job",
+    "how do I deal with grief",
+    "what is the meaning of life",
+    "I am struggling with addiction",
+    "how can I be a better father",
+    "how do I overcome fear",
+    "how do I find my purpose",
+    "how can I serve others",
+    "how to read the bible daily",
+]
+
+WORDS = (
+    "service worship choir youth seniors parking baptism tithe giving online "
+    "office hours pastor prayer group bible study volunteer missions outreach "
+    "wedding funeral counseling membership class retreat conference nursery"
+).split()
+
+def synthetic_faqs(size: int, seed: int = 7) -> list:
+    """FAQ entries with random topic keywords for scaling runs"""
+    rng = random.Random(seed)
+    faqs = []
+    for i in range(size):
+        keywords = rng.sample(WORDS, 4) + [f"topic{i}"]
+        faqs.append({
+            "keywords": keywords,
+            "question": f"How does {' '.join(keywords[:3])} work?",
+            "answer": f"Answer {i} about {' and '.join(keywords)}."
+        })
+    return faqs
+
+def time_per_call(func, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def report(label: str, faqs: list, iterations: int):
+    keyword_index = FAQIndex(faqs)
+    semantic_index = SemanticFAQIndex(faqs)
+
+    keyword_us = time_per_call(lambda i: keyword_index.search(QUERIES[i % len(QUERIES)]), iterations)
+    semantic_us = time_per_call(lambda i: semantic_index.search(QUERIES[i % len(QUERIES)]), iterations)
+
+    batch_iterations = max(iterations // 20, 1)
+    batch = QUERIES * 10
+    batch_us = time_per_call(lambda i: semantic_index.search_batch(batch), batch_iterations) / len(batch)
+
+    print(f"{label:>16} {len(faqs):>8} {keyword_us:>12.1f} {semantic_us:>14.1f} {batch_us:>16.1f}")
+
+def check_quality(min_recall: float) -> bool:
+    """Recall and false matches on the shipped data; prints misses, returns whether it passed"""
+    answers = search_faqs_batch([q for q, _ in MATCHES], limit=1, mode="hybrid")
+    missed = [q for (q, expected), matches in zip(MATCHES, answers)
+              if not matches or not any(e in matches[0][1].get("answer", "") for e in expected)]
+    answers = search_faqs_batch(OFF_TOPIC, limit=1, mode="hybrid")
+    false_matches = [(q, matches[0]) for q, matches in zip(OFF_TOPIC, answers) if matches]
+
+    recall = 1 - len(missed) / len(MATCHES)
+    print(f"\n{'rephrased':>10} {'recall':>8} {'off-topic':>10} {'false matches':>14}")
+    print(f"{len(MATCHES):>10} {recall:>8.0%} {len(OFF_TOPIC):>10} {len(false_matches):>14}")
+    for question in missed:
+        print(f"  missed: {question!r}")
+    for question, (score, faq) in false_matches:
+        print(f"  false match: {question!r} -> {faq.get('question')!r} ({score:.2f})")
+
+    passed = True
+    if recall < min_recall:
+        print(f"\nFAIL: FAQ recall {recall:.0%} is below {min_recall:.0%}")
+        passed = False
+    if false_matches:
+        print(f"\nFAIL: {len(false_matches)} off-topic questions matched an FAQ")
+        passed = False
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ lookup latency benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Lookups per measurement")
+    parser.add_argument("--min-recall", type=float, default=1.0, help="Required recall on the rephrased questions")
+    args = parser.parse_args()
+
+    print(f"{'corpus':>16} {'entries':>8} {'keyword us':>12} {'semantic us':>14} {'batched us/q':>16}")
+    report("shipped data", load_faq_data()["faqs"], args.iterations)
+    for size in (100, 1000, 5000):
+        report("synthetic", synthetic_faqs(size), max(args.iterations // (size // 100), 50))
+
+    if not check_quality(args.min_recall):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Inbound pipeline concurrency benchmark
+
+Replaces every swarms Agent.run() with a stub backend that sleeps for a fixed
+latency, then pushes batches of messages through inbound_agent_async at
+increasing concurrency. With a non-blocking pipeline, throughput should scale
+roughly linearly until LLM_MAX_CONCURRENCY is reached.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inbound_concurrency [--latency 0.05] [--messages 64]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+# Measure backend concurrency, not cache hits; the stub backend has no
+# server-side limit, so lift the per-backend cap as well
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LLM_BACKEND_MAX_CONCURRENCY", "64")
+
+from agents.inbound import swarm_agents
+from agents.inbound.inbound_agent import inbound_agent_async
+from agents.shared.agent_runtime import LLM_MAX_CONCURRENCY
+
+STUB_AGENTS = [
+    "escalation_agent",
+    "scripture_agent",
+    "tone_agent",
+    "faq_enhancement_agent",
+    "translation_agent",
+    "prayer_routing_agent",
+]
+
+MESSAGES = [
+    "What are your service times?",
+    "Could you pray for my family this week?",
+    "I need some guidance about my career.",
+    "Thank you for the encouraging sermon on Sunday.",
+]
+
+def install_stub_backend(latency: float):
+    """Swap every agent's run() for a fixed-latency stub"""
+    def stub_run(prompt):
+        time.sleep(latency)
+        return "NORMAL PRAYER_REQUEST stub response"
+
+    for name in STUB_AGENTS:
+        getattr(swarm_agents, name).run = stub_run
+
+async def run_batch(total: int, concurrency: int) -> float:
+    """Process `total` messages with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        async with semaphore:
+            await inbound_agent_async(MESSAGES[i % len(MESSAGES)], "en")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(total)))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Inbound pipeline concurrency benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub backend latency per call (seconds)")
+    parser.add_argument("--messages", type=int, default=64, help="Messages per concurrency level")
+    args = parser.parse_args()
+
+    install_stub_backend(args.latency)
+
+    print(f"Stub latency: {args.latency * 1000:.0f} ms/call, LLM_MAX_CONCURRENCY={LLM_MAX_CONCURRENCY}")
+    print(f"{'concurrency':>12} {'seconds':>10} {'msgs/sec':>10} {'speedup':>10}")
+
+    baseline = None
+    for concurrency in (1, 2, 4, 8, 16, 32):
+        elapsed = asyncio.run(run_batch(args.messages, concurrency))
+        throughput = args.messages / elapsed
+        baseline = baseline or throughput
+        print(f"{concurrency:>12} {elapsed:>10.2f} {throughput:>10.1f} {throughput / baseline:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
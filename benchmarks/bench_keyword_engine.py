@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Keyword engine microbenchmark
+
+Compares the compiled single-pass keyword engine against the previous
+approach (lowercase + one substring scan per keyword, per category) on
+short messages and long email-sized inputs.
+
+First checks that whole-word matching still flags the inflected
+escalation terms the old substring scan caught ("my abuser", "suicides");
+the exit status is 1 if any is missed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_keyword_engine [--iterations 2000]
+"""
+
+import argparse
+import sys
+import time
+
+from agents.shared.keyword_engine import keyword_engine, load_lexicons, INTENT_PRIORITY
+
+LEXICONS = load_lexicons()
+
+SHORT_MESSAGE = "Hi, could you tell me more about the youth program on Wednesdays?"
+
+EMAIL_PARAGRAPH = (
+    "Dear ministry team, I am writing on behalf of my family after attending the "
+    "Sunday service last week. The sermon about stewardship really stayed with us "
+    "and we have been talking about it at dinner ever since. Our daughter is "
+    "starting university in the fall and we are trying to work out a plan for "
+    "staying connected to a church community while she is away. "
+)
+
+# Must escalate on the keyword path alone, without the classifier or LLM
+INFLECTED_ESCALATIONS = [
+    "my abuser hit me again",
+    "he abuses me when he drinks",
+    "two suicides in our town this month",
+    "she threatens me every night",
+    "I keep hurting myself",
+    "I have been thinking about killing myself",
+    "I am self-harming again",
+    "we have had so many emergencies",
+]
+
+def legacy_scan(text: str) -> dict:
+    """The original approach: repeated substring tests per category"""
+    matches = {}
+    for category, phrases in LEXICONS.items():
+        message_lower = text.lower()
+        found = [phrase for phrase in phrases if phrase in message_lower]
+        if found:
+            matches[category] = found
+    return matches
+
+def legacy_classify(text: str) -> tuple:
+    matches = legacy_scan(text)
+    intent = next((i for i in INTENT_PRIORITY if i in matches), "default")
+    return "escalation" in matches, intent
+
+def engine_classify(text: str) -> tuple:
+    matches = keyword_engine.scan(text)
+    intent = next((i for i in INTENT_PRIORITY if i in matches), "default")
+    return "escalation" in matches, intent
+
+def time_per_call(func, text: str, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword engine microbenchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    missed = [text for text in INFLECTED_ESCALATIONS if not engine_classify(text)[0]]
+    for text in missed:
+        print(f"MISSED escalation: {text!r}")
+    if missed:
+        sys.exit(1)
+    print(f"All {len(INFLECTED_ESCALATIONS)} inflected escalation messages flagged\n")
+
+    inputs = [
+        ("short message", SHORT_MESSAGE),
+        ("email 2 KB", EMAIL_PARAGRAPH * 5),
+        ("email 10 KB", EMAIL_PARAGRAPH * 25),
+        ("email 50 KB", EMAIL_PARAGRAPH * 125),
+    ]
+
+    print(f"{'input':>14} {'bytes':>8} {'legacy us':>12} {'compiled us':>12} {'compiled MB/s':>14}")
+    for label, text in inputs:
+        iterations = max(args.iterations * len(SHORT_MESSAGE) // len(text), 20)
+        legacy_us = time_per_call(legacy_classify, text, iterations)
+        engine_us = time_per_call(engine_classify, text, iterations)
+        throughput = len(text) / engine_us
+        print(f"{label:>14} {len(text):>8} {legacy_us:>12.1f} {engine_us:>12.1f} {throughput:>14.1f}")
+
+if __name__ == "__main__":
+    main()
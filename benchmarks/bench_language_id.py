@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Language identification accuracy and latency
+
+Scores the offline character n-gram identifier against the labelled
+messages in data/language_id_testset.jsonl (held out from the training
+samples) and reports per-language accuracy, how often resolve_language
+picks the right code when the client sends none or the widget default
+"en", and the time per call for short messages and long emails.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_language_id [--iterations 2000] [--show-errors]
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+from agents.shared.language_id import detect_language, load_language_identifier, resolve_language
+
+TESTSET_PATH = os.path.join("data", "language_id_testset.jsonl")
+
+def load_testset(path: str = TESTSET_PATH) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def time_per_call(text: str, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        resolve_language(text, "en")
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Language identification benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per latency measurement")
+    parser.add_argument("--show-errors", action="store_true", help="Print misresolved messages")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    load_language_identifier()
+    print(f"Profiles built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    testset = load_testset()
+    totals, detected, resolved_none, resolved_en = (defaultdict(int) for _ in range(4))
+    errors = []
+    for item in testset:
+        expected = item["language"]
+        guess = detect_language(item["text"])
+        totals[expected] += 1
+        detected[expected] += bool(guess and guess.language == expected)
+        for claimed, counts in ((None, resolved_none), ("en", resolved_en)):
+            resolved = resolve_language(item["text"], claimed)
+            counts[expected] += resolved == expected
+            if resolved != expected:
+                errors.append((item["text"], expected, claimed, resolved))
+
+    print(f"\n{'language':>9} {'messages':>9} {'detected':>9} {'no code':>9} {'code en':>9}")
+    for lang in sorted(totals):
+        print(f"{lang:>9} {totals[lang]:>9} {detected[lang] / totals[lang]:>9.1%} "
+              f"{resolved_none[lang] / totals[lang]:>9.1%} {resolved_en[lang] / totals[lang]:>9.1%}")
+    total = sum(totals.values())
+    print(f"{'all':>9} {total:>9} {sum(detected.values()) / total:>9.1%} "
+          f"{sum(resolved_none.values()) / total:>9.1%} {sum(resolved_en.values()) / total:>9.1%}")
+
+    if args.show_errors:
+        for text, expected, claimed, resolved in errors:
+            print(f"  expected {expected}, client sent {claimed}, resolved {resolved}: {text}")
+
+    short = testset[0]["text"]
+    email = " ".join(item["text"] for item in testset if item["language"] == "pt") * 4
+    print(f"\n{'input':>14} {'chars':>8} {'us/call':>10}")
+    for label, text in (("short message", short), ("long email", email)):
+        print(f"{label:>14} {len(text):>8} {time_per_call(text, args.iterations):>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+LLM response cache: backends, Redis fallback and hit latency
+
+Runs the Redis backend against a dict-backed stand-in for the redis client
+(get/setex/scan_iter/delete/dbsize/ping, with SETEX expiry on a clock the
+benchmark advances) and checks:
+
+- a stored response reads back (as text, though the client returns bytes)
+- entries expire after LLM_CACHE_TTL_SECONDS
+- the entry count comes from DBSIZE, without scanning keys
+- clear() removes only the cache's own keys
+- LLM_CACHE_BACKEND=redis falls back to the in-memory cache when the
+  server does not answer PING
+
+then times get_or_compute hits and misses on both backends. The exit
+status is 1 if any check fails. Runs fully offline.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_llm_cache [--iterations 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import types
+
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from agents.shared import llm_cache
+from agents.shared.llm_cache import InMemoryCacheBackend, LLMResponseCache, RedisCacheBackend
+
+class FakeRedis:
+    """The subset of redis.Redis the cache uses, over a dict"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.data = {}
+        self.scans = 0
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None or entry[0] <= self.now:
+            self.data.pop(key, None)
+            return None
+        return entry[1]
+
+    def setex(self, key, seconds, value):
+        self.data[key] = (self.now + seconds, value.encode("utf-8"))
+
+    def scan_iter(self, match="*"):
+        self.scans += 1
+        prefix = match.rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def dbsize(self):
+        return len(self.data)
+
+    def ping(self):
+        return True
+
+class Agent:
+    agent_name = "BenchAgent"
+    model_name = "bench-model"
+    llm_backend = "default"
+    system_prompt = "You are a benchmark."
+
+def check_redis_backend() -> list:
+    """Failed checks of the Redis backend against the stand-in"""
+    failures = []
+    client = FakeRedis()
+    cache = LLMResponseCache(RedisCacheBackend(client, ttl_seconds=60))
+    agent = Agent()
+
+    first = cache.get_or_compute(agent, "What are your service times?", lambda: "Sundays at 10")
+    again = cache.get_or_compute(agent, "What are your  service times?", lambda: "recomputed")
+    if first != "Sundays at 10" or again != "Sundays at 10":
+        failures.append(f"get/setex: expected the cached reply, got {again!r}")
+
+    client.data["other:key"] = (float("inf"), b"not ours")
+    stats = cache.stats()
+    if stats["entries"] != 2 or client.scans:
+        failures.append(f"len: expected 2 entries from DBSIZE without a scan, got {stats['entries']} "
+                        f"with {client.scans} scans")
+
+    client.now += 61
+    expired = cache.get_or_compute(agent, "What are your service times?", lambda: "recomputed")
+    if expired != "recomputed":
+        failures.append(f"TTL: entry still served after its TTL ({expired!r})")
+
+    cache.clear()
+    if list(client.data) != ["other:key"]:
+        failures.append(f"clear: expected only other:key left, got {sorted(client.data)}")
+    return failures
+
+def check_redis_fallback() -> list:
+    """An unreachable server must select the in-memory cache at startup"""
+    class UnreachableRedis(FakeRedis):
+        def __init__(self, **settings):
+            super().__init__()
+
+        def ping(self):
+            raise ConnectionError("Connection refused")
+
+    saved_module, saved_backend = sys.modules.get("redis"), os.environ.get("LLM_CACHE_BACKEND")
+    sys.modules["redis"] = types.SimpleNamespace(Redis=UnreachableRedis)
+    os.environ["LLM_CACHE_BACKEND"] = "redis"
+    try:
+        cache = llm_cache.create_llm_cache()
+    finally:
+        if saved_module is None:
+            sys.modules.pop("redis", None)
+        else:
+            sys.modules["redis"] = saved_module
+        if saved_backend is None:
+            os.environ.pop("LLM_CACHE_BACKEND", None)
+        else:
+            os.environ["LLM_CACHE_BACKEND"] = saved_backend
+    backend = type(cache.backend).__name__ if cache else None
+    if backend != "InMemoryCacheBackend":
+        return [f"fallback: unreachable Redis gave {backend}, expected InMemoryCacheBackend"]
+    return []
+
+def time_per_call(func, iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def report(label: str, backend, iterations: int):
+    cache = LLMResponseCache(backend)
+    agent = Agent()
+    prompts = [f"Prompt number {i} about the service times" for i in range(iterations)]
+    miss_us = time_per_call(lambda i: cache.get_or_compute(agent, prompts[i], lambda: "reply"), iterations)
+    hit_us = time_per_call(lambda i: cache.get_or_compute(agent, prompts[i], lambda: "reply"), iterations)
+    print(f"{label:>10} {miss_us:>10.1f} {hit_us:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM response cache benchmark")
+    parser.add_argument("--iterations", type=int, default=20000, help="Lookups per measurement")
+    args = parser.parse_args()
+
+    failures = check_redis_backend() + check_redis_fallback()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"Redis backend checks: {5 - len(failures)}/5 passed\n")
+
+    print(f"{'backend':>10} {'miss us':>10} {'hit us':>10}")
+    report("memory", InMemoryCacheBackend(max_entries=args.iterations), args.iterations)
+    report("redis*", RedisCacheBackend(FakeRedis()), args.iterations)
+    print("* dict-backed stand-in: measures the backend code, not a Redis round trip")
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
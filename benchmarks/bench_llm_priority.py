@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Safety traffic under a burst of bulk generation
+
+Replaces every swarms Agent.run() with a stub that sleeps for a fixed
+latency, caps the backend at --slots concurrent calls, then submits a burst
+of impact-story requests (bulk), a few donation questions (interactive) and,
+while the burst is queued, one escalation check that the keyword list and
+local classifier leave to the LLM (critical). Runs the scenario with
+priority scheduling off (first come, first served) and on, and reports how
+long each class waited.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_llm_priority [--latency 0.1] [--bulk 40] [--slots 2]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+# Every call must reach the stub backend: no cache, no coalescing, and an
+# escalation check the local classifier does not decide
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LLM_COALESCE", "false")
+os.environ.setdefault("ESCALATION_CLASSIFIER", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from agents.donation import donation_agents
+from agents.donation.donation_agents import answer_donation_question, generate_impact_story
+from agents.inbound import swarm_agents
+from agents.inbound.swarm_agents import detect_escalation_swarm
+from agents.shared import llm_scheduler
+from agents.shared.agent_runtime import run_blocking
+from agents.shared.llm_registry import llm_registry
+from agents.shared.llm_scheduler import PriorityScheduler
+
+CRISIS_MESSAGE = "I don't think I can keep living like this"
+
+def install_stub_backend(latency: float):
+    """Swap every agent's run() for a fixed-latency stub"""
+    def stub_run(prompt):
+        time.sleep(latency)
+        return "NORMAL stub response"
+
+    for module in (swarm_agents, donation_agents):
+        for name, value in vars(module).items():
+            if name.endswith("_agent") and hasattr(value, "agent_name"):
+                value.run = stub_run
+
+async def timed(func, *args) -> float:
+    start = time.perf_counter()
+    await run_blocking(func, *args)
+    return time.perf_counter() - start
+
+async def scenario(bulk: int, interactive: int, head_start: float) -> dict:
+    bulk_tasks = [asyncio.create_task(timed(generate_impact_story, "youth", f"segment-{i}")) for i in range(bulk)]
+    interactive_tasks = [asyncio.create_task(timed(answer_donation_question, f"Is gift {i} tax deductible?"))
+                         for i in range(interactive)]
+    # Let the burst fill the queue before the crisis message arrives
+    await asyncio.sleep(head_start)
+    critical = await timed(detect_escalation_swarm, CRISIS_MESSAGE)
+    return {
+        "critical": critical,
+        "interactive": max(await asyncio.gather(*interactive_tasks)),
+        "bulk": max(await asyncio.gather(*bulk_tasks)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Priority scheduling benchmark")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub backend latency per call (seconds)")
+    parser.add_argument("--bulk", type=int, default=40, help="Impact-story requests in the burst")
+    parser.add_argument("--interactive", type=int, default=4, help="Donation questions during the burst")
+    parser.add_argument("--slots", type=int, default=2, help="Backend concurrency cap")
+    args = parser.parse_args()
+
+    install_stub_backend(args.latency)
+    backend = llm_registry.get("default")
+    backend.max_concurrency = args.slots
+
+    print(f"Stub latency: {args.latency * 1000:.0f} ms/call, {args.slots} backend slots, "
+          f"{args.bulk} bulk + {args.interactive} interactive calls, then 1 critical")
+    print(f"{'scheduling':>12} {'critical s':>11} {'interactive s':>14} {'bulk done s':>12}  wait ms (avg/max) by class")
+    for enabled in (False, True):
+        llm_scheduler.LLM_PRIORITY_SCHEDULING = enabled
+        backend.scheduler = PriorityScheduler(args.slots, name=backend.name)
+        result = asyncio.run(scenario(args.bulk, args.interactive, head_start=args.latency / 2))
+        waits = ", ".join(
+            f"{name} {c['avg_wait_ms']:.0f}/{c['max_wait_ms']:.0f}"
+            for name, c in backend.scheduler.stats().items() if c["admitted"]
+        )
+        print(f"{'priority' if enabled else 'fifo':>12} {result['critical']:>11.2f} {result['interactive']:>14.2f} "
+              f"{result['bulk']:>12.2f}  {waits}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Inbound latency and backend load when the model server misbehaves
+
+Starts a local fake of the OpenAI chat completions endpoint whose replies
+can be delayed, hung or turned into HTTP 500s, and points every agent's
+run() at it over HTTP. Then checks, against that server:
+
+- hung backend: inbound messages with per-agent timeouts, the request
+  deadline and the circuit breaker off (each call waits for the HTTP
+  client's own timeout) and on; a second wave shows the open circuit
+  answering from local fallbacks without touching the server. The
+  protected run is repeated with agent timeouts above the deadline (as
+  with the defaults, 60s against 45s), where the deadline cuts every call
+  short and the circuit must still open
+- erroring backend: how many requests still reach a server that answers
+  500, with the breaker off and on, and that the circuit closes again once
+  the server recovers and the cooldown has passed
+- tail latency: escalation checks against a server that is slow on a
+  fraction of requests, with hedging off and on
+
+Usage (from the repository root):
+    python -m benchmarks.bench_llm_resilience [--messages 12] [--hang 5] [--tail-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Every call must reach the fake server: no cache, no coalescing, and
+# escalation checks the local classifier does not decide
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LLM_COALESCE", "false")
+os.environ.setdefault("ESCALATION_CLASSIFIER", "false")
+os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+
+import httpx
+
+from agents.inbound import swarm_agents
+from agents.inbound.inbound_agent import inbound_agent_async
+from agents.inbound.swarm_agents import detect_escalation_swarm
+from agents.shared import agent_runtime, circuit_breaker
+from agents.shared.agent_runtime import run_blocking
+from agents.shared.circuit_breaker import CLOSED, CircuitBreaker
+from agents.shared.llm_registry import llm_registry
+
+MESSAGES = [
+    "What are your service times?",
+    "I need some guidance about my career.",
+    "How can I join the worship team?",
+    "Tell me about the youth ministry.",
+]
+
+# Canned replies by agent, so each stage can parse what it gets
+REPLIES = {
+    "EscalationDetector": "NORMAL",
+    "PrayerDeliveranceAssistant": "NOT_PRAYER",
+}
+
+class FakeModelServer:
+    """OpenAI-style /v1/chat/completions with injectable delays and errors"""
+
+    def __init__(self):
+        self.mode = "ok"            # ok, hang or error
+        self.delay = 0.0            # seconds per reply in "ok" mode
+        self.hang = 5.0             # seconds a hung request is held
+        self.tail_rate = 0.0        # fraction of "ok" replies that take tail_delay
+        self.tail_delay = 0.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(7)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with server._lock:
+                    server.requests += 1
+                    slow = server._random.random() < server.tail_rate
+                if server.mode == "hang":
+                    time.sleep(server.hang)
+                elif server.mode == "error":
+                    self.send_error(500, "injected failure")
+                    return
+                else:
+                    time.sleep(server.tail_delay if slow else server.delay)
+                reply = json.dumps({
+                    "object": "chat.completion",
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                        "role": "assistant",
+                        "content": REPLIES.get(body.get("model"), "A reply from the fake model server."),
+                    }}],
+                }).encode("utf-8")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(reply)))
+                    self.end_headers()
+                    self.wfile.write(reply)
+                except OSError:
+                    # The client gave up on a hung request
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def set(self, **settings):
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self.requests = 0
+
+def install_http_agents(server: FakeModelServer, http_timeout: float) -> list:
+    """Point every inbound agent's run() at the fake server; returns the agents"""
+    client = httpx.Client(timeout=http_timeout, limits=httpx.Limits(max_connections=64))
+    agents = []
+    for name, value in vars(swarm_agents).items():
+        if name.endswith("_agent") and hasattr(value, "agent_name"):
+            def run(prompt, agent=value):
+                response = client.post(server.url, json={
+                    "model": agent.agent_name,
+                    "messages": [{"role": "system", "content": agent.system_prompt or ""},
+                                 {"role": "user", "content": prompt}],
+                })
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"]
+            value.run = run
+            agents.append(value)
+    return agents
+
+def protect(agents: list, enabled: bool, agent_timeout: float, failures: int, cooldown: float):
+    """Turn timeouts and the circuit breaker on or off, with a fresh circuit"""
+    circuit_breaker.LLM_CIRCUIT_BREAKER = enabled
+    for agent in agents:
+        agent.call_timeout = agent_timeout if enabled else 1e6
+    backend = llm_registry.get("default")
+    backend.breaker = CircuitBreaker(backend.name, failures=failures, cooldown=cooldown)
+    return backend.breaker
+
+async def timed_message(message: str, deadline_seconds) -> float:
+    start = time.perf_counter()
+    await inbound_agent_async(message, "en", deadline_seconds=deadline_seconds)
+    return time.perf_counter() - start
+
+async def wave(count: int, deadline_seconds) -> list:
+    return await asyncio.gather(*(timed_message(MESSAGES[i % len(MESSAGES)], deadline_seconds)
+                                  for i in range(count)))
+
+async def timed_escalation(message: str) -> float:
+    start = time.perf_counter()
+    await run_blocking(detect_escalation_swarm, message)
+    return time.perf_counter() - start
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def report(label: str, latencies: list, server: FakeModelServer, breaker: CircuitBreaker):
+    print(f"{label:<28} {statistics.median(latencies) * 1000:>8.0f} {max(latencies) * 1000:>8.0f} "
+          f"{server.requests:>9} {breaker.state:>10}")
+
+async def run(args):
+    server = FakeModelServer()
+    agents = install_http_agents(server, args.http_timeout)
+    llm_registry.get("default").max_concurrency = args.slots
+    header = f"{'':<28} {'p50 ms':>8} {'max ms':>8} {'requests':>9} {'circuit':>10}"
+
+    print(f"Hung backend ({args.hang:g}s per request, HTTP client timeout {args.http_timeout:g}s), "
+          f"{args.messages} concurrent messages per wave")
+    print(header)
+    agent_runtime.LLM_BREAKER_TIMEOUT_FLOOR = args.breaker_floor
+    failed = False
+    runs = [("unprotected", False, args.agent_timeout), ("protected", True, args.agent_timeout),
+            ("deadline first", True, args.long_agent_timeout)]
+    for label, enabled, agent_timeout in runs:
+        breaker = protect(agents, enabled, agent_timeout, args.failures, cooldown=60)
+        deadline_seconds = args.deadline if enabled else None
+        for n in (1, 2):
+            server.set(mode="hang", hang=args.hang)
+            report(f"{label}, wave {n}", await wave(args.messages, deadline_seconds), server, breaker)
+            # The circuit must open on the timeouts themselves, not once the
+            # abandoned calls hit the HTTP client's timeout
+            if enabled and n == 1 and breaker.state == CLOSED:
+                print(f"FAIL: circuit still closed after a wave against a hung backend ({label})")
+                failed = True
+            # Let abandoned calls finish before the next wave
+            await asyncio.sleep(args.http_timeout)
+
+    print(f"\nErroring backend (HTTP 500), {args.messages} concurrent messages per wave")
+    print(header)
+    for enabled in (False, True):
+        label = "protected" if enabled else "unprotected"
+        breaker = protect(agents, enabled, args.agent_timeout, args.failures, args.cooldown)
+        deadline_seconds = args.deadline if enabled else None
+        for n in (1, 2):
+            server.set(mode="error")
+            report(f"{label}, wave {n}", await wave(args.messages, deadline_seconds), server, breaker)
+    # Server recovers: after the cooldown one probe closes the circuit
+    await asyncio.sleep(args.cooldown)
+    server.set(mode="ok", delay=args.latency)
+    await wave(1, args.deadline)
+    server.set(mode="ok", delay=args.latency)
+    report("protected, recovered", await wave(args.messages, args.deadline), server, breaker)
+
+    print(f"\nTail latency: {args.checks} escalation checks, {args.latency * 1000:.0f} ms replies, "
+          f"{args.tail_rate:.0%} take {args.tail_delay:g}s")
+    print(f"{'':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'requests':>9}")
+    protect(agents, True, args.agent_timeout * 4, args.failures, args.cooldown)
+    for hedge_after in ("", str(args.hedge_after)):
+        agent_runtime.LLM_HEDGE_AFTER_SECONDS = hedge_after
+        server.set(mode="ok", delay=args.latency, tail_rate=args.tail_rate, tail_delay=args.tail_delay)
+        server._random.seed(7)
+        latencies = []
+        for start in range(0, args.checks, args.check_concurrency):
+            batch = range(start, min(args.checks, start + args.check_concurrency))
+            latencies += await asyncio.gather(*(timed_escalation(f"Something is weighing on me ({i})")
+                                                for i in batch))
+        label = f"hedged after {hedge_after}s" if hedge_after else "no hedging"
+        print(f"{label:<28} {statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.0f} {server.requests:>9}")
+    server.httpd.shutdown()
+    if failed:
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM timeout, circuit breaker and hedging benchmark")
+    parser.add_argument("--messages", type=int, default=12, help="Concurrent inbound messages per wave")
+    parser.add_argument("--hang", type=float, default=5.0, help="Seconds the hung server holds a request")
+    parser.add_argument("--http-timeout", type=float, default=2.0, help="HTTP client timeout per request")
+    parser.add_argument("--agent-timeout", type=float, default=0.5, help="Per-agent call timeout when protected")
+    parser.add_argument("--deadline", type=float, default=1.5, help="Inbound deadline when protected")
+    parser.add_argument("--long-agent-timeout", type=float, default=3.0,
+                        help="Per-agent timeout above the deadline, for the deadline-first run")
+    parser.add_argument("--breaker-floor", type=float, default=1.0,
+                        help="LLM_BREAKER_TIMEOUT_FLOOR: seconds a deadline-cut call must wait to count")
+    parser.add_argument("--failures", type=int, default=3, help="Failures that open the circuit")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="Seconds before an open circuit probes")
+    parser.add_argument("--slots", type=int, default=4, help="Backend concurrency cap")
+    parser.add_argument("--latency", type=float, default=0.02, help="Normal reply latency (seconds)")
+    parser.add_argument("--checks", type=int, default=400, help="Escalation checks in the tail scenario")
+    parser.add_argument("--check-concurrency", type=int, default=2, help="Escalation checks in flight at once")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Fraction of slow replies")
+    parser.add_argument("--tail-delay", type=float, default=0.5, help="Seconds a slow reply takes")
+    parser.add_argument("--hedge-after", type=float, default=0.08, help="Hedge delay when hedging is on")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
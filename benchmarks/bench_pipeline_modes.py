@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Backend round trips per reply: multi-agent vs consolidated pipeline
+
+Replaces every swarms Agent.run() with a counting mock that sleeps for a
+fixed latency and pushes the same messages (prayer, FAQ, general, default;
+English and Spanish) through inbound_agent_async in both
+INBOUND_PIPELINE_MODE settings. Reports LLM calls and wall time per message.
+--invalid-rate makes that share of consolidated replies unparseable, to
+show the cost of falling back to the multi-agent path.
+
+The local escalation classifier and verse index already take two calls
+per message off the multi-agent path, so a third row runs it with both
+asking the LLM, as every stage did before they existed.
+
+Also checks the consolidated reply parser against the output shapes small
+models produce (reasoning blocks, code fences, chatter, wrong language),
+and that consolidated plans for urgent spiritual messages complete at
+critical priority, as routed prayer requests do.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline_modes [--latency 0.02] [--invalid-rate 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+# Count real backend calls, not cache hits, and keep the console quiet
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from agents.inbound import inbound_agent, swarm_agents
+from agents.inbound.swarm_agents import parse_consolidated_reply
+from agents.shared import escalation_classifier
+from agents.shared.llm_scheduler import CRITICAL
+
+MOCK_AGENTS = [
+    "escalation_agent",
+    "scripture_agent",
+    "tone_agent",
+    "faq_enhancement_agent",
+    "translation_agent",
+    "prayer_routing_agent",
+    "consolidated_agent",
+]
+
+MESSAGES = [
+    ("Could you pray for my family this week?", "en"),
+    ("What are your service times?", "en"),
+    ("I need some guidance about my career.", "en"),
+    ("Thank you for the encouraging sermon on Sunday.", "en"),
+    ("¿Pueden orar por mi familia esta semana?", "es"),
+    ("¿Cuál es el horario de los servicios?", "es"),
+]
+
+CANDIDATES = ["Psalm 23:1 - The Lord is my shepherd; I shall not want.",
+              "Philippians 4:6 - Do not be anxious about anything."]
+
+PARSER_CASES = [
+    ('{"response": "Beloved, be at peace.", "verse": "Psalm 23:1", "language": "en"}', "en", True),
+    ('<think>The user is worried...</think>\n{"response": "Be at peace.", "verse": "Philippians 4:6", "language": "en"}', "en", True),
+    ('```json\n{"response": "Paz a ti.", "verse": "Psalm 23:1 - The Lord is my shepherd", "language": "Spanish"}\n```', "es", True),
+    ('Here is the reply: {"response": "Be at peace.", "language": "en"} Hope this helps!', "en", True),
+    ('{"response": "Be at peace.", "verse": "John 3:16", "language": "en"}', "en", True),
+    ('{"response": "Be at peace.", "verse": "Psalm 23:1", "language": "en"}', "es", False),
+    ('{"response": "", "verse": "Psalm 23:1", "language": "en"}', "en", False),
+    ('{"response": "Be at peace.", "verse": "Psalm 23:1", "language": "en"', "en", False),
+    ("Beloved, be at peace. Psalm 23:1", "en", False),
+]
+
+# (message, routed type) pairs whose consolidated plan must be urgent, or must not
+URGENT_CASES = [
+    ("Please pray for me, I am under spiritual attack every night", "prayer_request", True),
+    ("I need deliverance, I think my house is cursed", "general_inquiry", True),
+    ("Please send an urgent prayer for my mother", "prayer_request", True),
+    ("Please pray for my exams next week", "prayer_request", False),
+]
+
+def install_mock_agents(latency: float, invalid_rate: float, calls: Counter):
+    """Swap every agent's run() for a counting, fixed-latency mock"""
+    rng = random.Random(11)
+
+    def mock_for(name):
+        def run(prompt):
+            calls[name] += 1
+            time.sleep(latency)
+            if name == "consolidated_agent":
+                if rng.random() < invalid_rate:
+                    return "Beloved, the Lord is near."
+                language = prompt.split("Language: ")[1].split()[0]
+                return json.dumps({"response": "Beloved, the Lord is near.", "verse": "Psalm 23:1", "language": language})
+            return "NORMAL PRAYER_REQUEST Beloved, the Lord is near."
+        return run
+
+    for name in MOCK_AGENTS:
+        getattr(swarm_agents, name).run = mock_for(name)
+
+async def run_messages(mode: str) -> float:
+    inbound_agent.INBOUND_PIPELINE_MODE = mode
+    start = time.perf_counter()
+    for message, language in MESSAGES:
+        await inbound_agent.inbound_agent_async(message, language)
+    return time.perf_counter() - start
+
+def local_stages(enabled: bool):
+    """Decide escalation and scripture locally (the default) or ask the LLM for both"""
+    escalation_classifier.ESCALATION_CLASSIFIER = enabled
+    swarm_agents.local_scripture_recommendation = local_scripture if enabled else lambda message: ""
+
+local_scripture = swarm_agents.local_scripture_recommendation
+
+def check_urgent() -> int:
+    failures = 0
+    for message, message_type, urgent in URGENT_CASES:
+        plan = inbound_agent.consolidated_plan(message_type, message)
+        if (inbound_agent.plan_priority(plan) == CRITICAL) != urgent:
+            failures += 1
+            print(f"  URGENCY MISMATCH (expected {'critical' if urgent else 'normal'}): {message!r}")
+    print(f"Urgency: {len(URGENT_CASES) - failures}/{len(URGENT_CASES)} consolidated plans prioritized as expected")
+    return failures
+
+def check_parser() -> int:
+    failures = 0
+    for text, language, usable in PARSER_CASES:
+        reply = parse_consolidated_reply(text, CANDIDATES, language)
+        if (reply is not None) != usable:
+            failures += 1
+            print(f"  PARSER MISMATCH (expected {'usable' if usable else 'rejected'}): {text!r}")
+    print(f"Parser: {len(PARSER_CASES) - failures}/{len(PARSER_CASES)} reply shapes handled as expected")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-agent vs consolidated pipeline benchmark")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock backend latency per call (seconds)")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Share of unparseable consolidated replies")
+    args = parser.parse_args()
+
+    failures = check_parser() + check_urgent()
+
+    calls: Counter = Counter()
+    install_mock_agents(args.latency, args.invalid_rate, calls)
+    print(f"\nMock latency: {args.latency * 1000:.0f} ms/call, {len(MESSAGES)} messages, "
+          f"invalid consolidated replies: {args.invalid_rate:.0%}")
+    print(f"{'mode':>21} {'calls/msg':>10} {'ms/msg':>10}  calls by agent")
+
+    # Train the classifier and load the verse index outside the timings
+    escalation_classifier.load_escalation_classifier()
+    local_scripture("warm up")
+
+    results, times = {}, {}
+    runs = [("multi_agent, all LLM", "multi_agent", False), ("multi_agent", "multi_agent", True),
+            ("consolidated", "consolidated", True)]
+    for label, mode, local in runs:
+        calls.clear()
+        local_stages(local)
+        elapsed = asyncio.run(run_messages(mode))
+        results[label] = sum(calls.values()) / len(MESSAGES)
+        times[label] = elapsed
+        by_agent = ", ".join(f"{name.replace('_agent', '')}={count}" for name, count in sorted(calls.items()))
+        print(f"{label:>21} {results[label]:>10.2f} {elapsed / len(MESSAGES) * 1000:>10.1f}  {by_agent}")
+    local_stages(True)
+
+    for baseline in ("multi_agent, all LLM", "multi_agent"):
+        print(f"\nConsolidated vs {baseline}: {results[baseline] / results['consolidated']:.2f}x fewer calls, "
+              f"{times[baseline] / times['consolidated']:.2f}x faster per message")
+    print("(inbound translation stays a separate call: routing and escalation need the English text)")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
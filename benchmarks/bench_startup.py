@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark
+
+Imports the hub application in fresh interpreters and reports how long the
+import takes and how much memory a worker holds before serving any traffic,
+then the cost of warming up agents, LLM clients and local indexes. Agents
+are built lazily, so the import figure is what every worker (and every
+--reload cycle) pays on boot.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--runs 5] [--no-warmup]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD_SCRIPT = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    # Current RSS from /proc where available, else the peak from getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+result = {"baseline_mb": rss_mb()}
+start = time.perf_counter()
+import ministry_hub_main
+result["import_s"] = time.perf_counter() - start
+result["import_mb"] = rss_mb()
+result["modules"] = len(sys.modules)
+
+if sys.argv[1] == "warmup":
+    start = time.perf_counter()
+    try:
+        result["agents_built"] = ministry_hub_main.warm_up_services()
+    except Exception as e:
+        result["warmup_error"] = str(e)
+    result["warmup_s"] = time.perf_counter() - start
+    result["warmup_mb"] = rss_mb()
+
+print(json.dumps(result))
+"""
+
+def run_child(warmup: bool) -> dict:
+    """One cold start in a fresh interpreter"""
+    env = dict(os.environ, AGENT_WARMUP="false")
+    child = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, "warmup" if warmup else "import"],
+        capture_output=True, text=True, env=env,
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"Worker import failed:\n{child.stderr[-2000:]}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up measurement")
+    args = parser.parse_args()
+
+    results = [run_child(not args.no_warmup) for _ in range(args.runs)]
+
+    def median(key: str) -> float:
+        return statistics.median(r[key] for r in results)
+
+    print(f"Cold starts: {args.runs} (medians)")
+    print(f"{'interpreter RSS':>20} {median('baseline_mb'):>10.1f} MB")
+    print(f"{'import time':>20} {median('import_s') * 1000:>10.1f} ms")
+    print(f"{'RSS after import':>20} {median('import_mb'):>10.1f} MB")
+    print(f"{'modules loaded':>20} {median('modules'):>10.0f}")
+
+    if not args.no_warmup:
+        errors = {r["warmup_error"] for r in results if "warmup_error" in r}
+        if errors:
+            print(f"Warm-up failed: {errors.pop()}")
+            return
+        print(f"{'agents built':>20} {median('agents_built'):>10.0f}")
+        print(f"{'warm-up time':>20} {median('warmup_s') * 1000:>10.1f} ms")
+        print(f"{'RSS after warm-up':>20} {median('warmup_mb'):>10.1f} MB")
+
+if __name__ == "__main__":
+    main()
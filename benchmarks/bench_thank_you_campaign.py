@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Bulk thank-you campaign: throughput, memory and resume
+
+Writes synthetic donor CSVs, replaces the thank-you agent's run() with a
+stub that sleeps for --latency and returns a note template, and runs the
+campaign pipeline over each file. Reports notes per minute, LLM calls and
+the traced memory peak per donor count (it should not grow with the file),
+then interrupts a run part-way, resumes it from its checkpoint and checks
+the output matches an uninterrupted run byte for byte. Last, a run with
+the backend down is interrupted and resumed once it is back: the stock
+note must not be checkpointed or counted as LLM calls, and the resumed
+run must generate the templates again.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_thank_you_campaign [--donors 10000 100000] [--latency 0.5]
+"""
+
+import argparse
+import csv
+import filecmp
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Every template request must reach the stub backend
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
+os.environ.setdefault("LLM_COALESCE", "false")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from agents.donation import thank_you_campaign
+from agents.donation.donation_agents import thank_you_agent
+from agents.donation.thank_you_campaign import DEFAULT_TIERS, parse_tiers, run_campaign
+from agents.shared.circuit_breaker import CircuitBreaker
+from agents.shared.llm_registry import llm_registry
+
+STUB_TEMPLATE = "Dear {name}, thank you for your gift of {amount}. {verse} Blessings, Dr. Myles"
+FIRST_NAMES = ["Sarah", "James", "Grace", "Daniel", "Ruth", "Samuel", "Esther", "David"]
+LAST_NAMES = ["Johnson", "Okafor", "Nguyen", "Garcia", "Smith", "Mensah", "Kim", "Brown"]
+
+def install_stub_agent(latency: float):
+    def stub_run(prompt):
+        time.sleep(latency)
+        return STUB_TEMPLATE
+    thank_you_agent.run = stub_run
+
+def install_failing_agent():
+    def failing_run(prompt):
+        raise ConnectionError("Connection refused")
+    thank_you_agent.run = failing_run
+
+def write_donors(path: str, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["donor_id", "donor_name", "email", "amount"])
+        for i in range(count):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            amount = rng.choice(["$25", "$50", "$120", "$1,000.00", "750", "$5,000"])
+            writer.writerow([f"d{i}", name, f"donor{i}@example.org", amount])
+
+class Interrupted(Exception):
+    pass
+
+def check_fallback_resume(tmp: str, donors: str, count: int, tiers, variants: int, latency: float) -> list:
+    """Interrupt a run made with the backend down, resume it with the backend up; failed checks"""
+    failures = []
+    output = os.path.join(tmp, "fallback.jsonl")
+    install_failing_agent()
+    original = interrupt_after(count // 2)
+    try:
+        run_campaign(donors, output, tiers, variants, fresh=True)
+    except Interrupted:
+        pass
+    thank_you_campaign.read_donors = original
+    with open(output + ".checkpoint", "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint["templates"] or checkpoint["llm_calls"]:
+        failures.append(f"backend down: checkpoint kept {len(checkpoint['templates'])} tiers of templates "
+                        f"and {checkpoint['llm_calls']} LLM calls")
+
+    # The resumed run is a new process, with a closed circuit
+    backend = llm_registry.get("default")
+    backend.breaker = CircuitBreaker(backend.name)
+    install_stub_agent(latency)
+    report = run_campaign(donors, output, tiers, variants)
+    if report["fallback_tiers"] or report["llm_calls"] != len(report["tiers"]) * variants:
+        failures.append(f"resume: stock note still used for {report['fallback_tiers']}, "
+                        f"{report['llm_calls']} LLM calls")
+    print(f"Backend down for the first {report['resumed_after']} donors: resume generated "
+          f"{report['llm_calls']} templates, stock note used for {report['fallback_tiers'] or 'no tier'}")
+    return failures
+
+def interrupt_after(rows: int):
+    """Make read_donors raise after `rows` donors, like a crash mid-campaign"""
+    read_donors = thank_you_campaign.read_donors
+
+    def interrupted(path):
+        for i, row in enumerate(read_donors(path)):
+            if i == rows:
+                raise Interrupted()
+            yield row
+    thank_you_campaign.read_donors = interrupted
+    return read_donors
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk thank-you campaign benchmark")
+    parser.add_argument("--donors", type=int, nargs="+", default=[10000, 100000], help="Donor counts to run")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM latency per template (seconds)")
+    parser.add_argument("--variants", type=int, default=3, help="Templates per tier")
+    args = parser.parse_args()
+
+    install_stub_agent(args.latency)
+    tiers = parse_tiers(DEFAULT_TIERS)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Stub latency: {args.latency * 1000:.0f} ms/template, {args.variants} variants x {len(tiers)} tiers")
+        # Load the scripture index and build the agent outside the measurements
+        warm_up = os.path.join(tmp, "warm_up.csv")
+        write_donors(warm_up, 10)
+        run_campaign(warm_up, os.path.join(tmp, "warm_up.jsonl"), tiers, args.variants, fresh=True)
+
+        print(f"{'donors':>8} {'notes':>8} {'llm calls':>10} {'seconds':>8} {'notes/min':>11} {'peak KiB':>9}")
+        for count in args.donors:
+            donors = os.path.join(tmp, f"donors_{count}.csv")
+            output = os.path.join(tmp, f"notes_{count}.jsonl")
+            write_donors(donors, count)
+            report = run_campaign(donors, output, tiers, args.variants, fresh=True)
+            # A second, traced run for memory: tracing slows the first one down
+            tracemalloc.start()
+            run_campaign(donors, output, tiers, args.variants, fresh=True)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{count:>8} {report['notes']:>8} {report['llm_calls']:>10} {report['elapsed_seconds']:>8.2f} "
+                  f"{report['notes_per_minute']:>11,.0f} {peak / 1024:>9.0f}")
+
+        # Interrupt between checkpoints, resume, and compare with the full run
+        count = min(args.donors)
+        donors = os.path.join(tmp, f"donors_{count}.csv")
+        resumed = os.path.join(tmp, "resumed.jsonl")
+        original = interrupt_after(count // 2 + 123)
+        try:
+            run_campaign(donors, resumed, tiers, args.variants, fresh=True)
+        except Interrupted:
+            pass
+        thank_you_campaign.read_donors = original
+        report = run_campaign(donors, resumed, tiers, args.variants)
+        identical = filecmp.cmp(resumed, os.path.join(tmp, f"notes_{count}.jsonl"), shallow=False)
+        print(f"\nResumed after {report['resumed_after']} of {count} donors, "
+              f"{report['llm_calls']} LLM calls in total: output {'matches' if identical else 'DIFFERS FROM'} "
+              f"the uninterrupted run")
+
+        failures = check_fallback_resume(tmp, donors, count, tiers, args.variants, args.latency)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if not identical or failures:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,26 @@ Ministry AI Hub - Unified Inbound & Donation System
 Professional AI-driven ministry communication platform
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from agents.inbound.api import inbound_router
 from agents.donation.api import donation_router
+from agents.donation.impact_story_pool import get_impact_story_stats, shutdown_impact_story_pool, start_impact_story_pool
 from agents.shared.utils import setup_logging, validate_environment, get_supported_languages
+from agents.shared.agent_runtime import get_coalescing_stats, run_blocking, shutdown_executor
+from agents.shared.llm_cache import get_cache_stats
+from agents.shared.analytics import get_analytics_summary, shutdown_analytics
+from agents.shared.job_queue import get_job_stats, shutdown_jobs, start_jobs
+from agents.shared.llm_registry import get_backend_stats, warm_up_agents
+from agents.shared.faq_tool import faq_store
+from agents.shared.scripture_index import load_scripture_index
+from agents.shared.language_id import load_language_identifier
+from agents.shared.metrics import metrics_registry, render_metrics
+from agents.shared.tracing import STAGE_TIMING_HEADER, server_timing, start_trace
+import asyncio
+import os
+import time
 import uvicorn
 
 # Setup logging
@@ -31,10 +46,76 @@ hub_app.add_middleware(
     allow_headers=["*"],
 )
 
+request_seconds = metrics_registry.histogram(
+    "ministry_http_request_duration_seconds",
+    "HTTP request latency by route, method and status",
+    ("route", "method", "status"),
+)
+
+# Media types of the streaming endpoints (inbound SSE stream, NDJSON batch)
+STREAMED_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+@hub_app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time each request and optionally attach its per-stage breakdown"""
+    trace = start_trace() if STAGE_TIMING_HEADER else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not path, so job IDs cannot grow the label set;
+    # templates are relative to the /api/v1 mount (/donation/jobs/{job_id})
+    route = request.scope.get("route")
+    request_seconds.observe(
+        time.perf_counter() - start,
+        route=getattr(route, "path", None) or "unmatched",
+        method=request.method,
+        status=str(response.status_code),
+    )
+    # Streamed responses send headers before their stages finish, so they carry none
+    if trace and not response.headers.get("content-type", "").startswith(STREAMED_MEDIA_TYPES):
+        response.headers["Server-Timing"] = server_timing(trace)
+    return response
+
 # Include routers with proper prefixes
 hub_app.include_router(inbound_router, prefix="/api/v1")
 hub_app.include_router(donation_router, prefix="/api/v1")
 
+# Build agents in the background at startup instead of on the first request
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "false").lower() == "true"
+
+@hub_app.on_event("startup")
+async def warm_up():
+    """Resume unfinished background jobs and fill the impact story pool; optionally build agents"""
+    await run_blocking(start_jobs)
+    await run_blocking(start_impact_story_pool)
+    if AGENT_WARMUP:
+        asyncio.create_task(warm_up_in_background())
+
+def warm_up_services() -> int:
+    """Build agents, LLM clients and lazy local indexes; returns agents built"""
+    # Imported here: the classifier pulls in numpy, which startup avoids
+    from agents.shared.escalation_classifier import load_escalation_classifier
+    built = warm_up_agents()
+    faq_store.semantic_index
+    load_scripture_index()
+    load_language_identifier()
+    load_escalation_classifier()
+    return built
+
+async def warm_up_in_background():
+    try:
+        built = await run_blocking(warm_up_services)
+        logger.info(f"Warm-up built {built} agents")
+    except Exception as e:
+        logger.error(f"Agent warm-up failed: {e}")
+
+@hub_app.on_event("shutdown")
+async def shutdown_agents():
+    """Release the shared LLM worker pool, stop job workers and commit pending analytics"""
+    shutdown_jobs()
+    shutdown_impact_story_pool()
+    shutdown_executor(wait=False)
+    shutdown_analytics()
+
 @hub_app.get("/")
 async def root():
     """Ministry AI Hub root endpoint"""
@@ -55,13 +136,18 @@ async def root():
         "supported_languages": get_supported_languages(),
         "endpoints": {
             "inbound_process": "/api/v1/inbound/process",
+            "inbound_stream": "/api/v1/inbound/process/stream",
+            "inbound_batch": "/api/v1/inbound/process/batch",
             "inbound_translate": "/api/v1/inbound/translate", 
             "inbound_prayer": "/api/v1/inbound/prayer",
             "inbound_faq": "/api/v1/inbound/faq",
             "donation_thank_you": "/api/v1/donation/thank-you",
             "donation_impact": "/api/v1/donation/impact-story",
             "donation_recurring": "/api/v1/donation/recurring-giving",
-            "donation_qa": "/api/v1/donation/question"
+            "donation_qa": "/api/v1/donation/question",
+            "donation_jobs": "/api/v1/donation/jobs/{job_id}",
+            "analytics": "/analytics",
+            "metrics": "/metrics"
         }
     }
 
@@ -86,7 +172,12 @@ async def comprehensive_health_check():
                 },
                 "shared_services": {
                     "status": "operational",
-                    "services": ["faq_system", "analytics", "logging"]
+                    "services": ["faq_system", "analytics", "logging", "llm_cache", "llm_registry", "jobs", "impact_story_pool"],
+                    "llm_cache": get_cache_stats(),
+                    "llm_coalescing": get_coalescing_stats(),
+                    "llm_backends": get_backend_stats(),
+                    "jobs": await run_blocking(get_job_stats),
+                    "impact_story_pool": get_impact_story_stats()
                 }
             },
             "environment": "validated",
@@ -106,6 +197,18 @@ async def comprehensive_health_check():
             }
         )
 
+@hub_app.get("/analytics")
+async def analytics_summary(window_hours: float = 24, bucket_minutes: float = 60):
+    """Latency percentiles per source and language, escalation and FAQ hit rates"""
+    if window_hours <= 0 or bucket_minutes <= 0:
+        raise HTTPException(status_code=400, detail="window_hours and bucket_minutes must be positive")
+    return await run_blocking(get_analytics_summary, window_hours * 3600, bucket_minutes * 60)
+
+@hub_app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage, LLM call and request metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @hub_app.get("/info")
 async def system_info():
     """Detailed system information"""
@@ -143,7 +246,7 @@ async def system_info():
             "ai_framework": "Swarms",
             "language_model": "GPT-3.5-turbo",
             "api_framework": "FastAPI",
-            "database": "ChromaDB (FAQ)",
+            "database": "In-memory keyword + NumPy embedding index (FAQ)",
             "caching": "Redis",
             "logging": "Python logging"
         }